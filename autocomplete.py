@@ -0,0 +1,60 @@
+from bisect import insort
+from typing import Dict, Iterable, List
+
+# Discord shows at most this many autocomplete choices
+MAX_SUGGESTIONS = 25
+
+
+class _Node:
+    __slots__ = ("children", "names")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # Sorted; capped at MAX_SUGGESTIONS since nobody sees the rest
+        self.names: List[str] = []
+
+
+class PrefixIndex:
+    """Case-insensitive prefix lookup over a fixed set of names.
+
+    Every word of a name is indexed, so "mad" finds "Real Madrid" as well as
+    "Madrid Athletic". Suggestions are precomputed per node, which makes a
+    lookup cost the length of the prefix regardless of how many names there
+    are. Build a new index (or call ``rebuild()``) when the names change.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.rebuild(names)
+
+    def rebuild(self, names: Iterable[str]) -> None:
+        self._root = _Node()
+        for name in set(names):
+            self._insert(name)
+
+    def _insert(self, name: str) -> None:
+        self._add(self._root, name)
+        key = name.casefold()
+        starts = [0] + [i + 1 for i, char in enumerate(key) if char.isspace()]
+        # A word that repeats in the name shares its path; only add the name once per node
+        seen = set()
+        for start in starts:
+            node = self._root
+            for char in key[start:]:
+                node = node.children.setdefault(char, _Node())
+                if id(node) not in seen:
+                    seen.add(id(node))
+                    self._add(node, name)
+
+    @staticmethod
+    def _add(node: _Node, name: str) -> None:
+        if len(node.names) < MAX_SUGGESTIONS or name < node.names[-1]:
+            insort(node.names, name)
+            del node.names[MAX_SUGGESTIONS:]
+
+    def suggest(self, prefix: str) -> List[str]:
+        node = self._root
+        for char in (prefix or "").casefold().lstrip():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return list(node.names)
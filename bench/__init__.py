@@ -0,0 +1,5 @@
+"""Offline benchmarks for the league bot.
+
+Runs the command handlers against in-process stand-ins for Discord, so
+they can be timed without a connection. See ``bench.run``.
+"""
@@ -0,0 +1,240 @@
+import asyncio
+import itertools
+import types
+from typing import Dict, Iterable, List, Optional
+
+import nextcord
+
+# Snowflake-looking ids for messages and DM channels
+_ids = itertools.count(1 << 50)
+
+
+class FakeRole:
+    __slots__ = ("id", "name", "guild")
+
+    def __init__(self, guild: "FakeGuild", role_id: int, name: str):
+        self.id = role_id
+        self.name = name
+        self.guild = guild
+
+    @property
+    def members(self) -> list:
+        # nextcord scans the guild's member cache the same way
+        return [member for member in self.guild.members if self in member.roles]
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+    def is_default(self) -> bool:
+        return False
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"FakeRole({self.name!r})"
+
+
+class FakeMessage:
+    def __init__(self, content: Optional[str] = None, embed=None, view=None, file=None):
+        self.id = next(_ids)
+        self.channel = types.SimpleNamespace(id=next(_ids))
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.file = file
+        self.edits = 0
+
+    async def edit(self, content=None, embed=None, view=nextcord.utils.MISSING, **kwargs):
+        self.edits += 1
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embed = embed
+        if view is not nextcord.utils.MISSING:
+            self.view = view
+        return self
+
+
+class FakeMember:
+    """A guild member. ``edit`` and ``send`` cost the guild's simulated API latency."""
+
+    __slots__ = ("id", "name", "display_name", "guild", "roles", "dms", "last_dm")
+
+    def __init__(self, guild: "FakeGuild", member_id: int, name: str, roles: Iterable[FakeRole] = ()):
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.guild = guild
+        self.roles: List[FakeRole] = list(roles)
+        self.dms = 0
+        self.last_dm: Optional[FakeMessage] = None
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    async def edit(self, roles=None, reason=None, **kwargs):
+        await self.guild.api_call()
+        if roles is not None:
+            self.roles = list(roles)
+
+    async def add_roles(self, *roles, reason=None):
+        await self.edit(roles=self.roles + [role for role in roles if role not in self.roles])
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.edit(roles=[role for role in self.roles if role not in roles])
+
+    async def send(self, content=None, embed=None, view=None, **kwargs) -> FakeMessage:
+        await self.guild.api_call()
+        self.dms += 1
+        self.last_dm = FakeMessage(content, embed, view)
+        return self.last_dm
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"FakeMember({self.id}, {self.name!r})"
+
+
+class FakeGuild:
+    """A guild with a gateway member cache and the full member list behind it.
+
+    ``remote`` is everyone in the guild as Discord knows it; ``get_member``
+    only sees what has been cached, like the library in lean gateway mode.
+    Every simulated API call sleeps ``latency`` seconds.
+    """
+
+    def __init__(self, guild_id: int, latency: float = 0.0):
+        self.id = guild_id
+        self.latency = latency
+        self.api_calls = 0
+        self._roles: Dict[int, FakeRole] = {}
+        self._members: Dict[int, FakeMember] = {}
+        self.remote: Dict[int, FakeMember] = {}
+
+    async def api_call(self) -> None:
+        self.api_calls += 1
+        await asyncio.sleep(self.latency)
+
+    @property
+    def roles(self) -> List[FakeRole]:
+        return list(self._roles.values())
+
+    @property
+    def members(self) -> List[FakeMember]:
+        return list(self._members.values())
+
+    @property
+    def chunked(self) -> bool:
+        return len(self._members) == len(self.remote)
+
+    async def chunk(self, *, cache: bool = True) -> List[FakeMember]:
+        # One gateway chunk per 1000 members
+        for _ in range(0, len(self.remote), 1000):
+            await self.api_call()
+        if cache:
+            self._members.update(self.remote)
+        return list(self.remote.values())
+
+    def add_role(self, role_id: int, name: str) -> FakeRole:
+        role = self._roles[role_id] = FakeRole(self, role_id, name)
+        return role
+
+    def add_member(self, member_id: int, name: str, roles: Iterable[FakeRole] = (),
+                   cached: bool = True) -> FakeMember:
+        member = self.remote[member_id] = FakeMember(self, member_id, name, roles)
+        if cached:
+            self._members[member_id] = member
+        return member
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self._roles.get(role_id)
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self._members.get(member_id)
+
+    async def fetch_member(self, member_id: int) -> FakeMember:
+        await self.api_call()
+        member = self.remote.get(int(member_id))
+        if member is None:
+            raise nextcord.NotFound(types.SimpleNamespace(status=404, reason="Not Found"), "Unknown Member")
+        return member
+
+    async def query_members(self, query=None, *, limit=5, user_ids=None, presences=False, cache=True):
+        await self.api_call()
+        found = [self.remote[m] for m in user_ids or () if m in self.remote][:limit]
+        if cache:
+            for member in found:
+                self._members[member.id] = member
+        return found
+
+
+class FakeAttachment:
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self.size = len(data)
+        self._data = data
+
+    async def read(self) -> bytes:
+        return self._data
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, ephemeral: bool = False, **kwargs):
+        self._done = True
+
+    async def send_message(self, content=None, embed=None, view=None, **kwargs):
+        self._done = True
+        self._interaction.sent.append(FakeMessage(content, embed, view))
+
+    async def edit_message(self, content=None, embed=None, view=None, **kwargs):
+        self._done = True
+        if self._interaction.message is not None:
+            await self._interaction.message.edit(content=content, embed=embed, view=view)
+
+    async def send_autocomplete(self, choices):
+        self._done = True
+        self._interaction.sent.append(choices)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content=None, embed=None, view=None, file=None, **kwargs) -> FakeMessage:
+        message = FakeMessage(content, embed, view, file)
+        self._interaction.sent.append(message)
+        return message
+
+
+class FakeInteraction:
+    """What a command handler sees: the caller, the guild and somewhere to answer.
+
+    ``message`` is set for button clicks. Everything sent back is kept in
+    ``sent``, in order.
+    """
+
+    def __init__(self, user: FakeMember, guild: Optional[FakeGuild] = None, message: Optional[FakeMessage] = None):
+        self.user = user
+        self.guild = guild if guild is not None else user.guild
+        self.guild_id = self.guild.id
+        self.message = message
+        self.sent: list = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    def last(self):
+        return self.sent[-1] if self.sent else None
@@ -0,0 +1,128 @@
+"""Compare the league snapshot formats on a synthetic league.
+
+    python -m bench.formats                      # 50 teams, 10k players, 20 runs per format
+    python -m bench.formats --players 50000 --runs 5
+
+For each format: bytes on disk, time to encode a snapshot and to decode it
+back into teams and a registry, and how late the event loop woke up
+(p99 and worst) while the storage thread encoded snapshots. Encoders written in C (the stdlib's
+compact JSON, orjson) keep the GIL for the whole call, so an encode can
+stall the loop for its full length even off the loop; ``JsonSerializer``
+splits the registry into chunks for that reason.
+
+"json-pretty" is what the bot wrote before snapshots became compact, and
+what /exportleague still produces.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from roster import teams_from_json, teams_to_json
+from serializers import PRETTY, BinaryFormat, JsonFormat, OrjsonSerializer, orjson
+from storage_io import LoopLagMonitor, StorageIO
+
+from .league import generate_league
+from .run import percentile
+
+
+def formats(directory: str) -> Dict[str, object]:
+    def json_files(name, serializer=None):
+        team_path = os.path.join(directory, f"{name}.team_data.json")
+        players_path = os.path.join(directory, f"{name}.registered_players.json")
+        return JsonFormat(team_path, players_path, serializer) if serializer else JsonFormat(team_path, players_path)
+
+    found = {"json-pretty": json_files("json-pretty", PRETTY), "json": json_files("json")}
+    if orjson is not None:
+        found["orjson"] = json_files("orjson", OrjsonSerializer())
+    found["binary"] = BinaryFormat(os.path.join(directory, "league.snap"))
+    return found
+
+
+def timed(fn, runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def loop_lag(fmt, data, runs: int) -> List[float]:
+    """Event-loop lag samples, in seconds and sorted, while ``runs`` snapshots are encoded on a StorageIO thread."""
+    io = StorageIO()
+    lags = []
+    monitor = LoopLagMonitor(0.001, on_lag=lags.append)
+    monitor.start()
+    for _ in range(runs):
+        await io.run(fmt.encode, data)
+        await asyncio.sleep(0.005)
+    await monitor.close()
+    io.shutdown()
+    return sorted(lags)
+
+
+def measure(fmt, data, runs: int) -> dict:
+    fmt.write(data)
+    size = sum(len(raw) for _, raw in fmt.encode(data))
+    encode = sorted(timed(lambda: fmt.encode(data), runs))
+
+    def decode():
+        team_data, _ = fmt.read()
+        teams_from_json(team_data)
+    decoded = fmt.read()
+    if decoded != data:
+        raise AssertionError(f"{fmt.name} didn't read back what it wrote")
+    decode_times = sorted(timed(decode, runs))
+    lags = asyncio.run(loop_lag(fmt, data, runs))
+    return {
+        "bytes": size,
+        "encode_p50_ms": statistics.median(encode) * 1000,
+        "encode_p95_ms": percentile(encode, 0.95) * 1000,
+        "decode_p50_ms": statistics.median(decode_times) * 1000,
+        "loop_lag_p99_ms": percentile(lags, 0.99) * 1000,
+        "loop_lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+    }
+
+
+def main(args) -> int:
+    league = generate_league(args.teams, args.players, args.roster_size, 0, seed=args.seed)
+    with tempfile.TemporaryDirectory(prefix="bench-formats-") as directory:
+        # The same copy LeagueStore.snapshot() hands to the storage thread
+        started = time.perf_counter()
+        data = (teams_to_json(league.teams), {pid: dict(player) for pid, player in league.players.items()})
+        copied = time.perf_counter() - started
+        print(f"{len(league.teams)} teams, {len(league.players)} players; "
+              f"snapshot copy on the loop {copied * 1000:.1f}ms\n")
+        if orjson is None:
+            print("orjson isn't installed; skipping it\n")
+
+        print(f"  {'format':<12} {'size':>10} {'encode p50':>11} {'encode p95':>11} {'decode p50':>11} "
+              f"{'lag p99':>9} {'lag max':>9}")
+        baseline = None
+        for name, fmt in formats(directory).items():
+            r = measure(fmt, data, args.runs)
+            baseline = baseline or r
+            print(f"  {name:<12} {r['bytes'] / 1024:>8.0f}KB {r['encode_p50_ms']:>9.1f}ms "
+                  f"{r['encode_p95_ms']:>9.1f}ms {r['decode_p50_ms']:>9.1f}ms "
+                  f"{r['loop_lag_p99_ms']:>7.1f}ms {r['loop_lag_max_ms']:>7.1f}ms"
+                  f"   ({r['bytes'] / baseline['bytes']:.0%} of json-pretty)")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.formats", description="Compare league snapshot formats.")
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--roster-size", type=int, default=15, help="players per team, chairman included")
+    parser.add_argument("--runs", type=int, default=20, help="encodes and decodes timed per format")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,147 @@
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import sys
+from typing import Dict, List
+
+from roster import INFINITE_SEASONS, Team, teams_to_json
+
+from .fakes import FakeGuild, FakeMember
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_FILE = os.path.join(REPO_ROOT, "bot copy.py")
+
+RATINGS = ("S", "A+", "A", "B+", "B", "C", "95", "88", "81", "74", "67", "60")
+# Well clear of the real role ids hardcoded in the bot
+TEAM_ROLE_BASE = 5_000_000_000_000_000
+MEMBER_ID_BASE = 6_000_000_000_000_000
+
+
+class League:
+    """A synthetic league: team_data.json and registered_players.json contents plus who's who."""
+
+    def __init__(self, teams: Dict[str, Team], players: Dict[str, dict], outsiders: List[int]):
+        self.teams = teams
+        self.players = players
+        # Guild members who aren't registered, for /register
+        self.outsiders = outsiders
+
+    def write(self, directory: str) -> None:
+        with open(os.path.join(directory, "team_data.json"), "w") as f:
+            json.dump(teams_to_json(self.teams), f)
+        with open(os.path.join(directory, "registered_players.json"), "w") as f:
+            json.dump(self.players, f)
+
+
+def generate_league(teams: int = 50, players: int = 10_000, roster_size: int = 15, outsiders: int = 1000,
+                    rated: float = 0.5, two_clubs: float = 0.1, seed: int = 1) -> League:
+    """``teams`` teams of ``roster_size`` (chairman included), the rest of ``players`` free agents.
+
+    Every team has a chairman (also its manager); every other team an
+    assistant manager. Deterministic for a given ``seed``.
+    """
+    rng = random.Random(seed)
+    registry: Dict[str, dict] = {}
+    player_ids = [MEMBER_ID_BASE + i for i in range(players)]
+    for player_id in player_ids:
+        pid = str(player_id)
+        registry[pid] = {
+            "name": f"player{player_id - MEMBER_ID_BASE:05d}",
+            "id": pid,
+            "team": None,
+            "status": "free_agent",
+            "2c": rng.random() < two_clubs,
+            "rating": rng.choice(RATINGS) if rng.random() < rated else "N/A"
+        }
+
+    league_teams: Dict[str, Team] = {}
+    pool = iter(player_ids)
+    for t in range(teams):
+        name = f"Team {t + 1:02d}"
+        team = league_teams[name] = Team(name, TEAM_ROLE_BASE + t)
+        chairman = str(next(pool))
+        team.chairman = team.manager = chairman
+        team.add(int(chairman), INFINITE_SEASONS)
+        registry[chairman].update(team=name, seasons=INFINITE_SEASONS)
+        for _ in range(roster_size - 1):
+            player_id = next(pool)
+            team.add(player_id, rng.randint(1, 4), rng.random() < 0.2)
+            registry[str(player_id)].update(team=name, status="signed")
+        if t % 2:
+            team.assistant_manager = str(list(team.roster)[1])
+
+    first_outsider = MEMBER_ID_BASE + players
+    return League(league_teams, registry, [first_outsider + i for i in range(outsiders)])
+
+
+def load_bot(directory: str, gateway: str = "lean", backend: str = "json"):
+    """Import the bot against the league files in ``directory``, without connecting.
+
+    The bot reads and writes its data files in the working directory, so
+    this changes into ``directory`` for good. A fresh event loop is set for
+    the bot to be run on.
+    """
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    os.environ["GATEWAY_MODE"] = gateway
+    os.environ["LEAGUE_BACKEND"] = backend
+    os.environ["METRICS_PORT"] = "0"
+    os.chdir(directory)
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    spec = importlib.util.spec_from_file_location("league_bot", BOT_FILE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["league_bot"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_guild(bot, league: League, gateway: str = "lean", latency: float = 0.0,
+                exec_members: int = 1) -> FakeGuild:
+    """The main guild with every league role, and each member holding the roles the league implies.
+
+    In lean mode nobody starts in the gateway cache, as after a real
+    startup; ``sync_roles_with_team_data`` loads league members in.
+    """
+    guild = FakeGuild(bot.MAIN_GUILD_ID, latency)
+    cached = gateway == "full"
+    roles = {role_id: guild.add_role(role_id, name) for role_id, name in (
+        (bot.FREE_AGENT_ROLE_ID, "Free Agent"),
+        (bot.CHAIRMAN_ROLE_ID, "Chairman"),
+        (bot.ASSISTANT_MANAGER_ROLE_ID, "Assistant Manager"),
+        (bot.EXEC_ROLE_IDS[0], "Exec"),
+    )}
+    for name, team in league.teams.items():
+        roles[team.role_id] = guild.add_role(team.role_id, name)
+
+    desired, _ = bot.league_role_targets(bot.store, bot.FREE_AGENT_ROLE_ID, bot.CHAIRMAN_ROLE_ID,
+                                         bot.ASSISTANT_MANAGER_ROLE_ID)
+    for pid, player in league.players.items():
+        member_id = int(pid)
+        guild.add_member(member_id, player["name"], [roles[r] for r in desired.get(member_id, ())], cached)
+    for member_id in league.outsiders:
+        guild.add_member(member_id, f"outsider{member_id}", (), cached)
+    for i in range(exec_members):
+        # Execs are always around; the gateway caches whoever runs a command
+        guild.add_member(MEMBER_ID_BASE - 1 - i, f"exec{i}", [roles[bot.EXEC_ROLE_IDS[0]]], True)
+
+    bot.bot.get_guild = lambda guild_id: guild if guild_id == guild.id else None
+    return guild
+
+
+def execs(guild: FakeGuild) -> List[FakeMember]:
+    return [member for member_id, member in guild.remote.items() if member_id < MEMBER_ID_BASE]
+
+
+def scramble_roles(guild: FakeGuild, member_ids: List[int], rng: random.Random) -> List[FakeMember]:
+    """Strip one role from each member, as if someone edited them by hand."""
+    changed = []
+    for member_id in member_ids:
+        member = guild.remote.get(member_id)
+        if member and member.roles:
+            member.roles = [role for role in member.roles if role is not rng.choice(member.roles)]
+            changed.append(member)
+    return changed
+
@@ -0,0 +1,449 @@
+"""Simulate a transfer window: many chairmen and players at once, on one event loop.
+
+    python -m bench.load                                  # 100 clients, 5000 operations
+    python -m bench.load --clients 300 --duration 30 --latency-ms 50
+    python -m bench.load --mix sign=40,accept=30,read=30 --double-click 0.2
+
+Clients pick operations by weight from ``--mix`` and aim them at random
+targets, so offers to the same player, accepts racing releases and double
+clicks on one offer all happen. Nothing is arranged in advance: a command
+answering "player not on your team" is counted as rejected, not failed.
+
+After the traffic stops, the league is checked for damage:
+
+- every acknowledged signing or release was committed to the store (lost updates);
+- each player's registry entry agrees with the roster they're on, and the
+  store's indexes agree with both;
+- the last committed change for each player is what the store shows;
+- no offer was accepted twice, and no roster is over the cap unless forcesign
+  is in the mix;
+- a store reloaded from disk matches the one in memory;
+- one role sync brings every member's roles in line with the league.
+
+Exits 1 when any check fails.
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from storage_io import LoopLagMonitor
+
+from .fakes import FakeInteraction
+from .league import build_guild, generate_league, load_bot
+from .run import Bench, percentile, quiet
+
+DEFAULT_MIX = "sign=25,accept=20,decline=5,release=10,forcesign=5,forcerelease=5,read=30"
+READS = ("teaminfo", "teamrosterdisplay", "getprofile", "listregistered", "ratingsshow", "autocomplete")
+SUCCESS = ("✅", "📨")
+
+# (op, player id, team) as the store recorded it or a command acknowledged it
+Change = Tuple[str, str, Optional[str]]
+
+
+def outcome(interaction: FakeInteraction) -> str:
+    """"ok" or "rejected", from what the handler sent back."""
+    last = interaction.last()
+    content = getattr(last, "content", None)
+    if content is None:
+        # Embeds are read commands answering; button handlers that succeed only edit the offer
+        return "ok" if last is not None or interaction.response.is_done() else "rejected"
+    return "ok" if content.startswith(SUCCESS) else "rejected"
+
+
+class Simulation:
+    """Drives the operations and keeps the ledgers the checks compare."""
+
+    def __init__(self, bench: Bench, double_click: float):
+        self.b = bench
+        self.bot = bench.bot
+        self.rng = bench.rng
+        self.double_click = double_click
+        # (player, offer DM) for offers sent and not yet answered by us
+        self.open_offers: List[tuple] = []
+        self.acknowledged: List[Change] = []
+        self.committed: List[Change] = []
+        # offer id -> accepts that reported success
+        self.accepts: Counter = Counter()
+        self.latencies: Dict[str, List[float]] = {}
+        self.outcomes: Dict[str, Counter] = {}
+        self.errors: List[str] = []
+        # How late the loop woke from 10ms sleeps while the traffic ran
+        self.loop_lag: List[float] = []
+        self.staff = {
+            int(member_id) for _, team in self.b.store.iter_teams()
+            for member_id in (team.chairman, team.manager, team.assistant_manager) if member_id
+        }
+        self._record_commits()
+
+    def _record_commits(self) -> None:
+        """Log every signing and release the store actually applies, in commit order."""
+        store = self.b.store
+        sign_player, release_player = store.sign_player, store.release_player
+
+        def sign(player_id, team_name, *args, **kwargs):
+            sign_player(player_id, team_name, *args, **kwargs)
+            self.committed.append(("sign", str(player_id), team_name))
+
+        def release(player_id, team_name):
+            released = release_player(player_id, team_name)
+            if released:
+                self.committed.append(("release", str(player_id), team_name))
+            return released
+
+        store.sign_player, store.release_player = sign, release
+
+    # TARGETS
+    def player(self):
+        """Any registered player who isn't staff; they may well be busy elsewhere."""
+        while True:
+            member = self.b.player()
+            if member.id not in self.staff and self.b.store.is_registered(str(member.id)):
+                return member
+
+    def rostered(self, team_name: str):
+        team = self.b.store.get_team(team_name)
+        candidates = [pid for pid in team.roster if pid not in self.staff]
+        return self.b.member(self.rng.choice(candidates)) if candidates else self.player()
+
+    # OPERATIONS
+    async def op_sign(self) -> str:
+        team_name = self.b.team()
+        player = self.player()
+        interaction = self.b.interaction(self.b.chairman(team_name))
+        await self.b.command("sign")(interaction, player=player, team_name=team_name, seasons=2)
+        result = outcome(interaction)
+        if result == "ok":
+            self.open_offers.append((player, player.last_dm))
+        return result
+
+    async def op_accept(self) -> str:
+        if not self.open_offers:
+            return await self.op_sign()
+        player, message = self.open_offers.pop(self.rng.randrange(len(self.open_offers)))
+        offer = self.bot.offers.for_message(message.id)
+        clicks = 2 if self.rng.random() < self.double_click else 1
+        interactions = [self.b.interaction(player, message) for _ in range(clicks)]
+        await asyncio.gather(*(self.bot.offer_view.process_accept(i, False) for i in interactions))
+        results = [outcome(i) for i in interactions]
+        for result in results:
+            if result == "ok" and offer is not None:
+                self.accepts[offer.offer_id] += 1
+                self.acknowledged.append(("sign", str(player.id), offer.team_name))
+        return "ok" if "ok" in results else "rejected"
+
+    async def op_decline(self) -> str:
+        if not self.open_offers:
+            return await self.op_sign()
+        player, message = self.open_offers.pop(self.rng.randrange(len(self.open_offers)))
+        interaction = self.b.interaction(player, message)
+        await self.bot.offer_view.decline.callback(interaction)
+        return "ok" if not interaction.sent else "rejected"
+
+    async def op_release(self) -> str:
+        team_name = self.b.team()
+        player = self.rostered(team_name)
+        interaction = self.b.interaction(self.b.chairman(team_name))
+        await self.b.command("release")(interaction, player=player, team_name=team_name, reason="load test")
+        return self._acknowledge(interaction, "release", player, team_name)
+
+    async def op_forcesign(self) -> str:
+        team_name = self.b.team()
+        player = self.player()
+        interaction = self.b.interaction(self.b.exec)
+        await self.b.command("forcesign")(interaction, player=player, team_name=team_name, seasons=2)
+        return self._acknowledge(interaction, "sign", player, team_name)
+
+    async def op_forcerelease(self) -> str:
+        team_name = self.b.team()
+        player = self.rostered(team_name)
+        interaction = self.b.interaction(self.b.exec)
+        await self.b.command("forcerelease")(interaction, player=player, team_name=team_name, reason="load test")
+        return self._acknowledge(interaction, "release", player, team_name)
+
+    async def op_read(self) -> str:
+        read = self.rng.choice(READS)
+        interaction = self.b.interaction(self.b.exec)
+        if read == "getprofile":
+            await self.b.command(read)(interaction, member=self.player())
+        elif read in ("teaminfo", "teamrosterdisplay"):
+            await self.b.command(read)(interaction, team_name=self.b.team())
+        elif read == "listregistered":
+            await self.b.command(read)(interaction, team_name=None, status=None)
+        elif read == "ratingsshow":
+            await self.b.command(read)(interaction, team_name=self.b.team(), free_agents=None)
+        else:
+            await self.bot.autocomplete_team(interaction, self.b.team()[:3])
+        return outcome(interaction)
+
+    def _acknowledge(self, interaction, op: str, player, team_name: str) -> str:
+        result = outcome(interaction)
+        if result == "ok":
+            self.acknowledged.append((op, str(player.id), team_name))
+        return result
+
+    # DRIVING
+    async def client(self, ops: List[str], weights: List[float], deadline: float, budget: List[int],
+                     think: float) -> None:
+        while budget[0] > 0 and time.monotonic() < deadline:
+            budget[0] -= 1
+            op = self.rng.choices(ops, weights)[0]
+            started = time.perf_counter()
+            try:
+                result = await getattr(self, "op_" + op)()
+            except Exception as e:
+                result = "error"
+                self.errors.append(f"{op}: {type(e).__name__}: {e}")
+            self.latencies.setdefault(op, []).append(time.perf_counter() - started)
+            self.outcomes.setdefault(op, Counter())[result] += 1
+            if think:
+                await asyncio.sleep(self.rng.uniform(0, 2 * think))
+
+    async def drive(self, mix: Dict[str, float], clients: int, total_ops: int, duration: float,
+                    think: float) -> float:
+        ops, weights = list(mix), list(mix.values())
+        budget = [total_ops]
+        deadline = time.monotonic() + duration
+        lag = LoopLagMonitor(0.01, on_lag=self.loop_lag.append)
+        lag.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(self.client(ops, weights, deadline, budget, think) for _ in range(clients)))
+        # Let queued role edits go out before anything is checked
+        await self.bot.role_queue.flush()
+        elapsed = time.perf_counter() - started
+        await lag.close()
+        return elapsed
+
+
+# CHECKS
+def league_state(store) -> Tuple[dict, dict]:
+    teams = {
+        name: (team.chairman, team.manager, team.assistant_manager,
+               sorted((str(e.player_id), str(e.seasons), bool(e.release_clause)) for e in team))
+        for name, team in store.iter_teams()
+    }
+    players = {pid: (p.get("team"), p.get("status")) for pid, p in store.iter_players()}
+    return teams, players
+
+
+def check_ledgers(sim: Simulation) -> List[str]:
+    problems = []
+    committed = Counter(sim.committed)
+    for change, count in (Counter(sim.acknowledged) - committed).items():
+        op, player_id, team_name = change
+        problems.append(f"lost update: {op} of {player_id} ({team_name}) acknowledged {count}x more than committed")
+
+    last = {}
+    for op, player_id, team_name in sim.committed:
+        last[player_id] = (op, team_name)
+    store = sim.b.store
+    for player_id, (op, team_name) in last.items():
+        teams = store.teams_of_player(player_id)
+        if op == "sign" and teams != {team_name}:
+            problems.append(f"player {player_id} was last signed to {team_name} but is on {sorted(teams) or 'no team'}")
+        elif op == "release" and team_name in teams:
+            problems.append(f"player {player_id} was last released from {team_name} but is still on it")
+
+    for offer_id, count in sim.accepts.items():
+        if count > 1:
+            problems.append(f"offer {offer_id} was accepted {count} times")
+    return problems
+
+
+def check_store(store, roster_cap: int, cap_enforced: bool) -> List[str]:
+    problems = []
+    on_rosters: Dict[str, List[str]] = {}
+    for team_name, team in store.iter_teams():
+        for entry in team:
+            on_rosters.setdefault(str(entry.player_id), []).append(team_name)
+        if cap_enforced and len(team) > roster_cap:
+            problems.append(f"{team_name} has {len(team)} players, over the cap of {roster_cap}")
+
+    for player_id, teams in on_rosters.items():
+        if len(teams) > 1:
+            problems.append(f"player {player_id} is on several rosters: {', '.join(sorted(teams))}")
+        if store.teams_of_player(player_id) != frozenset(teams):
+            problems.append(f"index says {player_id} is on {sorted(store.teams_of_player(player_id))}, rosters say {sorted(teams)}")
+
+    for player_id, player in store.iter_players():
+        teams = on_rosters.get(player_id, [])
+        team = player.get("team")
+        if team and team not in teams:
+            problems.append(f"registry has {player_id} on {team}, rosters have {sorted(teams) or 'nothing'}")
+        elif not team and teams:
+            problems.append(f"registry has {player_id} as a free agent, rosters have {sorted(teams)}")
+        elif player.get("status") == "signed" and not teams:
+            problems.append(f"registry marks {player_id} signed but no roster has them")
+    return problems
+
+
+def check_reload(bot) -> List[str]:
+    """Read the league back from disk and compare it with the live store."""
+    if bot.LEAGUE_BACKEND == "sqlite":
+        reloaded = bot.SQLiteLeagueStore(bot.LEAGUE_DB_FILE)
+    else:
+        reloaded = bot.LeagueStore(journal=bot.LeagueJournal(), file_format=bot.store.file_format)
+    reloaded.load()
+    live_teams, live_players = league_state(bot.store)
+    disk_teams, disk_players = league_state(reloaded)
+    problems = [f"{name} differs on disk" for name in live_teams if live_teams[name] != disk_teams.get(name)]
+    differing = [pid for pid in live_players if live_players[pid] != disk_players.get(pid)]
+    if differing:
+        problems.append(f"{len(differing)} players differ on disk, e.g. {differing[:5]}")
+    if getattr(reloaded, "journal", None) is not None:
+        reloaded.journal.close()
+    return problems
+
+
+async def check_roles(sim: Simulation) -> List[str]:
+    """One role sync has to bring every member in line with the league."""
+    bot, guild = sim.bot, sim.b.guild
+    await bot.sync_roles_with_team_data()
+    desired, managed = await bot.league_roles()
+    wrong = []
+    for member in guild.remote.values():
+        have = {role.id for role in member.roles if role.id in managed}
+        if have != desired.get(member.id, set()):
+            wrong.append(member.id)
+    return [f"{len(wrong)} members have the wrong roles after a sync, e.g. {wrong[:5]}"] if wrong else []
+
+
+# REPORT
+def report(sim: Simulation, elapsed: float) -> dict:
+    total = sum(len(v) for v in sim.latencies.values())
+    print(f"\n{total} operations in {elapsed:.2f}s: {total / elapsed:.0f} ops/s")
+    summary = {"operations": total, "seconds": elapsed, "ops_per_second": total / elapsed, "ops": {}}
+    for op, values in sorted(sim.latencies.items()):
+        values.sort()
+        counts = sim.outcomes[op]
+        row = {
+            "count": len(values),
+            "ok": counts["ok"], "rejected": counts["rejected"], "errors": counts["error"],
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+        summary["ops"][op] = row
+        print(f"  {op:<13} {row['count']:6}  ok {row['ok']:6}  rejected {row['rejected']:6}  errors {row['errors']:4}  "
+              f"p50 {row['p50_ms']:8.2f}ms  p95 {row['p95_ms']:8.2f}ms  p99 {row['p99_ms']:8.2f}ms  "
+              f"max {row['max_ms']:8.2f}ms")
+    lag = sorted(sim.loop_lag) or [0.0]
+    summary["loop_lag_ms"] = {"p50": percentile(lag, 0.50) * 1000, "p99": percentile(lag, 0.99) * 1000,
+                              "max": lag[-1] * 1000}
+    print(f"  event loop lag p50 {summary['loop_lag_ms']['p50']:.2f}ms  p99 {summary['loop_lag_ms']['p99']:.2f}ms  "
+          f"max {summary['loop_lag_ms']['max']:.2f}ms")
+    io = sim.bot.storage_io
+    print(f"  disk jobs {io.completed} ({io.busy:.2f}s on the storage thread), queue peak {io.peak_pending}")
+    for error in sim.errors[:10]:
+        print(f"  ❌ {error}")
+    return summary
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        op = op.strip()
+        if not hasattr(Simulation, "op_" + op):
+            raise argparse.ArgumentTypeError(f"unknown operation {op!r}")
+        try:
+            mix[op] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"weight for {op} must be a number") from None
+    return mix
+
+
+def main(args) -> int:
+    if args.out:
+        # The bot runs in the league's temporary directory, which goes at exit
+        args.out = os.path.abspath(args.out)
+    print(f"{args.teams} teams, {args.players} players, {args.clients} clients, "
+          f"{args.latency_ms:g}ms API latency{', paced' if args.paced else ''}")
+    league = generate_league(args.teams, args.players, args.roster_size, seed=args.seed)
+    directory = tempfile.mkdtemp(prefix="league-load-")
+    # Registered before the bot's own atexit flushes, so it runs after them
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    league.write(directory)
+    with quiet(args.verbose):
+        bot = load_bot(directory, args.gateway, args.backend)
+    guild = build_guild(bot, league, args.gateway, args.latency_ms / 1000)
+    if not args.paced:
+        bot.role_queue.window = 0
+        bot.role_limiter.rate, bot.role_limiter.per = 10 ** 9, 1.0
+
+    async def simulate():
+        with quiet(args.verbose):
+            bot.bot.add_all_application_commands()
+            bot.persister.start()
+            bot.role_state_persister.start()
+            bot.offers_persister.start()
+            bot.offer_view = bot.SignConfirmationView()
+            await bot.sync_roles_with_team_data()
+
+            sim = Simulation(Bench(bot, league, guild, args.seed), args.double_click)
+            elapsed = await sim.drive(args.mix, args.clients, args.ops, args.duration, args.think_ms / 1000)
+            await bot.persister.close()
+            await bot.offers_persister.close()
+
+            problems = check_ledgers(sim)
+            # Only forcesign may overfill a roster
+            problems += check_store(bot.store, bot.MAX_ROSTER_SIZE, cap_enforced="forcesign" not in args.mix)
+            problems += check_reload(bot)
+            problems += await check_roles(sim)
+            await bot.role_state_persister.close()
+        return sim, elapsed, problems
+
+    sim, elapsed, problems = asyncio.get_event_loop().run_until_complete(simulate())
+    summary = report(sim, elapsed)
+    summary["problems"] = problems
+    print(f"\nConsistency: {len(sim.committed)} committed changes, {len(sim.acknowledged)} acknowledged")
+    if problems:
+        for problem in problems[:50]:
+            print(f"  ❌ {problem}")
+        if len(problems) > 50:
+            print(f"  ... and {len(problems) - 50} more")
+    else:
+        print("  ✅ no lost updates, roster/registry mismatches or role drift")
+
+    if args.out:
+        summary["config"] = {key: value for key, value in vars(args).items() if key not in ("out", "verbose")}
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if problems or sim.errors else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.load", description="Simulate transfer-window traffic.")
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--roster-size", type=int, default=15, help="players per team, chairman included")
+    parser.add_argument("--clients", type=int, default=100, help="operations in flight at once")
+    parser.add_argument("--ops", type=int, default=5000, help="stop after this many operations...")
+    parser.add_argument("--duration", type=float, default=60.0, help="...or after this many seconds")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help=f"operation weights (default {DEFAULT_MIX}); read picks one of {', '.join(READS)}")
+    parser.add_argument("--double-click", type=float, default=0.1, help="share of accepts clicked twice at once")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a client's operations")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated Discord API latency")
+    parser.add_argument("--gateway", choices=("lean", "full"), default="lean")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--paced", action="store_true", help="keep the role edit window and rate limit")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the report here as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own output")
+    args = parser.parse_args(argv)
+    if isinstance(args.mix, str):
+        args.mix = parse_mix(args.mix)
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,629 @@
+"""Time every slash command against a synthetic league, offline.
+
+    python -m bench.run                          # 50 teams, 10k players, 200 runs per case
+    python -m bench.run --teams 100 --players 25000 --latency-ms 30
+    python -m bench.run --only sign forcesign --runs 1000
+    python -m bench.run --baseline bench/results/20260101-120000-abc1234.json
+
+Each case sets up its own preconditions untimed (a free agent to sign, an
+offer to accept), times one handler call and then puts the league back
+roughly as it was. Handlers are called directly, so permission checks are
+skipped but everything they do to the store, the role queue and the
+persisters is real. Discord is replaced by ``bench.fakes``; ``--latency-ms``
+makes every simulated API call take that long.
+
+By default the role edit window and member edit rate limit are taken out,
+so the numbers are handler cost rather than the bot's deliberate pacing;
+``--paced`` keeps them. Allocations are measured with tracemalloc in a
+separate, shorter pass, since tracing slows everything down.
+
+Results go to bench/results/ as JSON and are compared against ``--baseline``
+or, without it, the newest earlier result with the same league and settings.
+"""
+import argparse
+import asyncio
+import atexit
+import contextlib
+import glob
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .fakes import FakeAttachment, FakeInteraction, FakeMessage
+from .league import REPO_ROOT, build_guild, execs, generate_league, load_bot, scramble_roles
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "bench", "results")
+# p50/p95 this much slower than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+Call = Callable[[], Awaitable[None]]
+Cleanup = Optional[Callable[[], None]]
+
+# name -> (setup, share of --runs)
+CASES: Dict[str, Tuple[Callable[["Bench"], Awaitable[Tuple[Call, Cleanup]]], float]] = {}
+
+
+def case(name: str, share: float = 1.0):
+    """Register a benchmark case; ``share`` scales the run count for slow, league-wide ones."""
+    def register(setup):
+        CASES[name] = (setup, share)
+        return setup
+    return register
+
+
+class Bench:
+    """The loaded bot, its fake guild and helpers for picking who does what."""
+
+    def __init__(self, bot, league, guild, seed: int):
+        self.bot = bot
+        self.store = bot.store
+        self.league = league
+        self.guild = guild
+        self.rng = random.Random(seed)
+        self.exec = execs(guild)[0]
+        self.commands = {command.name: command for command in bot.bot.get_all_application_commands()}
+
+    def command(self, name: str):
+        return self.commands[name].callback
+
+    def interaction(self, user, message: Optional[FakeMessage] = None) -> FakeInteraction:
+        return FakeInteraction(user, self.guild, message)
+
+    def member(self, member_id):
+        return self.guild.remote[int(member_id)]
+
+    def team(self) -> str:
+        return self.rng.choice(self.store.team_names())
+
+    def team_with_room(self) -> str:
+        for _ in range(100):
+            team_name = self.team()
+            if self.store.roster_size(team_name) < self.bot.MAX_ROSTER_SIZE:
+                return team_name
+        raise RuntimeError("every team is full; use fewer players per roster")
+
+    def player(self):
+        return self.member(self.rng.choice(list(self.league.players)))
+
+    def free_agent(self):
+        for _ in range(1000):
+            member = self.player()
+            pid = str(member.id)
+            if self.store.is_registered(pid) and not self.store.teams_of_player(pid):
+                return member
+        raise RuntimeError("no free agents left")
+
+    def outsider(self):
+        for _ in range(1000):
+            member_id = self.rng.choice(self.league.outsiders)
+            if not self.store.is_registered(str(member_id)):
+                return self.member(member_id)
+        raise RuntimeError("no unregistered members left")
+
+    def chairman(self, team_name: str):
+        return self.member(self.store.get_team(team_name).chairman)
+
+    def signed_player(self, team_name: str):
+        """A rostered player who holds no staff slot, signing a free agent if there's none."""
+        team = self.store.get_team(team_name)
+        staff = {int(m) for m in (team.chairman, team.manager, team.assistant_manager) if m}
+        candidates = [pid for pid in team.roster if pid not in staff]
+        if not candidates:
+            member = self.free_agent()
+            self.store.sign_player(str(member.id), team_name, 2)
+            return member
+        return self.member(self.rng.choice(candidates))
+
+    def sign(self, member, team_name: str, release_clause: bool = False) -> None:
+        self.store.sign_player(str(member.id), team_name, 2, release_clause)
+
+    def release(self, member) -> None:
+        for team_name in self.store.teams_of_player(str(member.id)):
+            self.store.release_player(str(member.id), team_name)
+
+    def restore_staff(self, team_name: str, role: str, member_id) -> None:
+        previous = self.store.get_team(team_name).get_staff(role)
+        self.store.set_staff(team_name, role, member_id)
+        self.bot.perms.invalidate_team(team_name, previous, member_id)
+
+
+# REGISTRATION
+@case("register")
+async def bench_register(b: Bench):
+    user = b.outsider()
+    return (lambda: b.command("register")(b.interaction(user))), \
+        (lambda: b.store.unregister_player(str(user.id)))
+
+
+@case("unregister")
+async def bench_unregister(b: Bench):
+    user = b.outsider()
+    b.store.register_player(str(user.id), user.name)
+    return (lambda: b.command("unregister")(b.interaction(user))), None
+
+
+@case("listregistered")
+async def bench_listregistered(b: Bench):
+    return (lambda: b.command("listregistered")(b.interaction(b.exec), team_name=None, status=None)), None
+
+
+@case("set2c")
+async def bench_set2c(b: Bench):
+    member = b.player()
+    allow = b.rng.random() < 0.5
+    return (lambda: b.command("set2c")(b.interaction(b.exec), member=member, allow_2c=allow)), None
+
+
+@case("list2c")
+async def bench_list2c(b: Bench):
+    return (lambda: b.command("list2c")(b.interaction(b.exec))), None
+
+
+# PLAYER PROFILES
+@case("assignrating")
+async def bench_assignrating(b: Bench):
+    member = b.player()
+    rating = b.rng.choice(("S", "A+", "B-", "91", "77", "64"))
+    return (lambda: b.command("assignrating")(b.interaction(b.exec), member=member, rating=rating)), None
+
+
+@case("ratingsshow")
+async def bench_ratingsshow(b: Bench):
+    return (lambda: b.command("ratingsshow")(b.interaction(b.exec), team_name=None, free_agents=None)), None
+
+
+@case("getprofile")
+async def bench_getprofile(b: Bench):
+    member = b.player()
+    return (lambda: b.command("getprofile")(b.interaction(b.exec), member=member)), None
+
+
+# SIGNINGS
+@case("sign")
+async def bench_sign(b: Bench):
+    team_name = b.team()
+    player = b.free_agent()
+
+    def withdraw():
+        offer = b.bot.offers.for_message(player.last_dm.id)
+        if offer is not None:
+            b.bot.offers.claim(offer.offer_id)
+
+    return (lambda: b.command("sign")(b.interaction(b.chairman(team_name)), player=player,
+                                      team_name=team_name, seasons=2)), withdraw
+
+
+@case("SignConfirmationView.process_accept")
+async def bench_process_accept(b: Bench):
+    team_name = b.team_with_room()
+    player = b.free_agent()
+    message = FakeMessage("offer")
+    b.bot.offers.create(player.id, team_name, b.store.get_team(team_name).chairman, 2, b.bot.OFFER_TIMEOUT_S,
+                        channel_id=message.channel.id, message_id=message.id)
+    return (lambda: b.bot.offer_view.process_accept(b.interaction(player, message), False)), \
+        (lambda: b.release(player))
+
+
+@case("SignConfirmationView.decline")
+async def bench_decline(b: Bench):
+    team_name = b.team()
+    player = b.free_agent()
+    message = FakeMessage("offer")
+    b.bot.offers.create(player.id, team_name, b.store.get_team(team_name).chairman, 2, b.bot.OFFER_TIMEOUT_S,
+                        channel_id=message.channel.id, message_id=message.id)
+    return (lambda: b.bot.offer_view.decline.callback(b.interaction(player, message))), None
+
+
+@case("forcesign")
+async def bench_forcesign(b: Bench):
+    team_name = b.team()
+    player = b.free_agent()
+    return (lambda: b.command("forcesign")(b.interaction(b.exec), player=player, team_name=team_name, seasons=2)), \
+        (lambda: b.release(player))
+
+
+@case("release")
+async def bench_release(b: Bench):
+    team_name = b.team()
+    player = b.free_agent()
+    b.sign(player, team_name)
+    return (lambda: b.command("release")(b.interaction(b.chairman(team_name)), player=player,
+                                         team_name=team_name, reason="bench")), None
+
+
+@case("forcerelease")
+async def bench_forcerelease(b: Bench):
+    team_name = b.team()
+    player = b.free_agent()
+    b.sign(player, team_name)
+    return (lambda: b.command("forcerelease")(b.interaction(b.exec), player=player,
+                                              team_name=team_name, reason="bench")), None
+
+
+@case("releaseclauseuse")
+async def bench_releaseclauseuse(b: Bench):
+    player = b.free_agent()
+    b.sign(player, b.team(), release_clause=True)
+    return (lambda: b.command("releaseclauseuse")(b.interaction(player))), None
+
+
+@case("bulktransfer", share=0.25)
+async def bench_bulktransfer(b: Bench):
+    # Sign a free agent into every open spot of a few teams, then release them again
+    rows = ["action,player_id,team,seasons,release_clause"]
+    signed = []
+    for team_name in b.rng.sample(b.store.team_names(), min(10, len(b.store.team_names()))):
+        for _ in range(b.bot.MAX_ROSTER_SIZE - b.store.roster_size(team_name)):
+            player = b.free_agent()
+            if player in signed:
+                continue
+            signed.append(player)
+            rows.append(f"sign,{player.id},{team_name},2,{'yes' if len(signed) % 5 == 0 else 'no'}")
+    attachment = FakeAttachment("transfers.csv", "\n".join(rows).encode("utf-8"))
+
+    def undo():
+        for player in signed:
+            b.release(player)
+
+    return (lambda: b.command("bulktransfer")(b.interaction(b.exec), file=attachment, dry_run=False)), undo
+
+
+# ROLES
+@case("updateteamroles")
+async def bench_updateteamroles(b: Bench):
+    team_name = b.team()
+    return (lambda: b.command("updateteamroles")(b.interaction(b.exec), team_name=team_name)), None
+
+
+@case("reconcileall", share=0.05)
+async def bench_reconcileall(b: Bench):
+    scramble_roles(b.guild, [b.player().id for _ in range(50)], b.rng)
+    return (lambda: b.command("reconcileall")(b.interaction(b.exec))), None
+
+
+@case("sync_roles_with_team_data (delta)", share=0.25)
+async def bench_sync_delta(b: Bench):
+    signed = []
+    for _ in range(10):
+        player = b.free_agent()
+        b.sign(player, b.team_with_room())
+        signed.append(player)
+
+    def undo():
+        for player in signed:
+            b.release(player)
+
+    return b.bot.sync_roles_with_team_data, undo
+
+
+@case("sync_roles_with_team_data (drift)", share=0.05)
+async def bench_sync_drift(b: Bench):
+    # A hand edit seen through on_member_update forces the next sync to scan everyone
+    for member in scramble_roles(b.guild, [b.player().id for _ in range(50)], b.rng):
+        before = types.SimpleNamespace(roles=[])
+        await b.bot.on_member_update(before, member)
+    return b.bot.sync_roles_with_team_data, None
+
+
+# TEAM INFO
+@case("teaminfo")
+async def bench_teaminfo(b: Bench):
+    team_name = b.team()
+    return (lambda: b.command("teaminfo")(b.interaction(b.exec), team_name=team_name)), None
+
+
+@case("teamrosterdisplay")
+async def bench_teamrosterdisplay(b: Bench):
+    team_name = b.team()
+    return (lambda: b.command("teamrosterdisplay")(b.interaction(b.exec), team_name=team_name)), None
+
+
+@case("autocomplete team_name")
+async def bench_autocomplete(b: Bench):
+    prefix = b.team()[:b.rng.randint(0, 6)]
+    return (lambda: b.bot.autocomplete_team(b.interaction(b.exec), prefix)), None
+
+
+# TEAM STAFF
+@case("teamchairmanhire")
+async def bench_teamchairmanhire(b: Bench):
+    team_name = b.team()
+    team = b.store.get_team(team_name)
+    previous = b.member(team.chairman)
+    newcomer = b.free_agent()
+
+    def reinstate():
+        b.store.appoint_chairman(team_name, str(previous.id), previous.name)
+        b.release(newcomer)
+        b.bot.perms.invalidate_team(team_name, previous.id, newcomer.id)
+
+    return (lambda: b.command("teamchairmanhire")(b.interaction(b.exec), team_name=team_name,
+                                                  chairman=newcomer)), reinstate
+
+
+@case("teamchairmanunhire")
+async def bench_teamchairmanunhire(b: Bench):
+    team_name = b.team()
+    previous = b.member(b.store.get_team(team_name).chairman)
+    stand_in = b.free_agent()
+    b.store.appoint_chairman(team_name, str(stand_in.id), stand_in.name)
+    b.bot.perms.invalidate_team(team_name, previous.id, stand_in.id)
+
+    def reinstate():
+        # Dismissal drops the stand-in from the registry; put them back as a free agent
+        b.store.register_player(str(stand_in.id), stand_in.name)
+        b.store.appoint_chairman(team_name, str(previous.id), previous.name)
+        b.bot.perms.invalidate_team(team_name, previous.id)
+
+    return (lambda: b.command("teamchairmanunhire")(b.interaction(b.exec), team_name=team_name)), reinstate
+
+
+def _staff_cases(role: str, hire: str, unhire: str, option: str):
+    def before(b: Bench, team_name: str):
+        team = b.store.get_team(team_name)
+        return team.get_staff(role), set(team.roster)
+
+    def restore(b: Bench, team_name: str, previous, rostered, member) -> None:
+        b.restore_staff(team_name, role, previous)
+        # signed_player() signs a free agent when the roster has nobody to promote
+        if member.id not in rostered:
+            b.release(member)
+
+    @case(hire)
+    async def bench_hire(b: Bench):
+        team_name = b.team()
+        previous, rostered = before(b, team_name)
+        member = b.signed_player(team_name)
+        return (lambda: b.command(hire)(b.interaction(b.chairman(team_name)), **{option: member})), \
+            (lambda: restore(b, team_name, previous, rostered, member))
+
+    @case(unhire)
+    async def bench_unhire(b: Bench):
+        team_name = b.team()
+        previous, rostered = before(b, team_name)
+        member = b.signed_player(team_name)
+        b.restore_staff(team_name, role, str(member.id))
+        return (lambda: b.command(unhire)(b.interaction(b.chairman(team_name)))), \
+            (lambda: restore(b, team_name, previous, rostered, member))
+
+
+_staff_cases("manager", "teammanagerhire", "teammanagerunhire", "manager")
+_staff_cases("assistant_manager", "assistantmanagerhire", "assistantmanagerunhire", "assistant")
+
+
+@case("seasonadvance", share=0.05)
+async def bench_seasonadvance(b: Bench):
+    contracts = [(str(entry.player_id), team_name, entry.seasons, entry.release_clause)
+                 for team_name, team in b.store.iter_teams() for entry in team]
+
+    def cleanup():
+        # Put every contract back as it was, re-signing whoever expired
+        for player_id, team_name, seasons, release_clause in contracts:
+            b.store.sign_player(player_id, team_name, seasons, release_clause)
+    return (lambda: b.command("seasonadvance")(b.interaction(b.exec), dry_run=False)), cleanup
+
+
+@case("botstats")
+async def bench_botstats(b: Bench):
+    return (lambda: b.command("botstats")(b.interaction(b.exec))), None
+
+
+@case("exportleague", share=0.1)
+async def bench_exportleague(b: Bench):
+    return (lambda: b.command("exportleague")(b.interaction(b.exec))), None
+
+
+# RUNNING
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+async def run_case(b: Bench, setup, runs: int, warmup: int, trace: bool) -> List[Tuple[float, int, int]]:
+    """(seconds, bytes allocated at peak, bytes still held after) per timed call."""
+    samples = []
+    for i in range(warmup + runs):
+        call, cleanup = await setup(b)
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        await call()
+        elapsed = time.perf_counter() - started
+        if trace:
+            current, peak = tracemalloc.get_traced_memory()
+        if cleanup is not None:
+            cleanup()
+        if i >= warmup:
+            samples.append((elapsed, peak - before, current - before) if trace else (elapsed, 0, 0))
+    return samples
+
+
+async def run_all(b: Bench, names: List[str], runs: int, warmup: int, alloc_runs: int) -> Dict[str, dict]:
+    results = {}
+    for name in names:
+        setup, share = CASES[name]
+        n = max(1, round(runs * share))
+        timings = sorted(s[0] for s in await run_case(b, setup, n, warmup, trace=False))
+
+        tracemalloc.start()
+        try:
+            allocs = await run_case(b, setup, max(1, min(alloc_runs, n)), 0, trace=True)
+        finally:
+            tracemalloc.stop()
+
+        results[name] = {
+            "runs": n,
+            "p50_ms": percentile(timings, 0.50) * 1000,
+            "p95_ms": percentile(timings, 0.95) * 1000,
+            "p99_ms": percentile(timings, 0.99) * 1000,
+            "max_ms": timings[-1] * 1000,
+            "mean_ms": sum(timings) / len(timings) * 1000,
+            "alloc_kib": sum(a[1] for a in allocs) / len(allocs) / 1024,
+            "retained_kib": sum(a[2] for a in allocs) / len(allocs) / 1024,
+        }
+        print(f"  {name:<38} {format_row(results[name])}", file=sys.__stdout__, flush=True)
+    return results
+
+
+def format_row(r: dict) -> str:
+    return (f"p50 {r['p50_ms']:8.3f}ms  p95 {r['p95_ms']:8.3f}ms  p99 {r['p99_ms']:8.3f}ms  "
+            f"alloc {r['alloc_kib']:9.1f}KiB  kept {r['retained_kib']:8.1f}KiB")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision + ("-dirty" if dirty else "")
+
+
+def find_baseline(config: dict) -> Optional[str]:
+    """The newest saved result for the same league and settings."""
+    for path in sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")), reverse=True):
+        try:
+            with open(path) as f:
+                if json.load(f).get("config") == config:
+                    return path
+        except (OSError, json.JSONDecodeError):
+            continue
+    return None
+
+
+def compare(results: Dict[str, dict], baseline_path: str) -> List[str]:
+    """Print each case against the baseline; returns the cases that regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nAgainst {os.path.basename(baseline_path)} ({baseline.get('revision') or 'unknown revision'}):")
+    regressed = []
+    for name, r in results.items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            print(f"  {name:<38} new")
+            continue
+        deltas = {key: (r[key] - old[key]) / old[key] if old[key] else 0.0
+                  for key in ("p50_ms", "p95_ms", "alloc_kib")}
+        slower = deltas["p50_ms"] > REGRESSION_THRESHOLD and deltas["p95_ms"] > REGRESSION_THRESHOLD
+        if slower:
+            regressed.append(name)
+        print(f"  {name:<38} p50 {deltas['p50_ms']:+7.1%}  p95 {deltas['p95_ms']:+7.1%}  "
+              f"alloc {deltas['alloc_kib']:+7.1%}{'  ⚠️ slower' if slower else ''}")
+    return regressed
+
+
+def quiet(verbose: bool):
+    """Send the bot's own prints (loads, role sync progress) nowhere unless asked for."""
+    if verbose:
+        return contextlib.nullcontext()
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+async def measure(args, bot, league, guild) -> Dict[str, dict]:
+    with quiet(args.verbose):
+        # What on_connect and on_ready do, minus the gateway and the command deploy
+        bot.bot.add_all_application_commands()
+        bot.persister.start()
+        bot.role_state_persister.start()
+        bot.offers_persister.start()
+        bot.dm_queue.start()
+        bot.offer_view = bot.SignConfirmationView()
+        await bot.sync_roles_with_team_data()
+
+    b = Bench(bot, league, guild, args.seed)
+    untimed = sorted(set(b.commands) - set(CASES))
+    if untimed:
+        print(f"⚠️ No case for: {', '.join(untimed)}")
+    with quiet(args.verbose):
+        try:
+            return await run_all(b, args.only or list(CASES), args.runs, args.warmup, args.alloc_runs)
+        finally:
+            await bot.persister.close()
+            await bot.role_state_persister.close()
+            await bot.offers_persister.close()
+            await bot.dm_queue.close()
+
+
+def main(args) -> int:
+    unknown = [name for name in args.only or () if name not in CASES]
+    if unknown:
+        print(f"Unknown cases: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    print(f"{args.teams} teams, {args.players} players, {args.gateway} gateway, {args.backend} store, "
+          f"{args.latency_ms:g}ms API latency{', paced' if args.paced else ''}")
+    league = generate_league(args.teams, args.players, args.roster_size, seed=args.seed)
+    directory = tempfile.mkdtemp(prefix="league-bench-")
+    # Registered before the bot's own atexit flushes, so it runs after them
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    league.write(directory)
+    with quiet(args.verbose):
+        bot = load_bot(directory, args.gateway, args.backend)
+    guild = build_guild(bot, league, args.gateway, args.latency_ms / 1000)
+    if not args.paced:
+        bot.role_queue.window = 0
+        bot.role_limiter.rate, bot.role_limiter.per = 10 ** 9, 1.0
+    results = asyncio.get_event_loop().run_until_complete(measure(args, bot, league, guild))
+
+    config = {
+        "teams": args.teams, "players": args.players, "roster_size": args.roster_size,
+        "gateway": args.gateway, "backend": args.backend, "latency_ms": args.latency_ms, "paced": args.paced,
+    }
+    baseline = args.baseline or find_baseline(config)
+    regressed = compare(results, baseline) if baseline else []
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        revision = git_revision()
+        path = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + f"-{revision or 'norev'}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "revision": revision,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "config": config,
+                "cases": results,
+            }, f, indent=2)
+        print(f"\nSaved {os.path.relpath(path, REPO_ROOT)}")
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description="Benchmark the bot's commands offline.")
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--roster-size", type=int, default=15, help="players per team, chairman included")
+    parser.add_argument("--runs", type=int, default=200, help="timed calls per case (league-wide cases run fewer)")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--alloc-runs", type=int, default=20, help="calls per case traced for allocations")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated Discord API latency")
+    parser.add_argument("--gateway", choices=("lean", "full"), default="lean")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--paced", action="store_true", help="keep the role edit window and rate limit")
+    parser.add_argument("--only", nargs="+", metavar="CASE", help=f"cases to run: {', '.join(CASES)}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", help="result file to compare against")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any case got slower")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own output")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
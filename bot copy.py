@@ -5,18 +5,255 @@ from nextcord.ui import Button, View
 import json
 import asyncio
 import traceback
+import io
 import os
+import atexit
+import time
+from contextlib import asynccontextmanager
+
+from autocomplete import PrefixIndex
+from command_sync import sync_commands_if_changed
+from journal import LeagueJournal
+from league_store import PLAYERS_FILE, TEAM_DATA_FILE, LeagueStore
+from member_cache import MemberCache
+from metrics import Metrics, serve_prometheus
+from notifications import DirectMessageQueue
+from offers import OfferExpiryTimer, OfferStore
+from persistence import WriteBehindPersister
+from pagination import PaginatedView
+from ratings import RatingIndex, format_rating, normalize_rating
+from permissions import ADMIN, CHAIRMAN, EXEC, PermissionCache, PermissionDenied, chairman_of
+from role_sync import (
+    RateLimiter, ReconcileReport, RoleMutationQueue, RoleReconciler, RoleState, league_role_targets
+)
+from transactions import TransactionManager
+from transfers import parse_transfers, validate_transfers
+from serializers import export_json, export_snapshot, league_format
+from sqlite_store import LEAGUE_DB_FILE, SQLiteLeagueStore
+from storage_io import LoopLagMonitor, StorageIO
+
+
+class LeagueBot(commands.Bot):
+    async def on_connect(self):
+        # Only register commands locally; on_ready deploys them once, if they changed
+        self.add_all_application_commands()
+
+    async def close(self):
+        # Make sure pending league changes hit the disk before we disconnect
+        await persister.close()
+        await role_state_persister.close()
+        await offer_timer.close()
+        await offers_persister.close()
+        await dm_queue.close()
+        storage_io.shutdown()
+        read_io.shutdown()
+        await loop_lag.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        await super().close()
+
+
+STARTED_AT = time.monotonic()
+# "lean": only guild and member events, and only league members cached; "full": the whole guild
+GATEWAY_MODE = os.environ.get("GATEWAY_MODE", "lean")
+
+if GATEWAY_MODE == "full":
+    intents = nextcord.Intents.all()
+    intents.members = True
+    intents.guilds = True
+    bot = LeagueBot(command_prefix="/", intents=intents)
+else:
+    # Slash commands and buttons arrive as interactions, which need no intents.
+    # Members stay on for role updates and for requesting league members by id.
+    intents = nextcord.Intents.none()
+    intents.guilds = True
+    intents.members = True
+    bot = LeagueBot(
+        command_prefix="/",
+        intents=intents,
+        chunk_guilds_at_startup=False,
+        member_cache_flags=nextcord.MemberCacheFlags.none()
+    )
 
-intents = nextcord.Intents.all()
-intents.members = True
-intents.guilds = True
-bot = commands.Bot(command_prefix="/", intents=intents)
+# Command, storage and Discord API timings; see /botstats and the Prometheus endpoint
+metrics = Metrics()
+metrics.instrument_http(bot.http)
+metrics_server = None
 
 # Replace with your actual role IDs
 ADMIN_ROLE_IDS = [1372651142835863733, 1372651142835863736, 1372651142835863734, 1372651142835863732, 1380148162387251244]
 EXEC_ROLE_IDS = [1372651142835863733, 1372651142835863736, 1372651142835863734, 1372651142835863732, 1380148162387251244]
 FREE_AGENT_ROLE_ID = 1372651142772953237
+CHAIRMAN_ROLE_ID = 1372651142789595221  # Chairman/Manager role
+ASSISTANT_MANAGER_ROLE_ID = 1372651142789595220  # Assistant manager role
 MAIN_GUILD_ID = 1372651142760235179  # Main guild ID
+SAVE_INTERVAL_MS = 500  # Pending changes are written to disk at most this often
+LEAGUE_BACKEND = os.environ.get("LEAGUE_BACKEND", "json")  # "json" or "sqlite"
+LEAGUE_FORMAT = os.environ.get("LEAGUE_FORMAT", "json")  # Snapshot encoding for the json backend: "json", "orjson" or "binary"
+JOURNAL_COMPACT_RECORDS = 1000  # Rewrite the JSON snapshot after this many journal records...
+SNAPSHOT_INTERVAL_S = 300  # ...or after this long, whichever comes first
+ROLE_SYNC_CONCURRENCY = 5  # Member edits in flight at once during role sync
+MEMBER_EDIT_RATE = (10, 10.0)  # Member edits allowed per this many seconds, per guild
+ROLE_EDIT_WINDOW_S = 0.2  # Role changes for one member within this window go out as one edit
+PROGRESS_EDIT_INTERVAL_S = 2  # How often long-running commands refresh their progress message
+LIST_PAGE_SIZE = 15  # Lines per page in paginated list commands
+MAX_ROSTER_SIZE = 20  # Players a team may have
+BULK_TRANSFER_MAX_ROWS = 500  # Rows accepted in one /bulktransfer file
+MEMBER_CACHE_TTL_S = 60  # How long a member fetched on demand is reused
+MEMBER_CACHE_SIZE = 1000  # Members fetched on demand kept at most
+OFFER_TIMEOUT_S = 600  # How long a signing offer stays open
+OFFER_DM_CONCURRENCY = 5  # Expiry DMs in flight at once
+DM_QUEUE_CONCURRENCY = 5  # Background DMs (e.g. expired contracts) in flight at once
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))  # Prometheus endpoint on localhost; 0 turns it off
+STORAGE_IO_QUEUE = 64  # Disk jobs queued at most before callers wait for the disk
+LOOP_LAG_INTERVAL_S = 0.5  # How often event-loop lag is sampled
+
+# Encoding and writing league files happens here, on one thread, never on the event loop
+storage_io = StorageIO(STORAGE_IO_QUEUE)
+# Whole-league SQLite reads get their own thread, so they never queue ahead of a commit
+read_io = StorageIO(STORAGE_IO_QUEUE, name="league-read")
+loop_lag = LoopLagMonitor(LOOP_LAG_INTERVAL_S, on_lag=metrics.observe_loop_lag)
+
+# Loaded once at startup; every command reads and writes through this
+if LEAGUE_BACKEND == "sqlite":
+    store = SQLiteLeagueStore(LEAGUE_DB_FILE)
+else:
+    store = LeagueStore(
+        journal=LeagueJournal(),
+        compact_every=JOURNAL_COMPACT_RECORDS,
+        snapshot_interval=SNAPSHOT_INTERVAL_S,
+        file_format=league_format(LEAGUE_FORMAT, TEAM_DATA_FILE, PLAYERS_FILE)
+    )
+    # atexit runs last-registered first, so this comes after persister.flush_now
+    atexit.register(store.journal.close)
+# Attached before load() so a replayed journal tail is picked up for the next snapshot
+persister = WriteBehindPersister(
+    store, SAVE_INTERVAL_MS, on_flush=metrics.flush_observer(LEAGUE_BACKEND), io=storage_io
+)
+with metrics.time_io(LEAGUE_BACKEND, "load"):
+    store.load()
+atexit.register(persister.flush_now)
+transactions = TransactionManager()
+# Rated players, best first; kept in order by assignrating
+rating_index = RatingIndex()
+rating_index.rebuild(store)
+# Who may run what; checked by the @perms.requires decorators on the commands
+perms = PermissionCache(store, ADMIN_ROLE_IDS, EXEC_ROLE_IDS)
+
+# Managed roles last applied to each member, so syncs only touch what changed
+role_state = RoleState()
+role_state_persister = WriteBehindPersister(
+    role_state, SAVE_INTERVAL_MS, on_flush=metrics.flush_observer("role_state"), io=storage_io
+)
+with metrics.time_io("role_state", "load"):
+    role_state.load()
+atexit.register(role_state_persister.flush_now)
+role_limiter = RateLimiter(*MEMBER_EDIT_RATE)
+# Members the gateway cache doesn't hold (everyone but loaded league members in lean mode)
+member_cache = MemberCache(MEMBER_CACHE_TTL_S, MEMBER_CACHE_SIZE)
+role_reconciler = RoleReconciler(
+    role_limiter, ROLE_SYNC_CONCURRENCY, on_applied=role_state.record, member_cache=member_cache
+)
+# Every command's role changes go through here: one member.edit per member per window
+role_queue = RoleMutationQueue(role_limiter, ROLE_EDIT_WINDOW_S, on_applied=role_state.record)
+# Player DMs from league-wide commands; sent in the background so the command can answer first
+dm_queue = DirectMessageQueue(
+    lambda member_id: member_cache.get(bot.get_guild(MAIN_GUILD_ID), member_id), DM_QUEUE_CONCURRENCY
+)
+role_sync_task = None
+startup_done = False
+
+# Open signing offers; answered through the persistent SignConfirmationView
+offers = OfferStore()
+offers_persister = WriteBehindPersister(
+    offers, SAVE_INTERVAL_MS, on_flush=metrics.flush_observer("offers"), io=storage_io
+)
+with metrics.time_io("offers", "load"):
+    offers.load()
+atexit.register(offers_persister.flush_now)
+offer_view = None
+
+
+@asynccontextmanager
+async def players_transaction(player_ids, team_names=()):
+    """Lock players, their current team(s) and ``team_names`` for one read-modify-write."""
+    while True:
+        current_teams = {player_id: store.teams_of_player(player_id) for player_id in player_ids}
+        teams = set(team_names).union(*current_teams.values())
+        async with transactions.transaction(players=player_ids, teams=teams):
+            # A player may have moved while we waited; retry with the new teams
+            if all(store.teams_of_player(player_id) == t for player_id, t in current_teams.items()):
+                yield
+                return
+
+def player_transaction(player_id, *team_names):
+    return players_transaction([player_id], team_names)
+
+# (store.version, team names, index) behind the team_name autocompletes
+team_index_cache = (None, frozenset(), PrefixIndex())
+
+def team_suggestions(prefix):
+    """Team names matching ``prefix``; the index is only rebuilt when the team list changes."""
+    global team_index_cache
+    version, names, index = team_index_cache
+    if version != store.version:
+        current = frozenset(store.team_names())
+        if current != names:
+            index = PrefixIndex(current)
+        team_index_cache = (store.version, current, index)
+    return index.suggest(prefix)
+
+async def autocomplete_team(interaction: Interaction, team_name: str):
+    await interaction.response.send_autocomplete(team_suggestions(team_name))
+
+async def chaired_team(interaction: Interaction):
+    """The team a chairman's command acts on; None, after telling them, if they chair several."""
+    teams = perms.staff_teams(interaction.user)
+    if len(teams) == 1:
+        return teams[0]
+    if teams:
+        await interaction.followup.send(
+            f"❌ You chair {', '.join(teams)}; ask an exec to make this change", ephemeral=True
+        )
+    else:
+        await interaction.followup.send("🚫 You're not a chairman", ephemeral=True)
+    return None
+
+async def read_league(fn, *args):
+    """Run a whole-league read ``fn(store, *args)``; on the storage thread when the backend's reads block."""
+    if store.blocking_reads:
+        # The read runs on its own connection, which only sees committed changes
+        store.commit()
+        return await read_io.run(store.read, fn, *args)
+    return store.read(fn, *args)
+
+async def league_roles():
+    return await read_league(league_role_targets, FREE_AGENT_ROLE_ID, CHAIRMAN_ROLE_ID, ASSISTANT_MANAGER_ROLE_ID)
+
+async def reconcile_roles(guild, team_name=None, progress=None):
+    """Apply the role delta since the last sync, or scan everyone after drift.
+
+    With ``team_name`` only members who have or should have that team's role
+    are looked at.
+    """
+    desired, managed = await league_roles()
+    member_ids = role_state.changed_members(desired, managed)
+    full = member_ids is None
+    if team_name is not None:
+        team = store.get_team(team_name)
+        if full:
+            role = guild.get_role(team.role_id)
+            member_ids = set(team.roster) | {m.id for m in role.members} if role else set(team.roster)
+        else:
+            member_ids = {
+                m for m in member_ids
+                if team.role_id in desired.get(m, ()) or team.role_id in role_state.members.get(m, ())
+            }
+
+    report = await role_reconciler.reconcile(guild, desired, managed, progress=progress, member_ids=member_ids)
+    # Only a league-wide scan can clear drift
+    role_state.commit(desired, managed, report, full=full and team_name is None)
+    return report
 
 async def sync_roles_with_team_data():
     print("Syncing team roles with players...")
@@ -25,82 +262,134 @@ async def sync_roles_with_team_data():
         print("Main guild not found!")
         return
 
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-    except Exception as e:
-        print(f"Failed to load team data: {e}")
-        return
-
-    for team_name, team_info in team_data.items():
-        role_id = team_info.get("role_id")
-        if not role_id:
+    if GATEWAY_MODE != "full":
+        # Nothing was chunked at startup; bring in just the members the league knows about
+        desired, _ = await league_roles()
+        started = time.monotonic()
+        try:
+            loaded = await member_cache.load_into_guild(guild, set(desired) | set(role_state.members))
+        except Exception as e:
+            print(f"Failed to load league members: {e}")
+        else:
+            print(f"Loaded {loaded} league members in {time.monotonic() - started:.1f}s "
+                  f"({len(guild.members)} members cached)")
+
+    for team_name, team_info in await read_league(lambda league: list(league.iter_teams())):
+        if not team_info.role_id:
             print(f"No role_id for {team_name}, skipping")
-            continue
-            
-        role = guild.get_role(role_id)
-        if not role:
-            print(f"Role {role_id} not found for {team_name}")
-            continue
+        elif not guild.get_role(team_info.role_id):
+            print(f"Role {team_info.role_id} not found for {team_name}")
 
-        player_ids = list(team_info.get("players", {}).keys())
-        
-        # Add roles to team players
-        for player_id in player_ids:
-            member = guild.get_member(int(player_id))
-            if member and role not in member.roles:
-                try:
-                    await member.add_roles(role, reason="Team sync")
-                    print(f"Added {role.name} to {member.display_name}")
-                except Exception as e:
-                    print(f"Error adding role to {member.display_name}: {e}")
+    def progress(report):
+        if report.done % 25 == 0 or report.done == report.planned:
+            print(f"Role sync: {report.done}/{report.planned}")
 
-    print("Role sync complete!")
+    if role_state.drift:
+        print("No usable role state, scanning every member")
+    try:
+        report = await reconcile_roles(guild, progress=progress)
+    except Exception:
+        traceback.print_exc()
+        return
+    for member_id, error in report.failures:
+        print(f"Error updating roles for {member_id}: {error}")
+    print(f"Role sync complete! {report.summary()}")
 
 @bot.event
 async def on_ready():
-    print(f"Logged in as {bot.user}")
-    
+    global role_sync_task, offer_view, startup_done, metrics_server
+    # on_ready fires again after every gateway reconnect; the startup work only runs once
+    if startup_done:
+        print(f"Reconnected as {bot.user}")
+        return
+    startup_done = True
+    guild = bot.get_guild(MAIN_GUILD_ID)
+    print(f"Logged in as {bot.user} after {time.monotonic() - STARTED_AT:.1f}s "
+          f"({GATEWAY_MODE} gateway, {len(guild.members) if guild else 0} members cached)")
+    persister.start()
+    role_state_persister.start()
+    offers_persister.start()
+    loop_lag.start()
+
+    # One stateless view answers the buttons on every offer DM, including ones sent before a restart
+    offer_view = SignConfirmationView()
+    bot.add_view(offer_view)
+    offer_timer.start()
+    dm_queue.start()
+
+    # Runs in the background so commands are served while roles catch up
+    role_sync_task = asyncio.create_task(sync_roles_with_team_data())
+
+    if METRICS_PORT:
+        try:
+            metrics_server = await serve_prometheus(metrics, "127.0.0.1", METRICS_PORT)
+            print(f"Metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"Metrics endpoint failed to start: {e}")
+
     try:
-        await bot.sync_all_application_commands()
-        print("Commands synced")
+        if await sync_commands_if_changed(bot, io=storage_io):
+            print("Commands synced")
+        else:
+            print("Commands unchanged, skipped sync")
     except Exception as e:
         print(f"Command sync failed: {e}")
 
-    await sync_roles_with_team_data()
+@bot.event
+async def on_member_update(before, after):
+    if after.guild.id != MAIN_GUILD_ID or before.roles == after.roles:
+        return
+    # Someone changed a managed role by hand; the next sync scans everyone
+    if not role_state.check(after.id, (role.id for role in after.roles)):
+        print(f"Role drift on {after}; next role sync will be a full scan")
+
+@bot.application_command_before_invoke
+async def start_command_timer(interaction):
+    interaction.attached.started = time.perf_counter()
+
+@bot.application_command_after_invoke
+async def stop_command_timer(interaction):
+    # Runs after the handler returns or raises, so this spans defer to the last followup
+    started = interaction.attached.get("started")
+    if started is not None:
+        metrics.observe_command(interaction.application_command.qualified_name, time.perf_counter() - started)
+
+@bot.event
+async def on_http_ratelimit(limit, remaining, retry_after, bucket, scope):
+    metrics.rate_limited(bucket)
+
+@bot.event
+async def on_global_http_ratelimit(retry_after):
+    metrics.global_rate_limits += 1
+
+@bot.event
+async def on_application_command_error(interaction, error):
+    if isinstance(error, PermissionDenied):
+        if interaction.response.is_done():
+            await interaction.followup.send(error.message, ephemeral=True)
+        else:
+            await interaction.response.send_message(error.message, ephemeral=True)
+        return
+    metrics.command_failed(interaction.application_command.qualified_name)
+    print(f"Error in command {interaction.application_command}:")
+    traceback.print_exception(type(error), error, error.__traceback__)
 
 # REGISTRATION COMMANDS
 @bot.slash_command(name="register", description="Register yourself as a player.")
 async def register(interaction: Interaction):
     await interaction.response.defer(ephemeral=True)
     user_id = str(interaction.user.id)
-    
-    try:
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        registered_players = {}
 
-    if user_id in registered_players:
+    if store.is_registered(user_id):
         await interaction.followup.send("⚠️ Already registered!", ephemeral=True)
         return
 
-    registered_players[user_id] = {
-        "name": interaction.user.name,
-        "id": user_id,
-        "team": None,
-        "status": "free_agent",
-        "2c": False,
-        "rating": "N/A"
-    }
-
-    with open("registered_players.json", "w") as f:
-        json.dump(registered_players, f, indent=4)
+    store.register_player(user_id, interaction.user.name)
 
     role = interaction.guild.get_role(FREE_AGENT_ROLE_ID)
     if role:
         try:
-            await interaction.user.add_roles(role)
+            await role_queue.apply(interaction.user, add=[role])
         except nextcord.Forbidden:
             await interaction.followup.send("✅ Registered but couldn't assign role")
             return
@@ -111,105 +400,121 @@ async def register(interaction: Interaction):
 async def unregister(interaction: Interaction):
     await interaction.response.defer(ephemeral=True)
     user_id = str(interaction.user.id)
-    
-    try:
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        await interaction.followup.send("❌ No registered players", ephemeral=True)
-        return
 
-    if user_id not in registered_players:
+    if not store.is_registered(user_id):
         await interaction.followup.send("❌ You're not registered", ephemeral=True)
         return
 
-    del registered_players[user_id]
-    
-    with open("registered_players.json", "w") as f:
-        json.dump(registered_players, f, indent=4)
+    store.unregister_player(user_id)
+    rating_index.remove(user_id)
 
     role = interaction.guild.get_role(FREE_AGENT_ROLE_ID)
-    if role and role in interaction.user.roles:
+    if role:
         try:
-            await interaction.user.remove_roles(role)
+            await role_queue.apply(interaction.user, remove=[role])
         except nextcord.Forbidden:
             await interaction.followup.send("✅ Unregistered but couldn't remove role", ephemeral=True)
             return
 
     await interaction.followup.send("✅ Unregistered successfully", ephemeral=True)
 
+# (store.version, [(player_id, name, team, status), ...] sorted by name)
+registry_cache = (None, [])
+# The registry read in flight, if any; everyone waiting on the registry shares it
+registry_refresh = None
+
+def registry_entries(league):
+    return sorted(
+        (
+            (pid, pdata.get("name") or "Unknown", pdata.get("team"), pdata.get("status", "N/A"))
+            for pid, pdata in league.iter_players()
+        ),
+        key=lambda entry: entry[1].casefold()
+    )
+
+async def refresh_registry():
+    global registry_cache, registry_refresh
+    version = store.version
+    try:
+        entries = await read_league(registry_entries)
+        if registry_cache[0] is None or version > registry_cache[0]:
+            registry_cache = (version, entries)
+    finally:
+        registry_refresh = None
+
+async def registry_snapshot():
+    """Registered players sorted by name, rebuilt only after the store changes.
+
+    At most one rebuild runs at a time. Callers who changed the store after
+    it started wait for the next one, which they all share, so a burst of
+    listings during heavy signing costs two registry reads, not one each.
+    """
+    global registry_refresh
+    wanted = store.version
+    while registry_cache[0] is None or registry_cache[0] < wanted:
+        if registry_refresh is None:
+            registry_refresh = asyncio.ensure_future(refresh_registry())
+        await asyncio.shield(registry_refresh)
+    return registry_cache[1]
+
 @bot.slash_command(name="listregistered", description="List all registered players.")
-async def listregistered(interaction: Interaction):
+@perms.requires(ADMIN, EXEC)
+async def listregistered(
+    interaction: Interaction,
+    team_name: str = SlashOption(required=False, description="Only players on this team", autocomplete_callback=autocomplete_team),
+    status: str = SlashOption(
+        required=False,
+        description="Only players with this status",
+        choices={"Free agent": "free_agent", "Signed": "signed"}
+    )
+):
     # Defer to avoid timeout errors (ephemeral = only user sees it)
     await interaction.response.defer(ephemeral=True)
 
-    # Permission check
-    author_roles = [role.id for role in interaction.user.roles]
-    if not any(rid in ADMIN_ROLE_IDS + EXEC_ROLE_IDS for rid in author_roles):
-        await interaction.followup.send("🚫 Permission denied", ephemeral=True)
-        return
+    entries = await registry_snapshot()
+    if team_name:
+        entries = [entry for entry in entries if entry[2] == team_name]
+    if status:
+        entries = [entry for entry in entries if entry[3] == status]
 
-    try:
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    if not entries:
         await interaction.followup.send("📭 No players registered", ephemeral=True)
         return
 
-    if not registered_players:
-        await interaction.followup.send("📭 No players registered", ephemeral=True)
-        return
-
-    # Prepare message chunks (Discord has message length limits)
-    chunks = []
-    current_chunk = []
-
-    for i, (pid, pdata) in enumerate(registered_players.items()):
-        name = pdata.get("name", "Unknown")
-        team = pdata.get("team", "None")
-        current_chunk.append(f"{i+1}. **{name}** (ID: `{pid}`, Team: `{team}`)")
+    title = "📋 Registered Players"
+    if team_name or status:
+        title += " (" + ", ".join(f for f in (team_name, status) if f) + ")"
 
-        if len(current_chunk) >= 10:
-            chunks.append("\n".join(current_chunk))
-            current_chunk = []
+    def render(page_entries, start, page, page_count):
+        lines = [
+            f"{start + i + 1}. **{name}** (ID: `{pid}`, Team: `{team}`)"
+            for i, (pid, name, team, _) in enumerate(page_entries)
+        ]
+        embed = nextcord.Embed(title=title, description="\n".join(lines), color=nextcord.Color.blue())
+        embed.set_footer(text=f"Page {page + 1}/{page_count} · {len(entries)} players")
+        return embed
 
-    if current_chunk:
-        chunks.append("\n".join(current_chunk))
-
-    # Send all chunks
-    for chunk in chunks:
-        await interaction.followup.send(chunk, ephemeral=True)
+    # One message; pages are rendered as they're turned to
+    view = PaginatedView(entries, render, author_id=interaction.user.id, page_size=LIST_PAGE_SIZE)
+    await interaction.followup.send(embed=view.current_embed(), view=view, ephemeral=True)
 
 # 2C COMMANDS
 @bot.slash_command(name="set2c", description="Allow player to sign with 2 clubs.")
+@perms.requires(ADMIN, EXEC)
 async def set2c(
     interaction: Interaction,
     member: nextcord.Member = SlashOption(description="Player to modify"),
     allow_2c: bool = SlashOption(description="Enable 2C?")
 ):
     await interaction.response.defer(ephemeral=True)
-    author_roles = [role.id for role in interaction.user.roles]
-    if not any(rid in ADMIN_ROLE_IDS + EXEC_ROLE_IDS for rid in author_roles):
-        await interaction.followup.send("🚫 Permission denied", ephemeral=True)
-        return
 
     user_id = str(member.id)
-    
-    try:
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        await interaction.followup.send("❌ No registered players", ephemeral=True)
-        return
 
-    if user_id not in registered_players:
+    if not store.is_registered(user_id):
         await interaction.followup.send("❌ Player not registered", ephemeral=True)
         return
 
-    registered_players[user_id]["2c"] = allow_2c
-    
-    with open("registered_players.json", "w") as f:
-        json.dump(registered_players, f, indent=4)
+    store.update_player(user_id, {"2c": allow_2c})
 
     await interaction.followup.send(
         f"✅ Updated 2C for **{member.name}** to `{allow_2c}`",
@@ -219,18 +524,11 @@ async def set2c(
 @bot.slash_command(name="list2c", description="List 2C-enabled players.")
 async def list2c(interaction: Interaction):
     await interaction.response.defer(ephemeral=True)
-    
-    try:
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        await interaction.followup.send("❌ No registered players", ephemeral=True)
-        return
 
-    two_c_players = [
-        pdata["name"] for pdata in registered_players.values() 
+    two_c_players = await read_league(lambda league: [
+        pdata["name"] for _, pdata in league.iter_players()
         if pdata.get("2c", False)
-    ]
+    ])
     
     if not two_c_players:
         await interaction.followup.send("🤷‍♂️ No 2C-enabled players", ephemeral=True)
@@ -248,58 +546,80 @@ async def list2c(interaction: Interaction):
 async def assignrating(
     interaction: Interaction,
     member: nextcord.Member = SlashOption(description="Player to rate"),
-    rating: str = SlashOption(description="Rating (e.g., 80, S, A)")
+    rating: str = SlashOption(description="Rating (e.g., 80, S, A+)")
 ):
     await interaction.response.defer(ephemeral=True)
     user_id = str(member.id)
-    
-    try:
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        await interaction.followup.send("❌ No registered players", ephemeral=True)
-        return
 
-    if user_id not in registered_players:
+    if not store.is_registered(user_id):
         await interaction.followup.send("❌ Player not registered", ephemeral=True)
         return
 
-    registered_players[user_id]["rating"] = rating.upper() if rating.isalpha() else rating
-    
-    with open("registered_players.json", "w") as f:
-        json.dump(registered_players, f, indent=4)
+    # Letters and numbers share one 0-100 scale so the leaderboard can sort them
+    try:
+        value = normalize_rating(rating)
+    except ValueError:
+        await interaction.followup.send("❌ Rating must be 0-100 or a grade from S to F (+/- allowed)", ephemeral=True)
+        return
+
+    player = store.update_player(user_id, {"rating": "N/A" if value is None else value})
+    rating_index.update(user_id, value, player.get("name"))
 
     await interaction.followup.send(
-        f"✅ Assigned rating **{rating}** to {member.display_name}",
+        f"✅ Assigned rating **{format_rating(value)}** to {member.display_name}",
         ephemeral=True
     )
 
 @bot.slash_command(name="ratingsshow", description="Show player ratings.")
-async def ratingsshow(interaction: Interaction):
+async def ratingsshow(
+    interaction: Interaction,
+    team_name: str = SlashOption(required=False, description="Only players on this team", autocomplete_callback=autocomplete_team),
+    free_agents: bool = SlashOption(required=False, description="Only free agents")
+):
     await interaction.response.defer(ephemeral=True)
-    
-    try:
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        await interaction.followup.send("❌ No registered players", ephemeral=True)
-        return
 
-    rated_players = [
-        (pdata["name"], pdata.get("rating", "N/A"))
-        for pdata in registered_players.values()
-        if pdata.get("rating", "N/A") != "N/A"
-    ]
-    
-    if not rated_players:
+    # Already sorted best-first; filters only drop entries. One team's roster is
+    # looked up player by player; anything wider takes one pass over the registry
+    roster_team = store.get_team(team_name) if team_name else None
+    if roster_team is not None:
+        players = {str(player_id): store.get_player(str(player_id)) for player_id in roster_team.roster}
+        ranked = rating_index.ranked(players)
+    else:
+        players = await read_league(lambda league: dict(league.iter_players()))
+        ranked = rating_index.ranked()
+    entries = []
+    for player_id, value in ranked:
+        player = players.get(player_id)
+        if player is None:
+            continue
+        team = player.get("team")
+        if team_name and team != team_name:
+            continue
+        if free_agents and team:
+            continue
+        entries.append((player.get("name") or "Unknown", value, team))
+
+    if not entries:
         await interaction.followup.send("⚠️ No players rated", ephemeral=True)
         return
 
-    embed = nextcord.Embed(title="🎖️ Player Ratings", color=nextcord.Color.gold())
-    for name, rating in rated_players:
-        embed.add_field(name=name, value=rating, inline=True)
-    
-    await interaction.followup.send(embed=embed, ephemeral=True)
+    title = "🎖️ Player Ratings"
+    if team_name:
+        title += f" — {team_name}"
+    elif free_agents:
+        title += " — Free agents"
+
+    def render(page_entries, start, page, page_count):
+        lines = [
+            f"{start + i + 1}. **{name}** — {format_rating(value)} · {team or 'Free agent'}"
+            for i, (name, value, team) in enumerate(page_entries)
+        ]
+        embed = nextcord.Embed(title=title, description="\n".join(lines), color=nextcord.Color.gold())
+        embed.set_footer(text=f"Page {page + 1}/{page_count} · {len(entries)} rated")
+        return embed
+
+    view = PaginatedView(entries, render, author_id=interaction.user.id, page_size=LIST_PAGE_SIZE)
+    await interaction.followup.send(embed=view.current_embed(), view=view, ephemeral=True)
 
 @bot.slash_command(name="getprofile", description="View player profile.")
 async def getprofile(
@@ -308,20 +628,14 @@ async def getprofile(
 ):
     await interaction.response.defer(ephemeral=True)
     user_id = str(member.id)
-    
-    try:
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        await interaction.followup.send("❌ No registered players", ephemeral=True)
-        return
 
-    if user_id not in registered_players:
+    if not store.is_registered(user_id):
         await interaction.followup.send("❌ Player not registered", ephemeral=True)
         return
 
-    player = registered_players[user_id]
-    
+    # Work on a copy so the defaults below don't leak into the store
+    player = dict(store.get_player(user_id))
+
     # Ensure all fields exist
     player.setdefault("team", None)
     player.setdefault("status", "N/A")
@@ -336,169 +650,137 @@ async def getprofile(
     embed.add_field(name="Status", value=player["status"], inline=True)
     embed.add_field(name="Team", value=player["team"] or "None", inline=True)
     embed.add_field(name="2C Enabled", value=str(player["2c"]), inline=True)
-    embed.add_field(name="Rating", value=player["rating"], inline=True)
+    embed.add_field(name="Rating", value=format_rating(player["rating"]), inline=True)
 
     await interaction.followup.send(embed=embed, ephemeral=True)
 
 # TEAM MANAGEMENT
 class SignConfirmationView(View):
-    def __init__(self, player_id, team_name, chairman_id, seasons):
-        super().__init__(timeout=600)
-        self.player_id = str(player_id)
-        self.team_name = team_name
-        self.chairman_id = chairman_id
-        self.seasons = seasons
-        self.accepted = False
-
-    async def on_timeout(self):
-        try:
-            player = self.get_player()
-            if player:
-                await player.send(f"⌛ Signing offer from **{self.team_name}** expired")
-        except Exception:
-            pass
-        self.disable_all_buttons()
+    """Buttons on every signing offer DM.
+
+    The custom_ids are fixed, so the view survives restarts; which offer a
+    click is about comes from the message it was sent in.
+    """
 
-    def get_player(self):
-        guild = bot.get_guild(MAIN_GUILD_ID)
-        return guild.get_member(int(self.player_id)) if guild else None
+    def __init__(self):
+        super().__init__(timeout=None)
 
-    def disable_all_buttons(self):
-        for child in self.children:
-            if isinstance(child, Button):
-                child.disabled = True
+    async def claim_offer(self, interaction: Interaction):
+        offer = offers.for_message(interaction.message.id)
+        if offer is None or offer.player_id != str(interaction.user.id):
+            await interaction.response.send_message("⚠️ This offer is no longer open.", ephemeral=True)
+            return None
+        # First click wins; later clicks and the expiry timer find nothing
+        return offers.claim(offer.offer_id)
 
-    @nextcord.ui.button(label="✅ Accept (No RC)", style=nextcord.ButtonStyle.green)
+    @nextcord.ui.button(label="✅ Accept (No RC)", style=nextcord.ButtonStyle.green, custom_id="offer:accept")
     async def accept_no_rc(self, button: Button, interaction: Interaction):
         await self.process_accept(interaction, False)
 
-    @nextcord.ui.button(label="🏷️ Accept + RC", style=nextcord.ButtonStyle.green)
+    @nextcord.ui.button(label="🏷️ Accept + RC", style=nextcord.ButtonStyle.green, custom_id="offer:accept_rc")
     async def accept_rc(self, button: Button, interaction: Interaction):
         await self.process_accept(interaction, True)
 
-    @nextcord.ui.button(label="❌ Decline", style=nextcord.ButtonStyle.red)
+    @nextcord.ui.button(label="❌ Decline", style=nextcord.ButtonStyle.red, custom_id="offer:decline")
     async def decline(self, button: Button, interaction: Interaction):
-        self.disable_all_buttons()
-        await interaction.response.edit_message(content="❌ Offer declined", view=self)
+        offer = await self.claim_offer(interaction)
+        if offer is None:
+            return
+        await interaction.response.edit_message(content="❌ Offer declined", view=None)
+        await self.notify_chairman(offer, f"❌ **{interaction.user.name}** declined offer to join **{offer.team_name}**")
+
+    async def notify_chairman(self, offer, content: str):
         try:
-            chairman = interaction.guild.get_member(int(self.chairman_id))
+            chairman = await member_cache.get(bot.get_guild(MAIN_GUILD_ID), offer.chairman_id)
             if chairman:
-                await chairman.send(
-                    f"❌ **{interaction.user.name}** declined offer to join **{self.team_name}**"
-                )
+                await chairman.send(content)
         except Exception:
             pass
-        self.stop()
 
     async def process_accept(self, interaction: Interaction, release_clause: bool):
-        if self.accepted:
-            await interaction.response.send_message("⚠️ You’ve already accepted the offer.", ephemeral=True)
+        offer = await self.claim_offer(interaction)
+        if offer is None:
             return
-        self.accepted = True
         await interaction.response.defer(ephemeral=True)
 
         player_id = str(interaction.user.id)
 
-        try:
-            with open("team_data.json", "r") as f:
-                team_data = json.load(f)
-            with open("registered_players.json", "r") as f:
-                reg_players = json.load(f)
-        except Exception:
-            await interaction.followup.send("💥 Failed to load data files.", ephemeral=True)
+        async with player_transaction(player_id, offer.team_name):
+            if not store.has_team(offer.team_name):
+                void_reason = "the team no longer exists"
+            elif store.roster_size(offer.team_name) >= MAX_ROSTER_SIZE:
+                void_reason = f"the roster is full ({MAX_ROSTER_SIZE}/{MAX_ROSTER_SIZE})"
+            else:
+                void_reason = None
+                # Move to the new team (drops any other roster spot)
+                store.sign_player(player_id, offer.team_name, offer.seasons, release_clause, name=interaction.user.name)
+
+        if void_reason:
+            # The offer was claimed above, so it's gone either way; take the buttons off and say so
+            await interaction.message.edit(
+                content=f"❌ This offer from **{offer.team_name}** is void: {void_reason}.", view=None
+            )
+            await interaction.followup.send(f"❌ Couldn't join **{offer.team_name}**: {void_reason}.", ephemeral=True)
+            await self.notify_chairman(
+                offer,
+                f"⚠️ **{interaction.user.name}** accepted your offer to join **{offer.team_name}**, "
+                f"but it's void: {void_reason}. Send a new offer if you still want them."
+            )
             return
 
-        team = team_data.get(self.team_name)
-        if not team:
-            await interaction.followup.send("❌ Team not found.", ephemeral=True)
-            return
+        await self.notify_chairman(
+            offer,
+            f"✅ **{interaction.user.name}** joined **{offer.team_name}** "
+            f"(RC: {'Yes' if release_clause else 'No'})"
+        )
 
-        # Roster limit check
-        if len(team.get("roster", [])) >= 20:
-            await interaction.followup.send("❌ Team roster is full (20/20).", ephemeral=True)
-            return
+        await interaction.message.edit(
+            content=f"✅ You’ve joined **{offer.team_name}**! (RC: {'Yes' if release_clause else 'No'})",
+            view=None
+        )
 
-        # Remove from other teams
-        for tname, tdata in team_data.items():
-            if tname != self.team_name:
-                tdata.get("players", {}).pop(player_id, None)
-                tdata["roster"] = [p for p in tdata.get("roster", []) if p.get("id") != player_id]
-
-        # Add to current team
-        team.setdefault("players", {})[player_id] = {"seasons": self.seasons}
-        if not any(p["id"] == player_id for p in team.get("roster", [])):
-            team["roster"].append({
-                "id": player_id,
-                "seasons": self.seasons,
-                "release_clause": release_clause
-            })
-
-        reg_players[player_id] = {
-            "name": interaction.user.name,
-            "id": player_id,
-            "team": self.team_name,
-            "status": "signed",
-            "2c": reg_players.get(player_id, {}).get("2c", False),
-            "rating": reg_players.get(player_id, {}).get("rating", "N/A")
-        }
+async def expire_offers(batch):
+    """Tell players their offers ran out and take the buttons off the offer DMs."""
+    semaphore = asyncio.Semaphore(OFFER_DM_CONCURRENCY)
 
-        try:
-            with open("team_data.json", "w") as f:
-                json.dump(team_data, f, indent=4)
-            with open("registered_players.json", "w") as f:
-                json.dump(reg_players, f, indent=4)
-        except:
-            await interaction.followup.send("⚠️ Failed to save updated data.", ephemeral=True)
-            return
+    async def expire(offer):
+        async with semaphore:
+            try:
+                if offer.channel_id and offer.message_id:
+                    channel = bot.get_partial_messageable(offer.channel_id)
+                    await channel.get_partial_message(offer.message_id).edit(view=None)
+                player = await member_cache.get(bot.get_guild(MAIN_GUILD_ID), offer.player_id)
+                if player:
+                    await player.send(f"⌛ Signing offer from **{offer.team_name}** expired")
+            except Exception:
+                pass
 
-        # Notify chairman
-        try:
-            chairman = bot.get_guild(MAIN_GUILD_ID).get_member(int(self.chairman_id))
-            if chairman:
-                await chairman.send(
-                    f"✅ **{interaction.user.name}** joined **{self.team_name}** "
-                    f"(RC: {'Yes' if release_clause else 'No'})"
-                )
-        except:
-            pass
+    await asyncio.gather(*(expire(offer) for offer in batch))
 
-        self.disable_all_buttons()
-        await interaction.followup.edit_message(
-            content=f"✅ You’ve joined **{self.team_name}**! (RC: {'Yes' if release_clause else 'No'})",
-            view=self
-        )
-        self.stop()
+offer_timer = OfferExpiryTimer(offers, expire_offers)
 
 
 @bot.slash_command(name="sign", description="Sign a player to your team.")
 async def sign(
     interaction: Interaction,
     player: nextcord.Member = SlashOption(description="Player to sign"),
-    team_name: str = SlashOption(description="Your team"),
+    team_name: str = SlashOption(description="Your team", autocomplete_callback=autocomplete_team),
     seasons: int = SlashOption(description="Contract seasons")
 ):
     await interaction.response.defer(ephemeral=True)
     chairman_id = str(interaction.user.id)
-    
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-    except Exception:
-        await interaction.followup.send("⚠️ Failed to load team data", ephemeral=True)
-        return
 
-    team = team_data.get(team_name)
+    team = store.get_team(team_name)
     if not team:
         await interaction.followup.send("❌ Team not found", ephemeral=True)
         return
         
-    if team.get("chairman") != chairman_id:
+    if not perms.has_any(interaction.user, chairman_of(team_name)):
         await interaction.followup.send("🚫 You're not this team's chairman", ephemeral=True)
         return
 
     try:
-        view = SignConfirmationView(player.id, team_name, chairman_id, seasons)
-        await player.send(
+        message = await player.send(
             embed=nextcord.Embed(
                 title=f"⚽ Signing Offer from {team_name}",
                 description=(
@@ -508,105 +790,43 @@ async def sign(
                 ),
                 color=nextcord.Color.gold()
             ),
-            view=view
+            view=offer_view
         )
+        offers.create(player.id, team_name, chairman_id, seasons, OFFER_TIMEOUT_S,
+                      channel_id=message.channel.id, message_id=message.id)
         await interaction.followup.send(f"📨 Offer sent to {player.name}!", ephemeral=True)
     except nextcord.Forbidden:
         await interaction.followup.send("❌ Couldn't DM player", ephemeral=True)
 
 @bot.slash_command(name="forcesign", description="Force-sign a player.")
+@perms.requires(ADMIN, EXEC)
 async def forcesign(
     interaction: Interaction,
     player: nextcord.Member = SlashOption(description="Player to sign"),
-    team_name: str = SlashOption(description="Team to join"),
+    team_name: str = SlashOption(description="Team to join", autocomplete_callback=autocomplete_team),
     seasons: int = SlashOption(description="Contract seasons")
 ):
     # Defer immediately at the start
     await interaction.response.defer(ephemeral=True)
     
-    author_roles = [role.id for role in interaction.user.roles]
-    if not any(rid in ADMIN_ROLE_IDS + EXEC_ROLE_IDS for rid in author_roles):
-        await interaction.followup.send("🚫 Permission denied", ephemeral=True)
-        return
-
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-    except Exception as e:
-        print(f"Error loading team data: {e}")
-        await interaction.followup.send("⚠️ Failed to load team data", ephemeral=True)
-        return
 
-    if team_name not in team_data:
+    if not store.has_team(team_name):
         await interaction.followup.send("❌ Team not found", ephemeral=True)
         return
 
     player_id = str(player.id)
-    
-    # Remove from other teams
-    for tname, tdata in team_data.items():
-        if player_id in tdata.get("players", {}):
-            del tdata["players"][player_id]
-        if "roster" in tdata:
-            tdata["roster"] = [p for p in tdata["roster"] if p.get("id") != player_id]
-    
-    # Add to new team
-    team = team_data[team_name]
-    if "players" not in team:
-        team["players"] = {}
-    team["players"][player_id] = {"seasons": seasons}
-    
-    if "roster" not in team:
-        team["roster"] = []
-    team["roster"].append({
-        "id": player_id,
-        "seasons": seasons,
-        "release_clause": False
-    })
-    
-    # Update player registry
-    try:
-        with open("registered_players.json", "r") as f:
-            reg_players = json.load(f)
-    except Exception:
-        reg_players = {}
-    
-    if player_id not in reg_players:
-        reg_players[player_id] = {
-            "name": player.name,
-            "id": player_id,
-            "team": team_name,
-            "status": "signed",
-            "2c": False,
-            "rating": "N/A"
-        }
-    else:
-        reg_players[player_id]["team"] = team_name
-        reg_players[player_id]["status"] = "signed"
-    
-    # Save data
-    try:
-        with open("team_data.json", "w") as f:
-            json.dump(team_data, f, indent=4)
-        with open("registered_players.json", "w") as f:
-            json.dump(reg_players, f, indent=4)
-    except Exception as e:
-        print(f"Error saving data: {e}")
-        await interaction.followup.send("⚠️ Failed to save data", ephemeral=True)
-        return
-    
-    # Update roles with error handling
+
+    # Hold the player and both teams while the roster changes
+    async with player_transaction(player_id, team_name):
+        # Move to the new team (drops any other roster spot) and update the registry
+        store.sign_player(player_id, team_name, seasons, name=player.name)
+        team = store.get_team(team_name)
+
+    # Update roles once the signing has committed: team role on, free-agent role off, one edit
     try:
         guild = interaction.guild
-        role_id = team.get("role_id")
-        if role_id:
-            role = guild.get_role(role_id)
-            if role:
-                await player.add_roles(role)
-                
-        free_agent_role = guild.get_role(FREE_AGENT_ROLE_ID)
-        if free_agent_role and free_agent_role in player.roles:
-            await player.remove_roles(free_agent_role)
+        team_role = guild.get_role(team.role_id) if team.role_id else None
+        await role_queue.apply(player, add=[team_role], remove=[guild.get_role(FREE_AGENT_ROLE_ID)])
     except Exception as e:
         print(f"Error updating roles: {e}")
         await interaction.followup.send(
@@ -614,7 +834,7 @@ async def forcesign(
             ephemeral=True
         )
         return
-        
+
     await interaction.followup.send(
         f"✅ {player.mention} force-signed to **{team_name}**",
         ephemeral=True
@@ -624,67 +844,35 @@ async def forcesign(
 async def release(
     interaction: Interaction,
     player: nextcord.Member = SlashOption(description="Player to release"),
-    team_name: str = SlashOption(description="Your team"),
+    team_name: str = SlashOption(description="Your team", autocomplete_callback=autocomplete_team),
     reason: str = SlashOption(description="Release reason")
 ):
     await interaction.response.defer(ephemeral=True)
     chairman_id = str(interaction.user.id)
     player_id = str(player.id)
-    
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-        with open("registered_players.json", "r") as f:
-            reg_players = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load data", ephemeral=True)
-        return
 
-    team = team_data.get(team_name)
+    team = store.get_team(team_name)
     if not team:
         await interaction.followup.send("❌ Team not found", ephemeral=True)
         return
         
-    if team.get("chairman") != chairman_id:
+    if not perms.has_any(interaction.user, chairman_of(team_name)):
         await interaction.followup.send("🚫 You're not this team's chairman", ephemeral=True)
         return
         
-    if player_id not in team.get("players", {}):
-        await interaction.followup.send("❌ Player not on your team", ephemeral=True)
-        return
+    async with transactions.transaction(players=[player_id], teams=[team_name]):
+        if not store.is_on_team(player_id, team_name):
+            await interaction.followup.send("❌ Player not on your team", ephemeral=True)
+            return
 
-    # Remove from team
-    del team["players"][player_id]
-    if "roster" in team:
-        team["roster"] = [p for p in team["roster"] if p.get("id") != player_id]
-    
-    # Update player registry
-    if player_id in reg_players:
-        reg_players[player_id]["team"] = None
-        reg_players[player_id]["status"] = "free_agent"
-    
-    # Save data
-    try:
-        with open("team_data.json", "w") as f:
-            json.dump(team_data, f, indent=4)
-        with open("registered_players.json", "w") as f:
-            json.dump(reg_players, f, indent=4)
-    except Exception:
-        await interaction.followup.send("⚠️ Failed to save data", ephemeral=True)
-        return
-    
-    # Update roles
+        # Remove from team and mark as free agent
+        store.release_player(player_id, team_name)
+
+    # Update roles after the release commits: team role off, free-agent role on, one edit
     guild = interaction.guild
-    role_id = team.get("role_id")
-    if role_id:
-        role = guild.get_role(role_id)
-        if role and role in player.roles:
-            await player.remove_roles(role)
-            
-    free_agent_role = guild.get_role(FREE_AGENT_ROLE_ID)
-    if free_agent_role and free_agent_role not in player.roles:
-        await player.add_roles(free_agent_role)
-        
+    team_role = guild.get_role(team.role_id) if team.role_id else None
+    await role_queue.apply(player, add=[guild.get_role(FREE_AGENT_ROLE_ID)], remove=[team_role])
+
     await interaction.followup.send(f"✅ {player.name} released", ephemeral=True)
     try:
         await player.send(f"🛑 Released from **{team_name}**\n**Reason:** {reason}")
@@ -692,178 +880,246 @@ async def release(
         pass
 
 @bot.slash_command(name="forcerelease", description="Force-release a player.")
+@perms.requires(ADMIN, EXEC)
 async def forcerelease(
     interaction: Interaction,
     player: nextcord.Member = SlashOption(description="Player to release"),
-    team_name: str = SlashOption(description="Team to release from"),
+    team_name: str = SlashOption(description="Team to release from", autocomplete_callback=autocomplete_team),
     reason: str = SlashOption(description="Release reason")
 ):
     await interaction.response.defer(ephemeral=True)
-    author_roles = [role.id for role in interaction.user.roles]
-    if not any(rid in ADMIN_ROLE_IDS + EXEC_ROLE_IDS for rid in author_roles):
-        await interaction.followup.send("🚫 Permission denied", ephemeral=True)
-        return
 
     player_id = str(player.id)
-    
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-        with open("registered_players.json", "r") as f:
-            reg_players = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load data", ephemeral=True)
-        return
 
-    team = team_data.get(team_name)
+    team = store.get_team(team_name)
     if not team:
         await interaction.followup.send("❌ Team not found", ephemeral=True)
         return
         
-    if player_id not in team.get("players", {}):
-        await interaction.followup.send("❌ Player not on this team", ephemeral=True)
-        return
+    async with transactions.transaction(players=[player_id], teams=[team_name]):
+        if not store.is_on_team(player_id, team_name):
+            await interaction.followup.send("❌ Player not on this team", ephemeral=True)
+            return
 
-    # Remove from team
-    del team["players"][player_id]
-    if "roster" in team:
-        team["roster"] = [p for p in team["roster"] if p.get("id") != player_id]
-    
-    # Update player registry
-    if player_id in reg_players:
-        reg_players[player_id]["team"] = None
-        reg_players[player_id]["status"] = "free_agent"
-    
-    # Save data
-    try:
-        with open("team_data.json", "w") as f:
-            json.dump(team_data, f, indent=4)
-        with open("registered_players.json", "w") as f:
-            json.dump(reg_players, f, indent=4)
-    except Exception:
-        await interaction.followup.send("⚠️ Failed to save data", ephemeral=True)
-        return
-    
-    # Update roles
+        # Remove from team and mark as free agent
+        store.release_player(player_id, team_name)
+
+    # Update roles after the release commits: team role off, free-agent role on, one edit
     guild = interaction.guild
-    role_id = team.get("role_id")
-    if role_id:
-        role = guild.get_role(role_id)
-        if role and role in player.roles:
-            await player.remove_roles(role)
-            
-    free_agent_role = guild.get_role(FREE_AGENT_ROLE_ID)
-    if free_agent_role and free_agent_role not in player.roles:
-        await player.add_roles(free_agent_role)
-        
+    team_role = guild.get_role(team.role_id) if team.role_id else None
+    await role_queue.apply(player, add=[guild.get_role(FREE_AGENT_ROLE_ID)], remove=[team_role])
+
     await interaction.followup.send(f"✅ {player.mention} force-released", ephemeral=True)
     try:
         await player.send(f"🛑 Force-released from **{team_name}**\n**Reason:** {reason}")
     except Exception:
         pass
 
-@bot.slash_command(name="releaseclauseuse", description="Use your release clause.")
-async def releaseclauseuse(interaction: Interaction):
+@bot.slash_command(name="bulktransfer", description="Sign and release many players from a CSV or JSON file.")
+@perms.requires(EXEC)
+async def bulktransfer(
+    interaction: Interaction,
+    file: nextcord.Attachment = SlashOption(description="Columns: action, player_id, team, seasons, release_clause"),
+    dry_run: bool = SlashOption(required=False, description="Only check the file")
+):
     await interaction.response.defer(ephemeral=True)
-    player_id = str(interaction.user.id)
-    
+
     try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-        with open("registered_players.json", "r") as f:
-            reg_players = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load data", ephemeral=True)
+        transfers = parse_transfers(file.filename, await file.read())
+    except (ValueError, UnicodeDecodeError) as e:
+        await interaction.followup.send(f"❌ Couldn't read **{file.filename}**: {e}", ephemeral=True)
+        return
+    if not transfers:
+        await interaction.followup.send("📭 No transfers in file", ephemeral=True)
+        return
+    if len(transfers) > BULK_TRANSFER_MAX_ROWS:
+        await interaction.followup.send(f"❌ At most {BULK_TRANSFER_MAX_ROWS} rows per file", ephemeral=True)
         return
 
-    for team_name, team in team_data.items():
-        roster = team.get("roster", [])
-        for player in roster:
-            if player.get("id") == player_id and player.get("release_clause"):
-                # Remove from team
-                if player_id in team.get("players", {}):
-                    del team["players"][player_id]
-                team["roster"] = [p for p in roster if p.get("id") != player_id]
-                
-                # Update player registry
-                if player_id in reg_players:
-                    reg_players[player_id]["team"] = None
-                    reg_players[player_id]["status"] = "free_agent"
-                
-                # Save data
+    def send_report(content, lines):
+        report_file = nextcord.File(io.BytesIO("\n".join(lines).encode("utf-8")), "bulktransfer_report.txt")
+        return interaction.followup.send(content, file=report_file, ephemeral=True)
+
+    player_ids = list({transfer.player_id for transfer in transfers})
+    team_names = {transfer.team_name for transfer in transfers if store.has_team(transfer.team_name)}
+
+    # Everything is checked and applied under one lock, so the batch sees no interleaved signings
+    async with players_transaction(player_ids, team_names):
+        errors = validate_transfers(store, transfers, MAX_ROSTER_SIZE)
+        if errors:
+            lines = [f"row {row}: ❌ {problem}" for row, problem in sorted(errors.items())]
+            await send_report(f"❌ {len(errors)} of {len(transfers)} rows are invalid; nothing was applied", lines)
+            return
+        if dry_run:
+            await interaction.followup.send(f"✅ All {len(transfers)} rows are valid (dry run, nothing applied)", ephemeral=True)
+            return
+
+        store.apply_transfers(transfers)
+
+    # Outside the locks: one rate-limited pass over everyone the batch moved can take minutes
+    message = await interaction.followup.send(
+        f"🔄 Applied {len(transfers)} transfers; updating roles...", ephemeral=True, wait=True
+    )
+    report = ReconcileReport()
+
+    def progress(current):
+        nonlocal report
+        report = current
+
+    async def show_progress():
+        while True:
+            await asyncio.sleep(PROGRESS_EDIT_INTERVAL_S)
+            try:
+                await message.edit(content=f"🔄 Updating roles: {report.done}/{report.planned} members")
+            except Exception:
+                pass
+
+    progress_task = asyncio.create_task(show_progress())
+    try:
+        desired, managed = await league_roles()
+        report = await role_reconciler.reconcile(
+            interaction.guild, desired, managed, progress=progress, reason="Bulk transfer",
+            member_ids={int(player_id) for player_id in player_ids}
+        )
+    finally:
+        progress_task.cancel()
+    role_state.commit(desired, managed, report, full=False)
+    await message.edit(content=f"✅ Roles updated for {len(player_ids)} players")
+
+    role_errors = dict(report.failures)
+    lines = []
+    for transfer in transfers:
+        member_id = int(transfer.player_id)
+        if member_id in report.missing:
+            note = " (⚠️ not in server, roles not updated)"
+        elif member_id in role_errors:
+            note = f" (⚠️ role update failed: {role_errors[member_id]})"
+        else:
+            note = ""
+        lines.append(f"row {transfer.row}: ✅ {transfer.describe()}{note}")
+    await send_report(f"✅ Applied {len(transfers)} transfers\n{report.summary()}", lines)
+
+@bot.slash_command(name="seasonadvance", description="End the season: run every contract down and release expired ones.")
+@perms.requires(EXEC)
+async def seasonadvance(
+    interaction: Interaction,
+    dry_run: bool = SlashOption(required=False, description="Only list the contracts that would expire")
+):
+    await interaction.response.defer(ephemeral=True)
+
+    def send_report(content, lines):
+        report_file = nextcord.File(io.BytesIO("\n".join(lines).encode("utf-8")), "seasonadvance_report.txt")
+        return interaction.followup.send(content, file=report_file, ephemeral=True)
+
+    # Every roster change takes its team's lock, so holding all of them freezes the rosters
+    async with transactions.transaction(teams=store.team_names()):
+        if dry_run:
+            expiring = store.expiring_contracts()
+            lines = [f"<@{player_id}> ({player_id}) — {team_name}" for player_id, team_name in expiring]
+            await send_report(f"🗓️ {len(expiring)} contracts would expire (dry run, nothing changed)", lines)
+            return
+        contracts, released = store.advance_season()
+
+    # Outside the locks: at the member edit rate this can take a while, and signings may go on meanwhile
+    report = ReconcileReport()
+    if released:
+        message = await interaction.followup.send(
+            f"🔄 {len(released)} contracts expired; updating roles...", ephemeral=True, wait=True
+        )
+
+        def progress(current):
+            nonlocal report
+            report = current
+
+        async def show_progress():
+            while True:
+                await asyncio.sleep(PROGRESS_EDIT_INTERVAL_S)
                 try:
-                    with open("team_data.json", "w") as f:
-                        json.dump(team_data, f, indent=4)
-                    with open("registered_players.json", "w") as f:
-                        json.dump(reg_players, f, indent=4)
+                    await message.edit(content=f"🔄 Updating roles: {report.done}/{report.planned} members")
                 except Exception:
-                    await interaction.followup.send("⚠️ Failed to save data", ephemeral=True)
-                    return
-                
-                # Update roles
-                guild = interaction.guild
-                role_id = team.get("role_id")
-                if role_id:
-                    role = guild.get_role(role_id)
-                    if role and role in interaction.user.roles:
-                        await interaction.user.remove_roles(role)
-                        
-                free_agent_role = guild.get_role(FREE_AGENT_ROLE_ID)
-                if free_agent_role and free_agent_role not in interaction.user.roles:
-                    await interaction.user.add_roles(free_agent_role)
-                    
-                await interaction.followup.send(
-                    f"✅ Used release clause from **{team_name}**",
-                    ephemeral=True
-                )
-                return
-                
-    await interaction.followup.send("❌ No release clause available", ephemeral=True)
+                    pass
+
+        progress_task = asyncio.create_task(show_progress())
+        try:
+            desired, managed = await league_roles()
+            report = await role_reconciler.reconcile(
+                interaction.guild, desired, managed, progress=progress, reason="Season advance",
+                member_ids={int(player_id) for player_id, _ in released}
+            )
+        finally:
+            progress_task.cancel()
+        role_state.commit(desired, managed, report, full=False)
+        await message.edit(content=f"✅ Roles updated for {len(released)} released players")
+
+        for player_id, team_name in released:
+            dm_queue.send(int(player_id), f"📄 Your contract with **{team_name}** has ended. You're now a free agent.")
+
+    role_errors = dict(report.failures)
+    lines = []
+    for player_id, team_name in released:
+        member_id = int(player_id)
+        if member_id in report.missing:
+            note = " (⚠️ not in server, roles not updated)"
+        elif member_id in role_errors:
+            note = f" (⚠️ role update failed: {role_errors[member_id]})"
+        else:
+            note = ""
+        lines.append(f"<@{player_id}> ({player_id}) — released from {team_name}{note}")
+    summary = f"✅ Season advanced: {contracts} contracts run down, {len(released)} expired"
+    if released:
+        summary += f"\n{report.summary()}"
+    await send_report(summary, lines or ["No contracts expired"])
+
+@bot.slash_command(name="releaseclauseuse", description="Use your release clause.")
+async def releaseclauseuse(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    player_id = str(interaction.user.id)
+
+    async with player_transaction(player_id):
+        team_name = store.release_clause_team(player_id)
+        if not team_name:
+            await interaction.followup.send("❌ No release clause available", ephemeral=True)
+            return
+
+        # Remove from team and mark as free agent
+        team = store.get_team(team_name)
+        store.release_player(player_id, team_name)
+
+    # Update roles after the release commits: team role off, free-agent role on, one edit
+    guild = interaction.guild
+    team_role = guild.get_role(team.role_id) if team.role_id else None
+    await role_queue.apply(interaction.user, add=[guild.get_role(FREE_AGENT_ROLE_ID)], remove=[team_role])
+
+    await interaction.followup.send(
+        f"✅ Used release clause from **{team_name}**",
+        ephemeral=True
+    )
 
 @bot.slash_command(name="updateteamroles", description="Update team roles.")
+@perms.requires(ADMIN, EXEC, CHAIRMAN, message="🚫 You're not a chairman")
 async def update_team_roles(
     interaction: Interaction,
-    team_name: str = SlashOption(required=False, description="Team to update")
+    team_name: str = SlashOption(required=False, description="Team to update", autocomplete_callback=autocomplete_team)
 ):
     await interaction.response.defer(ephemeral=True)
-    user_id = str(interaction.user.id)
-    
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-    except Exception:
-        await interaction.followup.send("⚠️ Failed to load team data", ephemeral=True)
-        return
 
-    # Check permissions
-    author_roles = [role.id for role in interaction.user.roles]
-    is_exec = any(rid in ADMIN_ROLE_IDS + EXEC_ROLE_IDS for rid in author_roles)
-    
-    if not is_exec:
-        # Find user's team if chairman
-        user_team = None
-        for tname, tdata in team_data.items():
-            if tdata.get("chairman") == user_id:
-                user_team = tname
-                break
-                
-        if not user_team:
-            await interaction.followup.send("🚫 You're not a chairman", ephemeral=True)
-            return
-            
-        if team_name and team_name != user_team:
+    if not perms.has_any(interaction.user, ADMIN, EXEC):
+        # Chairmen may only update their own team
+        if not team_name:
+            team_name = await chaired_team(interaction)
+            if team_name is None:
+                return
+        elif not perms.has_any(interaction.user, chairman_of(team_name)):
             await interaction.followup.send("🚫 Can't update other teams", ephemeral=True)
             return
-            
-        team_name = user_team
 
-    if not team_name or team_name not in team_data:
+    if not team_name or not store.has_team(team_name):
         await interaction.followup.send("❌ Team not found", ephemeral=True)
         return
 
     guild = interaction.guild
-    team = team_data[team_name]
-    role_id = team.get("role_id")
+    team = store.get_team(team_name)
+    role_id = team.role_id
     if not role_id:
         await interaction.followup.send("⚠️ Team has no role", ephemeral=True)
         return
@@ -873,81 +1129,127 @@ async def update_team_roles(
         await interaction.followup.send("⚠️ Role not found", ephemeral=True)
         return
 
-    player_ids = list(team.get("players", {}).keys())
-    
-    # Remove role from non-players
-    for member in role.members:
-        if str(member.id) not in player_ids:
-            try:
-                await member.remove_roles(role)
-            except Exception:
-                pass
-                
-    # Add role to players
-    for pid in player_ids:
-        member = guild.get_member(int(pid))
-        if member and role not in member.roles:
+    # Only members whose roles changed since the last sync, unless drift was seen
+    report = await reconcile_roles(guild, team_name)
+    message = f"✅ Updated roles for **{team_name}** ({report.applied} members changed)"
+    if report.failures:
+        message += f"\n⚠️ {len(report.failures)} updates failed"
+    await interaction.followup.send(message, ephemeral=True)
+
+def role_groups(teams, desired, holders):
+    """Split everyone with a managed role (or who should have one) into per-team groups.
+
+    A member lands in exactly one group: their team, else the first team whose
+    role they hold, else "Free agents & staff". ``holders`` is everyone
+    holding a managed role, from ``role_reconciler.fetch_role_holders()``.
+    """
+    holding = {}
+    for member in holders.values():
+        for role in member.roles:
+            holding.setdefault(role.id, []).append(member.id)
+
+    groups = {}
+    seen = set()
+    for team_name, team in teams:
+        groups[team_name] = [pid for pid in team.roster if pid not in seen]
+        seen.update(groups[team_name])
+    for team_name, team in teams:
+        if team.role_id:
+            strays = [member_id for member_id in holding.get(team.role_id, ()) if member_id not in seen]
+            groups[team_name].extend(strays)
+            seen.update(strays)
+
+    others = [member_id for member_id in desired if member_id not in seen]
+    seen.update(others)
+    for role_id in (FREE_AGENT_ROLE_ID, CHAIRMAN_ROLE_ID, ASSISTANT_MANAGER_ROLE_ID):
+        for member_id in holding.get(role_id, ()):
+            if member_id not in seen:
+                others.append(member_id)
+                seen.add(member_id)
+    groups["Free agents & staff"] = others
+    return groups
+
+@bot.slash_command(name="reconcileall", description="Repair every team, free-agent and staff role.")
+@perms.requires(EXEC)
+async def reconcileall(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+
+    guild = interaction.guild
+    report = ReconcileReport()
+    message = await interaction.followup.send("🔄 Checking roles...", ephemeral=True, wait=True)
+
+    # In lean mode the gateway cache only holds league members, so role.members
+    # would miss anyone else still wearing a league role
+    desired, managed = await league_roles()
+    holders = await role_reconciler.fetch_role_holders(guild, managed)
+    if holders is None:
+        report.partial = True
+        holders = role_reconciler.cached_role_holders(guild, managed)
+    teams = await read_league(lambda league: list(league.iter_teams()))
+    groups = role_groups(teams, desired, holders)
+
+    async def show_progress():
+        while True:
+            await asyncio.sleep(PROGRESS_EDIT_INTERVAL_S)
             try:
-                await member.add_roles(role)
+                await message.edit(content=f"🔄 Reconciling roles: {report.done}/{report.planned} members")
             except Exception:
                 pass
-                
-    await interaction.followup.send(f"✅ Updated roles for **{team_name}**", ephemeral=True)
+
+    progress_task = asyncio.create_task(show_progress())
+    try:
+        failures = await role_reconciler.reconcile_groups(
+            guild, desired, managed, groups, report, fetched=holders
+        )
+    finally:
+        progress_task.cancel()
+    role_state.commit(desired, managed, report, full=True)
+
+    summary = f"✅ Roles reconciled: {report.summary()}"
+    if report.partial:
+        summary += "\n⚠️ Couldn't list every member, so members outside the cache weren't checked"
+    for group_name, group_failures in failures.items():
+        mentions = ", ".join(f"<@{member_id}>" for member_id, _ in group_failures[:10])
+        more = f" (+{len(group_failures) - 10} more)" if len(group_failures) > 10 else ""
+        summary += f"\n⚠️ **{group_name}**: {len(group_failures)} failed — {mentions}{more}"
+    await message.edit(content=summary[:2000])
 
 # TEAM INFO COMMANDS
 @bot.slash_command(name="teaminfo", description="Show team information.")
 async def teaminfo(
     interaction: Interaction,
-    team_name: str = SlashOption(description="Team name")
+    team_name: str = SlashOption(description="Team name", autocomplete_callback=autocomplete_team)
 ):
     await interaction.response.defer()
-    
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load team data")
-        return
 
-    team = team_data.get(team_name)
+    team = store.get_team(team_name)
     if not team:
         await interaction.followup.send("❌ Team not found")
         return
 
     embed = nextcord.Embed(title=f"📊 {team_name} Info", color=0x1abc9c)
-    embed.add_field(name="👑 Chairman", value=f"<@{team.get('chairman')}>" if team.get("chairman") else "None")
-    embed.add_field(name="🧠 Assistant", value=f"<@{team.get('assistant_manager')}>" if team.get("assistant_manager") else "None")
-    embed.add_field(name="🧢 Manager", value=f"<@{team.get('manager')}>" if team.get("manager") else "None")
-    embed.add_field(name="👥 Players", value=str(len(team.get("players", {}))))
+    embed.add_field(name="👑 Chairman", value=f"<@{team.chairman}>" if team.chairman else "None")
+    embed.add_field(name="🧠 Assistant", value=f"<@{team.assistant_manager}>" if team.assistant_manager else "None")
+    embed.add_field(name="🧢 Manager", value=f"<@{team.manager}>" if team.manager else "None")
+    embed.add_field(name="👥 Players", value=str(len(team)))
     
     await interaction.followup.send(embed=embed)
 
 @bot.slash_command(name="teamrosterdisplay", description="Show team roster.")
 async def teamrosterdisplay(
     interaction: Interaction,
-    team_name: str = SlashOption(description="Team name")
+    team_name: str = SlashOption(description="Team name", autocomplete_callback=autocomplete_team)
 ):
     await interaction.response.defer()
-    
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load team data")
-        return
 
-    team = team_data.get(team_name)
+    team = store.get_team(team_name)
     if not team:
         await interaction.followup.send("❌ Team not found")
         return
 
-    roster = team.get("roster", [])
     description = ""
-    for player in roster:
-        pid = player.get("id", "")
-        seasons = player.get("seasons", 0)
-        rc = player.get("release_clause", False)
-        description += f"<@{pid}> | Seasons: {seasons} | RC: {'Yes' if rc else 'No'}\n"
+    for entry in team:
+        description += f"<@{entry.player_id}> | Seasons: {entry.seasons} | RC: {'Yes' if entry.release_clause else 'No'}\n"
     
     embed = nextcord.Embed(
         title=f"📋 {team_name} Roster",
@@ -958,57 +1260,41 @@ async def teamrosterdisplay(
 
 # TEAM STAFF MANAGEMENT
 @bot.slash_command(name="teamchairmanhire", description="Assign team chairman.")
+@perms.requires(ADMIN, EXEC)
 async def teamchairmanhire(
     interaction: Interaction,
-    team_name: str = SlashOption(description="Team name"),
+    team_name: str = SlashOption(description="Team name", autocomplete_callback=autocomplete_team),
     chairman: nextcord.Member = SlashOption(description="New chairman")
 ):
     await interaction.response.defer()
-    author_roles = [role.id for role in interaction.user.roles]
-    if not any(rid in ADMIN_ROLE_IDS + EXEC_ROLE_IDS for rid in author_roles):
-        await interaction.followup.send("🚫 Permission denied")
-        return
-
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load team or player data")
-        return
 
-    if team_name not in team_data:
+    if not store.has_team(team_name):
         await interaction.followup.send("❌ Team not found")
         return
 
-    # Set chairman and manager
     chairman_id = str(chairman.id)
-    team_data[team_name]["chairman"] = chairman_id
-    team_data[team_name]["manager"] = chairman_id
-
-    # Register chairman as a player with infinite seasons
-    if chairman_id not in registered_players:
-        registered_players[chairman_id] = {
-            "name": chairman.name,
-            "team": team_name,
-            "seasons": "inf"
-        }
-    else:
-        registered_players[chairman_id]["team"] = team_name
-        registered_players[chairman_id]["seasons"] = "inf"
+    async with transactions.transaction(players=[chairman_id], teams=[team_name]):
+        # Signed elsewhere: they'd keep that team's role and could leave its staff slots dangling
+        other_teams = store.teams_of_player(chairman_id) - {team_name}
+        if other_teams:
+            await interaction.followup.send(
+                f"❌ {chairman.mention} is signed to **{min(other_teams)}**, release them first"
+            )
+            return
 
-    # Add roles to chairman
-    chairman_role = interaction.guild.get_role(1372651142789595221)  # Chairman/Manager role
-    team_role = interaction.guild.get_role(team_data[team_name]["role_id"])
-    
-    await chairman.add_roles(chairman_role, team_role)
+        if not store.is_on_team(chairman_id, team_name) and store.roster_size(team_name) >= MAX_ROSTER_SIZE:
+            await interaction.followup.send(f"❌ Team roster is full ({MAX_ROSTER_SIZE}/{MAX_ROSTER_SIZE}).")
+            return
 
-    # Save changes
-    with open("team_data.json", "w") as f:
-        json.dump(team_data, f, indent=4)
-    with open("registered_players.json", "w") as f:
-        json.dump(registered_players, f, indent=4)
+        # Set chairman and manager, registered as a player with infinite seasons
+        store.appoint_chairman(team_name, chairman_id, chairman.name)
+        perms.invalidate_team(team_name, chairman_id)
+        team_role = interaction.guild.get_role(store.get_team(team_name).role_id)
+
+    # Add roles to chairman once the appointment has committed
+    chairman_role = interaction.guild.get_role(CHAIRMAN_ROLE_ID)
+    await role_queue.apply(chairman, add=[chairman_role, team_role],
+                           remove=[interaction.guild.get_role(FREE_AGENT_ROLE_ID)])
 
     await interaction.followup.send(
         f"✅ {chairman.mention} is now chairman and manager of {team_name}, signed for infinite seasons."
@@ -1016,236 +1302,246 @@ async def teamchairmanhire(
 
 
 @bot.slash_command(name="teammanagerhire", description="Assign team manager.")
+@perms.requires(CHAIRMAN, message="🚫 You're not a chairman")
 async def teammanagerhire(
     interaction: Interaction,
     manager: nextcord.Member = SlashOption(description="New manager")
 ):
     await interaction.response.defer()
-    user_id = str(interaction.user.id)
     manager_id = str(manager.id)
 
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load team or player data")
-        return
-
-    user_team = None
-    for tname, tdata in team_data.items():
-        if tdata.get("chairman") == user_id:
-            user_team = tname
-            break
-
-    if not user_team:
-        await interaction.followup.send("🚫 You're not a chairman")
+    user_team = await chaired_team(interaction)
+    if user_team is None:
         return
 
-    # Check if manager is signed to this team
-    player_data = registered_players.get(manager_id)
-    if not player_data or player_data.get("team") != user_team:
-        await interaction.followup.send(f"🚫 {manager.mention} is not signed to {user_team}")
-        return
+    async with transactions.transaction(players=[manager_id], teams=[user_team]):
+        # Check if manager is signed to this team
+        player_data = store.get_player(manager_id)
+        if not player_data or player_data.get("team") != user_team:
+            await interaction.followup.send(f"🚫 {manager.mention} is not signed to {user_team}")
+            return
 
-    # Assign manager
-    team_data[user_team]["manager"] = manager_id
+        # Assign manager
+        store.set_staff(user_team, "manager", manager_id)
+        perms.invalidate_team(user_team, manager_id)
 
     # Add manager role
-    manager_role = interaction.guild.get_role(1372651142789595221)  # Chairman/Manager role
-    await manager.add_roles(manager_role)
-
-    with open("team_data.json", "w") as f:
-        json.dump(team_data, f, indent=4)
+    manager_role = interaction.guild.get_role(CHAIRMAN_ROLE_ID)
+    await role_queue.apply(manager, add=[manager_role])
 
     await interaction.followup.send(f"✅ {manager.mention} is now manager of {user_team}")
 
 
 @bot.slash_command(name="assistantmanagerhire", description="Assign assistant manager.")
+@perms.requires(CHAIRMAN, message="🚫 You're not a chairman")
 async def assistantmanagerhire(
     interaction: Interaction,
     assistant: nextcord.Member = SlashOption(description="New assistant")
 ):
     await interaction.response.defer()
-    user_id = str(interaction.user.id)
     assistant_id = str(assistant.id)
 
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load team or player data")
-        return
-
-    # Find user's team
-    user_team = None
-    for tname, tdata in team_data.items():
-        if tdata.get("chairman") == user_id:
-            user_team = tname
-            break
-
-    if not user_team:
-        await interaction.followup.send("🚫 You're not a chairman")
+    user_team = await chaired_team(interaction)
+    if user_team is None:
         return
 
-    # Check if assistant is signed to this team
-    player_data = registered_players.get(assistant_id)
-    if not player_data or player_data.get("team") != user_team:
-        await interaction.followup.send(f"🚫 {assistant.mention} is not signed to {user_team}")
-        return
+    async with transactions.transaction(players=[assistant_id], teams=[user_team]):
+        # Check if assistant is signed to this team
+        player_data = store.get_player(assistant_id)
+        if not player_data or player_data.get("team") != user_team:
+            await interaction.followup.send(f"🚫 {assistant.mention} is not signed to {user_team}")
+            return
 
-    # Assign assistant manager
-    team_data[user_team]["assistant_manager"] = assistant_id
+        # Assign assistant manager
+        store.set_staff(user_team, "assistant_manager", assistant_id)
+        perms.invalidate_team(user_team, assistant_id)
 
     # Add assistant manager role
-    assistant_role = interaction.guild.get_role(1372651142789595220)  # Assistant manager role
-    await assistant.add_roles(assistant_role)
-
-    with open("team_data.json", "w") as f:
-        json.dump(team_data, f, indent=4)
+    assistant_role = interaction.guild.get_role(ASSISTANT_MANAGER_ROLE_ID)
+    await role_queue.apply(assistant, add=[assistant_role])
 
     await interaction.followup.send(f"✅ {assistant.mention} is now assistant manager of {user_team}")
 
 
 @bot.slash_command(name="teamchairmanunhire", description="Remove team chairman.")
+@perms.requires(ADMIN, EXEC)
 async def teamchairmanunhire(
     interaction: Interaction,
     team_name: str = SlashOption(description="Team name")
 ):
     await interaction.response.defer()
-    author_roles = [role.id for role in interaction.user.roles]
-    if not any(rid in ADMIN_ROLE_IDS + EXEC_ROLE_IDS for rid in author_roles):
-        await interaction.followup.send("🚫 Permission denied")
-        return
 
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-        with open("registered_players.json", "r") as f:
-            registered_players = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load data")
-        return
-
-    if team_name not in team_data:
+    if not store.has_team(team_name):
         await interaction.followup.send("❌ Team not found")
         return
 
-    if "chairman" not in team_data[team_name]:
-        await interaction.followup.send("ℹ️ No chairman assigned")
-        return
-
-    chairman_id = team_data[team_name]["chairman"]
-    chairman = interaction.guild.get_member(int(chairman_id))
-    
-    # Remove roles from chairman
-    chairman_role = interaction.guild.get_role(1372651142789595221)  # Chairman/Manager role
-    team_role = interaction.guild.get_role(team_data[team_name]["role_id"])
-    
-    if chairman:
-        await chairman.remove_roles(chairman_role, team_role)
-
-    del team_data[team_name]["chairman"]
+    async with transactions.transaction(teams=[team_name]):
+        team = store.get_team(team_name)
+        if not team.chairman:
+            await interaction.followup.send("ℹ️ No chairman assigned")
+            return
 
-    # Also release chairman from the team
-    if chairman_id in registered_players:
-        del registered_players[chairman_id]
+        # Also release chairman from the team
+        chairman_id = team.chairman
+        store.dismiss_chairman(team_name)
+        rating_index.remove(chairman_id)
+        perms.invalidate_team(team_name, chairman_id)
 
-    with open("team_data.json", "w") as f:
-        json.dump(team_data, f, indent=4)
-    with open("registered_players.json", "w") as f:
-        json.dump(registered_players, f, indent=4)
+    # Remove roles from chairman once the dismissal has committed
+    chairman = await member_cache.get(interaction.guild, chairman_id)
+    if chairman:
+        chairman_role = interaction.guild.get_role(CHAIRMAN_ROLE_ID)
+        team_role = interaction.guild.get_role(team.role_id)
+        await role_queue.apply(chairman, remove=[chairman_role, team_role])
 
     await interaction.followup.send(f"✅ Chairman removed from {team_name} and released as a free agent.")
 
 
 @bot.slash_command(name="teammanagerunhire", description="Remove team manager.")
+@perms.requires(CHAIRMAN, message="🚫 You're not a chairman")
 async def teammanagerunhire(interaction: Interaction):
     await interaction.response.defer()
-    user_id = str(interaction.user.id)
 
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load team data")
+    user_team = await chaired_team(interaction)
+    if user_team is None:
         return
 
-    # Find user's team
-    user_team = None
-    for tname, tdata in team_data.items():
-        if tdata.get("chairman") == user_id:
-            user_team = tname
-            break
-
-    if not user_team:
-        await interaction.followup.send("🚫 You're not a chairman")
-        return
+    async with transactions.transaction(teams=[user_team]):
+        manager_id = store.get_team(user_team).manager
+        if not manager_id:
+            await interaction.followup.send("ℹ️ No manager assigned")
+            return
 
-    if "manager" not in team_data[user_team]:
-        await interaction.followup.send("ℹ️ No manager assigned")
-        return
+        keeps_role = manager_id == store.get_team(user_team).chairman
+        store.clear_staff(user_team, "manager")
+        perms.invalidate_team(user_team, manager_id)
 
-    manager_id = team_data[user_team]["manager"]
-    manager = interaction.guild.get_member(int(manager_id))
-    
-    # Remove manager role
-    manager_role = interaction.guild.get_role(1372651142789595221)  # Chairman/Manager role
+    # Remove manager role (shared with the chairman, who keeps it)
+    manager = None if keeps_role else await member_cache.get(interaction.guild, manager_id)
     if manager:
-        await manager.remove_roles(manager_role)
-
-    del team_data[user_team]["manager"]
-
-    with open("team_data.json", "w") as f:
-        json.dump(team_data, f, indent=4)
+        manager_role = interaction.guild.get_role(CHAIRMAN_ROLE_ID)
+        await role_queue.apply(manager, remove=[manager_role])
 
     await interaction.followup.send(f"✅ Manager demoted from {user_team}, still signed to team.")
 
 
 @bot.slash_command(name="assistantmanagerunhire", description="Remove assistant manager.")
+@perms.requires(CHAIRMAN, message="🚫 You're not a chairman")
 async def assistantmanagerunhire(interaction: Interaction):
     await interaction.response.defer()
-    user_id = str(interaction.user.id)
 
-    try:
-        with open("team_data.json", "r") as f:
-            team_data = json.load(f)
-    except Exception:
-        await interaction.followup.send("💥 Failed to load team data")
+    user_team = await chaired_team(interaction)
+    if user_team is None:
         return
 
-    # Find user's team
-    user_team = None
-    for tname, tdata in team_data.items():
-        if tdata.get("chairman") == user_id:
-            user_team = tname
-            break
-
-    if not user_team:
-        await interaction.followup.send("🚫 You're not a chairman")
-        return
+    async with transactions.transaction(teams=[user_team]):
+        assistant_id = store.get_team(user_team).assistant_manager
+        if not assistant_id:
+            await interaction.followup.send("ℹ️ No assistant manager assigned")
+            return
 
-    if "assistant_manager" not in team_data[user_team]:
-        await interaction.followup.send("ℹ️ No assistant manager assigned")
-        return
+        store.clear_staff(user_team, "assistant_manager")
+        perms.invalidate_team(user_team, assistant_id)
 
-    assistant_id = team_data[user_team]["assistant_manager"]
-    assistant = interaction.guild.get_member(int(assistant_id))
-    
     # Remove assistant manager role
-    assistant_role = interaction.guild.get_role(1372651142789595220)  # Assistant manager role
+    assistant = await member_cache.get(interaction.guild, assistant_id)
     if assistant:
-        await assistant.remove_roles(assistant_role)
+        assistant_role = interaction.guild.get_role(ASSISTANT_MANAGER_ROLE_ID)
+        await role_queue.apply(assistant, remove=[assistant_role])
 
-    del team_data[user_team]["assistant_manager"]
+    await interaction.followup.send(f"✅ Assistant manager demoted from {user_team}, still signed to team.")
 
-    with open("team_data.json", "w") as f:
-        json.dump(team_data, f, indent=4)
 
-    await interaction.followup.send(f"✅ Assistant manager demoted from {user_team}, still signed to team.")
+# BOT STATS
+metrics.gauge("open_offers", lambda: len(offers))
+metrics.gauge("member_cache_size", lambda: len(member_cache))
+metrics.gauge("member_edit_waits", lambda: role_limiter.waits)
+metrics.gauge("member_edit_wait_seconds", lambda: role_limiter.waited)
+metrics.gauge("role_queue_edits", lambda: role_queue.edits)
+metrics.gauge("league_flushes", lambda: persister.flush_count)
+metrics.gauge("active_locks", lambda: transactions.active_keys)
+metrics.gauge("dm_queue_pending", lambda: len(dm_queue))
+metrics.gauge("dms_failed", lambda: dm_queue.failed)
+metrics.gauge("storage_io_pending", lambda: storage_io.pending)
+metrics.gauge("storage_io_peak_pending", lambda: storage_io.peak_pending)
+metrics.gauge("storage_io_wait_seconds", lambda: storage_io.waited)
+metrics.gauge("storage_io_busy_seconds", lambda: storage_io.busy)
+
+def ms(seconds):
+    return f"{seconds * 1000:.0f}ms"
+
+def top_lines(rows, limit=10):
+    """The first ``limit`` lines that fit in one embed field."""
+    lines = []
+    for line in rows[:limit]:
+        if sum(len(l) + 1 for l in lines) + len(line) > 1000:
+            break
+        lines.append(line)
+    return "\n".join(lines) or "Nothing yet"
+
+@bot.slash_command(name="botstats", description="Show command, storage and Discord API timings.")
+@perms.requires(EXEC)
+async def botstats(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+
+    commands_by_use = sorted(metrics.commands.items(), key=lambda item: -item[1].count)
+    command_lines = [
+        f"`{name}` {h.count}× p50 {ms(h.quantile(0.5))} · p95 {ms(h.quantile(0.95))} · max {ms(h.max)}"
+        + (f" · ❌ {metrics.command_errors[name]}" if metrics.command_errors.get(name) else "")
+        for name, h in commands_by_use
+    ]
+    io_lines = [
+        f"`{store_name} {stage}` {h.count}× avg {ms(h.sum / h.count)} · max {ms(h.max)}"
+        for (store_name, stage), h in sorted(metrics.io.items()) if h.count
+    ]
+    routes_by_use = sorted(metrics.http.items(), key=lambda item: -item[1].count)
+    http_lines = [
+        f"`{route}` {h.count}× avg {ms(h.sum / h.count)} · p95 {ms(h.quantile(0.95))}"
+        + (f" · ❌ {metrics.http_errors[route]}" if metrics.http_errors.get(route) else "")
+        for route, h in routes_by_use
+    ]
+    lag = metrics.loop_lag
+    loop_lines = [
+        f"Loop lag p50 {lag.quantile(0.5) * 1000:.1f}ms · p95 {lag.quantile(0.95) * 1000:.1f}ms "
+        f"· max {lag.max * 1000:.1f}ms ({lag.count} samples)",
+        f"Disk jobs: {storage_io.completed} done, {storage_io.failed} failed, queue peak "
+        f"{storage_io.peak_pending}/{storage_io.max_pending}, {storage_io.waited:.1f}s waiting for a slot",
+    ]
+    rate_limit_lines = [
+        f"Discord: {sum(metrics.rate_limits.values())} bucket, {metrics.global_rate_limits} global",
+        f"Member edits paced: {role_limiter.waits} waits, {role_limiter.waited:.1f}s total",
+    ]
+
+    embed = nextcord.Embed(title="📈 Bot Stats", color=nextcord.Color.dark_teal())
+    embed.add_field(name="⏱️ Commands", value=top_lines(command_lines), inline=False)
+    embed.add_field(name="💾 Storage I/O", value=top_lines(io_lines), inline=False)
+    embed.add_field(name="🌐 Discord HTTP", value=top_lines(http_lines), inline=False)
+    embed.add_field(name="🚦 Rate limits", value="\n".join(rate_limit_lines), inline=False)
+    embed.add_field(name="🫀 Event loop", value="\n".join(loop_lines), inline=False)
+    embed.add_field(
+        name="📦 State",
+        value="\n".join(f"{name}: {value:g}" for name, value in metrics.gauges().items()),
+        inline=False
+    )
+    embed.set_footer(text=f"Up {(time.monotonic() - metrics.started) / 3600:.1f}h · {GATEWAY_MODE} gateway")
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+
+@bot.slash_command(name="exportleague", description="Download the league data as readable JSON.")
+@perms.requires(EXEC)
+async def exportleague(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+
+    # Copied out of the store, then indented on the storage thread: the snapshot may be binary or compact
+    team_data, players = await storage_io.run(export_json, await read_league(export_snapshot))
+    files = [
+        nextcord.File(io.BytesIO(team_data), TEAM_DATA_FILE),
+        nextcord.File(io.BytesIO(players), PLAYERS_FILE),
+    ]
+    await interaction.followup.send(
+        f"📤 {store.player_count()} players across {len(store.team_names())} teams", files=files, ephemeral=True
+    )
 
 
-bot.run('')
\ No newline at end of file
+if __name__ == "__main__":
+    bot.run('')
\ No newline at end of file
@@ -0,0 +1,62 @@
+import hashlib
+import json
+from typing import Optional
+
+from persistence import atomic_write
+
+COMMAND_SYNC_FILE = "command_sync.json"
+
+
+def command_signature(bot) -> str:
+    """Stable hash of every application command payload the bot would deploy.
+
+    Covers names, descriptions, options, choices and permissions of global
+    and guild commands, plus the application id, so any change that Discord
+    needs to hear about changes the hash.
+    """
+    payloads = []
+    for command in bot.get_all_application_commands():
+        if command.is_global:
+            payloads.append([None, command.get_payload(None)])
+        for guild_id in sorted(command.guild_ids_to_rollout):
+            payloads.append([guild_id, command.get_payload(guild_id)])
+    payloads.sort(key=lambda item: json.dumps(item, sort_keys=True, default=str))
+    data = json.dumps(
+        {"application_id": bot.application_id, "commands": payloads},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def read_synced_signature(path: str = COMMAND_SYNC_FILE) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("signature")
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_synced_signature(signature: str, path: str = COMMAND_SYNC_FILE) -> None:
+    atomic_write(path, json.dumps({"signature": signature}).encode("utf-8"))
+
+
+async def sync_commands_if_changed(bot, path: str = COMMAND_SYNC_FILE, io=None) -> bool:
+    """Deploy commands only when their signature differs from the last deploy.
+
+    When nothing changed, Discord's commands are still fetched once so local
+    commands get their ids (autocomplete needs them), but nothing is
+    created, updated or deleted. The signature file is read and written
+    through ``io`` (a ``StorageIO``) when given. Returns whether a full sync
+    ran.
+    """
+    signature = command_signature(bot)
+    synced = await io.run(read_synced_signature, path) if io is not None else read_synced_signature(path)
+    if signature == synced:
+        await bot.sync_all_application_commands(update_known=False, delete_unknown=False, register_new=False)
+        return False
+    await bot.sync_all_application_commands()
+    if io is not None:
+        await io.run(write_synced_signature, signature, path)
+    else:
+        write_synced_signature(signature, path)
+    return True
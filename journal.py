@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from typing import Iterator, List, Optional
+
+JOURNAL_FILE = "league_journal.jsonl"
+HISTORY_FILE = "league_history.jsonl"
+# First line of a fresh journal; carries the sequence number across compactions
+SNAPSHOT_MARKER = "snapshot"
+
+
+class LeagueJournal:
+    """Append-only log of league mutations, one JSON record per line.
+
+    Records describe absolute changes ("player X is on team Y"), so replaying
+    a segment on top of a snapshot that already contains part of it ends in
+    the same state. Compaction works in three steps:
+
+    1. ``rotate()`` cuts the journal at the instant of the snapshot, on the
+       event loop; ``move_rotated()`` then finishes the live journal, moves
+       it aside and starts a new one on the storage thread. Records appended
+       in between go to the new journal.
+    2. The caller fsyncs the rotated segment (``sync_rotated()``) and writes
+       a snapshot of the state at that instant.
+    3. ``archive_rotated()`` moves the rotated segment into the history file.
+
+    A crash between any two steps is recovered by replaying the rotated
+    segment (if present) and then the live journal on top of the last snapshot.
+
+    ``append()`` only queues the line in memory; ``sync()`` writes and fsyncs
+    the queued lines on the storage thread, so the event loop never touches
+    the file.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE, history_path: Optional[str] = HISTORY_FILE):
+        self.path = path
+        self.rotated_path = path + ".1"
+        self.history_path = history_path
+        self.seq = 0
+        self.records_since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+        self._file = None
+        # Lines appended but not yet written; sync() writes them out
+        self._pending: List[str] = []
+        # Between rotate() and move_rotated(): the unwritten lines that belong
+        # to the cut-off journal and the seq it ends at
+        self._cut: Optional[List[str]] = None
+        self._cut_seq = 0
+        # append() and rotate() run on the event loop, the file work on the storage thread
+        self._lock = threading.Lock()
+
+    def read_records(self) -> Iterator[dict]:
+        """Yield every record not yet folded into a snapshot, oldest first."""
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final write from a crash; nothing after it was acknowledged
+                        print(f"Skipping truncated journal record in {path}")
+                        break
+                    self.seq = max(self.seq, record.get("seq", 0))
+                    if record.get("op") == SNAPSHOT_MARKER:
+                        continue
+                    self.records_since_snapshot += 1
+                    yield record
+
+    def open(self) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _line(record: dict) -> str:
+        record.setdefault("ts", round(time.time(), 3))
+        return json.dumps(record, separators=(",", ":")) + "\n"
+
+    def append(self, record: dict) -> dict:
+        self.seq += 1
+        record["seq"] = self.seq
+        line = self._line(record)
+        with self._lock:
+            self._pending.append(line)
+        self.records_since_snapshot += 1
+        return record
+
+    def _write(self, lines: List[str]) -> None:
+        self.open()
+        self._file.write("".join(lines))
+        self._file.flush()
+
+    def sync(self) -> None:
+        """Write out the appended records and fsync the live journal; runs on the storage thread."""
+        self.move_rotated()
+        with self._lock:
+            lines, self._pending = self._pending, []
+        if lines:
+            try:
+                self._write(lines)
+            except BaseException:
+                # Keep them for the next sync; replaying a line twice is harmless
+                with self._lock:
+                    self._pending[:0] = lines
+                raise
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> None:
+        """Cut the journal where a snapshot is being taken; ``move_rotated()`` does the file work.
+
+        Only moves the unwritten lines aside, so it is cheap enough for the event loop.
+        """
+        with self._lock:
+            if self._cut is None:
+                # A cut still waiting for move_rotated() already covers this one
+                self._cut, self._pending = self._pending, []
+                self._cut_seq = self.seq
+        self.records_since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+
+    def move_rotated(self) -> None:
+        """Finish the cut-off journal, move it aside and start a new one; runs on the storage thread."""
+        with self._lock:
+            cut = self._cut
+        if cut is None:
+            return
+        unwritten = cut
+        try:
+            if cut:
+                self._write(cut)
+            unwritten = []
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+            if os.path.exists(self.path):
+                if os.path.exists(self.rotated_path):
+                    # A previous snapshot never completed; keep both segments
+                    with open(self.path, "r", encoding="utf-8") as src, \
+                            open(self.rotated_path, "a", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, self.rotated_path)
+
+            self._write([self._line({"op": SNAPSHOT_MARKER, "seq": self._cut_seq})])
+        except BaseException:
+            # Give up on this cut: whichever journal file is there next takes the
+            # unwritten lines, ahead of the later ones. Replay covers both files.
+            if self._file is not None and self._file.closed:
+                self._file = None
+            with self._lock:
+                self._pending[:0] = unwritten
+                self._cut = None
+            raise
+        with self._lock:
+            self._cut = None
+
+    def sync_rotated(self) -> None:
+        """fsync the rotated segment; safe to call from an executor thread."""
+        try:
+            fd = os.open(self.rotated_path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def archive_rotated(self) -> None:
+        """Drop the rotated segment once the snapshot covering it is on disk."""
+        if not os.path.exists(self.rotated_path):
+            return
+        if self.history_path:
+            with open(self.rotated_path, "r", encoding="utf-8") as src, \
+                    open(self.history_path, "a", encoding="utf-8") as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+        os.remove(self.rotated_path)
+
+    def close(self) -> None:
+        """Write out what's left and close the file; the last thing to run at shutdown."""
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
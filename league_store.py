@@ -0,0 +1,505 @@
+import os
+import time
+from functools import partial
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from roster import (
+    INFINITE_SEASONS, STAFF_ROLES, TEAM_DATA_FORMAT, Team, seasons_after_season, teams_from_json, teams_to_json
+)
+from serializers import SNAPSHOT_FILE, BinaryFormat, JsonFormat, LeagueData
+
+TEAM_DATA_FILE = "team_data.json"
+PLAYERS_FILE = "registered_players.json"
+T = TypeVar("T")
+
+
+class LeagueStore:
+    """In-memory copy of the league data shared by every command.
+
+    The league files are parsed once by ``load()``; commands read from memory
+    and change state only through the mutation methods below. Every mutation
+    notifies the registered listeners (normally a ``WriteBehindPersister``)
+    instead of touching the disk itself.
+
+    With a ``LeagueJournal`` attached, each mutation is a single record that
+    is applied in memory and appended to the journal. The JSON files become a
+    periodic snapshot, rewritten once ``compact_every`` records or
+    ``snapshot_interval`` seconds have accumulated.
+
+    ``file_format`` decides how snapshots are encoded (see ``serializers``):
+    compact JSON in the two files by default, or a binary snapshot. Loading
+    reads whichever snapshot on disk is newest, so switching formats carries
+    the league over on the next snapshot.
+
+    Teams are ``roster.Team`` records whose roster is keyed by integer
+    player id. Methods still accept ids as strings, the way commands pass
+    them. A team file in the old layout is upgraded on the next snapshot.
+
+    Lookups that used to scan every team are served from indexes that the
+    ``_apply_*`` handlers update alongside the data itself:
+    player -> team(s), staff member -> team per role, and release-clause
+    holders -> team.
+    """
+
+    # Reads are in-memory and cheap; see SQLiteLeagueStore.read()
+    blocking_reads = False
+
+    def __init__(self, team_path: str = TEAM_DATA_FILE, players_path: str = PLAYERS_FILE,
+                 journal=None, compact_every: int = 1000, snapshot_interval: float = 300, file_format=None):
+        self.team_path = team_path
+        self.players_path = players_path
+        self.file_format = file_format or JsonFormat(team_path, players_path)
+        self.journal = journal
+        self.compact_every = compact_every
+        self.snapshot_interval = snapshot_interval
+        self._teams: Dict[str, Team] = {}
+        self._players: Dict[str, dict] = {}
+        self._listeners: List[Callable[[], None]] = []
+        # Bumped on every change so callers can cache derived views
+        self.version = 0
+        # Set when team_data.json was read in an older layout
+        self._upgrade_pending = False
+
+        # Secondary indexes, rebuilt on load and maintained by _apply_*
+        self._player_teams: Dict[int, Set[str]] = {}
+        self._staff_teams: Dict[str, Dict[str, Set[str]]] = {role: {} for role in STAFF_ROLES}
+        self._release_clauses: Dict[int, str] = {}
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def _changed(self) -> None:
+        self.version += 1
+        for callback in self._listeners:
+            callback()
+
+    # LOADING / SAVING
+    def load(self) -> None:
+        source = self._newest_snapshot()
+        team_data, self._players = source.read()
+        self._teams = teams_from_json(team_data)
+        self._rebuild_indexes()
+        print(f"Loaded {len(self._teams)} teams and {len(self._players)} registered players")
+
+        if source is not self.file_format:
+            print(f"Converting the {source.name} snapshot to {self.file_format.name} on the next save")
+            self._upgrade_pending = True
+            self._changed()
+        elif team_data and team_data.get("format") != TEAM_DATA_FORMAT:
+            print(f"Upgrading {self.team_path} to format {TEAM_DATA_FORMAT} on the next save")
+            self._upgrade_pending = True
+            self._changed()
+
+        if self.journal is not None:
+            replayed = 0
+            for record in self.journal.read_records():
+                self._apply(record)
+                replayed += 1
+            if replayed:
+                print(f"Replayed {replayed} journal records")
+                # Fold the replayed tail into a fresh snapshot on the next flush
+                self._changed()
+            self.journal.open()
+
+    def _rebuild_indexes(self) -> None:
+        self._player_teams = {}
+        self._staff_teams = {role: {} for role in STAFF_ROLES}
+        self._release_clauses = {}
+        for team_name, team in self._teams.items():
+            for entry in team:
+                self._player_teams.setdefault(entry.player_id, set()).add(team_name)
+                if entry.release_clause:
+                    self._release_clauses[entry.player_id] = team_name
+            for role in STAFF_ROLES:
+                member_id = team.get_staff(role)
+                if member_id:
+                    self._staff_teams[role].setdefault(member_id, set()).add(team_name)
+
+    def _newest_snapshot(self):
+        """The format whose snapshot on disk was written last; the journal continues from it."""
+        others = (JsonFormat(self.team_path, self.players_path),
+                  BinaryFormat(os.path.join(os.path.dirname(self.team_path), SNAPSHOT_FILE)))
+        candidates = [self.file_format] + [fmt for fmt in others if type(fmt) is not type(self.file_format)]
+        on_disk = [fmt for fmt in candidates if fmt.exists()]
+        return max(on_disk, key=lambda fmt: fmt.mtime()) if on_disk else self.file_format
+
+    def snapshot(self) -> LeagueData:
+        """Both files' contents, copied so they can be encoded off the event loop."""
+        return (teams_to_json(self._teams),
+                {player_id: dict(player) for player_id, player in self._players.items()})
+
+    def serialize(self) -> List[Tuple[str, bytes]]:
+        """Snapshot the league as ``(path, bytes)`` pairs ready to be written."""
+        return self.file_format.encode(self.snapshot())
+
+    def _snapshot_due(self) -> bool:
+        journal = self.journal
+        if self._upgrade_pending:
+            return True
+        if not journal.records_since_snapshot:
+            return False
+        return (journal.records_since_snapshot >= self.compact_every
+                or time.monotonic() - journal.last_snapshot >= self.snapshot_interval)
+
+    def prepare_flush(self) -> List[Callable[[], None]]:
+        """Return the blocking jobs needed to persist the current state.
+
+        Runs on the event loop so the snapshot is consistent, but only copies
+        the data; encoding, writing and fsyncing are left to the jobs, which
+        are meant for an executor thread.
+        """
+        if self.journal is None:
+            self._upgrade_pending = False
+            return [partial(self.file_format.write, self.snapshot())]
+
+        if not self._snapshot_due():
+            return [self.journal.sync]
+
+        self._upgrade_pending = False
+        self.journal.rotate()
+        jobs = [self.journal.sync, self.journal.sync_rotated]
+        jobs.append(partial(self.file_format.write, self.snapshot()))
+        jobs.append(self.journal.archive_rotated)
+        return jobs
+
+    def read(self, fn: Callable[..., T], *args) -> T:
+        """Run ``fn(store, *args)``; the same call the SQLite store runs on the storage thread."""
+        return fn(self, *args)
+
+    def save(self) -> None:
+        self._upgrade_pending = False
+        self.file_format.write(self.snapshot())
+        if self.journal is not None:
+            self.journal.rotate()
+            self.journal.move_rotated()
+            self.journal.sync_rotated()
+            self.journal.archive_rotated()
+
+    # TEAM READS
+    def get_team(self, team_name: str) -> Optional[Team]:
+        return self._teams.get(team_name)
+
+    def has_team(self, team_name: str) -> bool:
+        return team_name in self._teams
+
+    def team_names(self) -> List[str]:
+        return list(self._teams)
+
+    def iter_teams(self) -> Iterator[Tuple[str, Team]]:
+        return iter(self._teams.items())
+
+    def team_for_staff(self, member_id: str, role: str) -> Optional[str]:
+        teams = self._staff_teams[role].get(member_id)
+        if not teams:
+            return None
+        return min(teams) if len(teams) > 1 else next(iter(teams))
+
+    def teams_for_staff(self, member_id: str, role: str) -> List[str]:
+        return sorted(self._staff_teams[role].get(member_id, ()))
+
+    def team_for_chairman(self, member_id: str) -> Optional[str]:
+        return self.team_for_staff(member_id, "chairman")
+
+    def teams_of_player(self, player_id: str) -> FrozenSet[str]:
+        return frozenset(self._player_teams.get(int(player_id), ()))
+
+    def team_of_player(self, player_id: str) -> Optional[str]:
+        teams = self._player_teams.get(int(player_id))
+        if not teams:
+            return None
+        # A player is on at most one roster unless the old data says otherwise
+        return min(teams) if len(teams) > 1 else next(iter(teams))
+
+    def release_clause_team(self, player_id: str) -> Optional[str]:
+        return self._release_clauses.get(int(player_id))
+
+    def release_clause_holders(self) -> FrozenSet[int]:
+        return frozenset(self._release_clauses)
+
+    def rostered_player_ids(self) -> FrozenSet[int]:
+        return frozenset(self._player_teams)
+
+    def expiring_contracts(self) -> List[Tuple[str, str]]:
+        """``(player_id, team_name)`` for every contract that ends when the season advances."""
+        expiring = []
+        for team_name, team in self._teams.items():
+            for entry in team:
+                left = seasons_after_season(entry.seasons)
+                if left is not None and left <= 0:
+                    expiring.append((str(entry.player_id), team_name))
+        return expiring
+
+    def roster_size(self, team_name: str) -> int:
+        return len(self._teams[team_name])
+
+    def is_on_team(self, player_id: str, team_name: str) -> bool:
+        return team_name in self._player_teams.get(int(player_id), ())
+
+    # PLAYER READS
+    def get_player(self, player_id: str) -> Optional[dict]:
+        return self._players.get(player_id)
+
+    def is_registered(self, player_id: str) -> bool:
+        return player_id in self._players
+
+    def iter_players(self) -> Iterator[Tuple[str, dict]]:
+        return iter(self._players.items())
+
+    def player_count(self) -> int:
+        return len(self._players)
+
+    # MUTATIONS
+    # Every public mutation builds one record and hands it to _commit(). The
+    # _apply_* handlers are also what journal replay runs, so they must only
+    # depend on the record and the current state.
+    def _commit(self, record: dict) -> None:
+        self._apply(record)
+        if self.journal is not None:
+            self.journal.append(record)
+        self._changed()
+
+    def _apply(self, record: dict) -> None:
+        getattr(self, "_apply_" + record["op"])(record)
+
+    def register_player(self, player_id: str, name: str) -> dict:
+        self._commit({"op": "register", "player": player_id, "name": name})
+        return self._players[player_id]
+
+    def _apply_register(self, record: dict) -> None:
+        player_id = record["player"]
+        self._players[player_id] = {
+            "name": record["name"],
+            "id": player_id,
+            "team": None,
+            "status": "free_agent",
+            "2c": False,
+            "rating": "N/A"
+        }
+
+    def unregister_player(self, player_id: str) -> bool:
+        if player_id not in self._players:
+            return False
+        self._commit({"op": "unregister", "player": player_id})
+        return True
+
+    def _apply_unregister(self, record: dict) -> None:
+        self._players.pop(record["player"], None)
+
+    def update_player(self, player_id: str, fields: dict) -> dict:
+        if player_id not in self._players:
+            raise KeyError(player_id)
+        self._commit({"op": "update_player", "player": player_id, "fields": dict(fields)})
+        return self._players[player_id]
+
+    def _apply_update_player(self, record: dict) -> None:
+        player = self._players.get(record["player"])
+        if player is not None:
+            player.update(record["fields"])
+
+    def sign_player(self, player_id: str, team_name: str, seasons, release_clause: bool = False,
+                    name: Optional[str] = None) -> None:
+        """Move a player onto ``team_name`` and mark them signed in the registry.
+
+        Any other roster spot is dropped. Unregistered players get a fresh
+        registry entry under ``name``.
+        """
+        if team_name not in self._teams:
+            raise KeyError(team_name)
+        self._commit({
+            "op": "sign",
+            "player": player_id,
+            "team": team_name,
+            "seasons": seasons,
+            "release_clause": release_clause,
+            "name": name
+        })
+
+    def _remove_from_team(self, player_id: int, team_name: str) -> None:
+        team = self._teams.get(team_name)
+        if team is not None:
+            team.remove(player_id)
+
+        teams = self._player_teams.get(player_id)
+        if teams is not None:
+            teams.discard(team_name)
+            if not teams:
+                del self._player_teams[player_id]
+        if self._release_clauses.get(player_id) == team_name:
+            del self._release_clauses[player_id]
+
+    def _place_on_team(self, player_id: int, team_name: str, seasons, release_clause: bool) -> None:
+        # Only the teams the index says they're on need touching
+        for tname in self.teams_of_player(player_id) - {team_name}:
+            self._remove_from_team(player_id, tname)
+
+        entry = self._teams[team_name].add(player_id, seasons, release_clause)
+        if entry.release_clause:
+            self._release_clauses[player_id] = team_name
+        elif self._release_clauses.get(player_id) == team_name:
+            del self._release_clauses[player_id]
+        self._player_teams.setdefault(player_id, set()).add(team_name)
+
+    def _apply_sign(self, record: dict) -> None:
+        player_id = record["player"]
+        team_name = record["team"]
+        self._place_on_team(int(player_id), team_name, record["seasons"], record["release_clause"])
+
+        player = self._players.get(player_id)
+        if player is None:
+            self._players[player_id] = {
+                "name": record["name"],
+                "id": player_id,
+                "team": team_name,
+                "status": "signed",
+                "2c": False,
+                "rating": "N/A"
+            }
+        else:
+            player["team"] = team_name
+            player["status"] = "signed"
+            if record["name"]:
+                player["name"] = record["name"]
+
+    def release_player(self, player_id: str, team_name: str) -> bool:
+        """Drop a player from ``team_name`` and mark them as a free agent."""
+        if not self.is_on_team(player_id, team_name):
+            return False
+        self._commit({"op": "release", "player": player_id, "team": team_name})
+        return True
+
+    def _apply_release(self, record: dict) -> None:
+        player_id = record["player"]
+        self._remove_from_team(int(player_id), record["team"])
+
+        if player_id in self._players:
+            self._players[player_id]["team"] = None
+            self._players[player_id]["status"] = "free_agent"
+
+    def apply_transfers(self, transfers) -> None:
+        """Apply many signs/releases as one journal record, so they land (and replay) together.
+
+        ``transfers`` are ``transfers.Transfer`` rows, already validated.
+        """
+        records = []
+        for transfer in transfers:
+            if transfer.team_name not in self._teams:
+                raise KeyError(transfer.team_name)
+            if transfer.action == "sign":
+                records.append({
+                    "op": "sign",
+                    "player": transfer.player_id,
+                    "team": transfer.team_name,
+                    "seasons": transfer.seasons,
+                    "release_clause": transfer.release_clause,
+                    "name": None
+                })
+            else:
+                records.append({"op": "release", "player": transfer.player_id, "team": transfer.team_name})
+        if records:
+            self._commit({"op": "batch", "records": records})
+
+    def _apply_batch(self, record: dict) -> None:
+        for item in record["records"]:
+            self._apply(item)
+
+    def advance_season(self) -> Tuple[int, List[Tuple[str, str]]]:
+        """Run every finite contract down by one season and release the players whose contract ends.
+
+        One journal record covers the whole league, however many contracts
+        change. It carries the resulting lengths rather than "one less", so
+        replaying it over a snapshot that already has it changes nothing.
+        Returns how many contracts ran down and the ``(player_id, team_name)``
+        releases.
+        """
+        contracts = []
+        released = []
+        for team_name, team in self._teams.items():
+            for entry in team:
+                left = seasons_after_season(entry.seasons)
+                if left is None:
+                    continue
+                contracts.append([str(entry.player_id), team_name, left])
+                if left <= 0:
+                    released.append([str(entry.player_id), team_name])
+        self._commit({"op": "advance_season", "contracts": contracts, "released": released})
+        return len(contracts), [(player_id, team_name) for player_id, team_name in released]
+
+    def _apply_advance_season(self, record: dict) -> None:
+        for player_id, team_name, seasons in record["contracts"]:
+            team = self._teams.get(team_name)
+            entry = team.roster.get(int(player_id)) if team is not None else None
+            if entry is not None:
+                entry.seasons = seasons
+        for player_id, team_name in record["released"]:
+            if self.is_on_team(player_id, team_name):
+                self._apply_release({"player": player_id, "team": team_name})
+
+    # STAFF MUTATIONS
+    def set_staff(self, team_name: str, role: str, member_id: Optional[str]) -> None:
+        if role not in STAFF_ROLES:
+            raise ValueError(f"Unknown staff role: {role}")
+        if team_name not in self._teams:
+            raise KeyError(team_name)
+        self._commit({"op": "staff", "team": team_name, "role": role, "member": member_id})
+
+    def clear_staff(self, team_name: str, role: str) -> Optional[str]:
+        previous = self._teams[team_name].get_staff(role)
+        self.set_staff(team_name, role, None)
+        return previous
+
+    def _set_staff_slot(self, team_name: str, role: str, member_id: Optional[str]) -> None:
+        team = self._teams[team_name]
+        index = self._staff_teams[role]
+        previous = team.get_staff(role)
+        if previous and previous in index:
+            index[previous].discard(team_name)
+            if not index[previous]:
+                del index[previous]
+        team.set_staff(role, member_id)
+        if member_id:
+            index.setdefault(member_id, set()).add(team_name)
+
+    def _apply_staff(self, record: dict) -> None:
+        self._set_staff_slot(record["team"], record["role"], record["member"])
+
+    def appoint_chairman(self, team_name: str, member_id: str, name: str) -> None:
+        """Make ``member_id`` chairman and manager, rostered for infinite seasons.
+
+        Raises ``ValueError`` if they're on another team's roster; release them first.
+        """
+        if team_name not in self._teams:
+            raise KeyError(team_name)
+        if self.teams_of_player(member_id) - {team_name}:
+            raise ValueError(f"{member_id} is on another team's roster")
+        self._commit({"op": "appoint_chairman", "team": team_name, "member": member_id, "name": name})
+
+    def _apply_appoint_chairman(self, record: dict) -> None:
+        team_name = record["team"]
+        member_id = record["member"]
+        self._set_staff_slot(team_name, "chairman", member_id)
+        self._set_staff_slot(team_name, "manager", member_id)
+        self._place_on_team(int(member_id), team_name, INFINITE_SEASONS, False)
+
+        if member_id not in self._players:
+            self._players[member_id] = {
+                "name": record["name"],
+                "team": team_name,
+                "seasons": INFINITE_SEASONS
+            }
+        else:
+            self._players[member_id]["team"] = team_name
+            self._players[member_id]["seasons"] = INFINITE_SEASONS
+
+    def dismiss_chairman(self, team_name: str) -> Optional[str]:
+        """Clear the chairman slot, take them off the roster and drop them from the registry."""
+        chairman_id = self._teams[team_name].chairman
+        if not chairman_id:
+            return None
+        self._commit({"op": "dismiss_chairman", "team": team_name, "member": chairman_id})
+        return chairman_id
+
+    def _apply_dismiss_chairman(self, record: dict) -> None:
+        if self._teams[record["team"]].chairman == record["member"]:
+            self._set_staff_slot(record["team"], "chairman", None)
+        self._remove_from_team(int(record["member"]), record["team"])
+        self._players.pop(record["member"], None)
@@ -0,0 +1,142 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+import nextcord
+
+# Discord's gateway member requests take at most this many user ids
+QUERY_BATCH = 100
+
+
+class MemberCache:
+    """Members looked up outside the gateway cache, kept for ``ttl`` seconds.
+
+    In lean gateway mode the library only holds the league members loaded by
+    ``load_into_guild()``; anyone else is fetched on demand and kept here,
+    least recently used first out once ``max_size`` is reached. Members who
+    aren't in the guild are remembered too, so a departed player doesn't
+    cost a request on every lookup.
+    """
+
+    def __init__(self, ttl: float = 60, max_size: int = 1000):
+        self.ttl = ttl
+        self.max_size = max_size
+        # member id -> (member or None, fetched at)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, member_id: int):
+        entry = self._entries.get(member_id)
+        if entry is None:
+            return False, None
+        if time.monotonic() - entry[1] > self.ttl:
+            del self._entries[member_id]
+            return False, None
+        self._entries.move_to_end(member_id)
+        return True, entry[0]
+
+    def put(self, member_id: int, member) -> None:
+        self._entries[member_id] = (member, time.monotonic())
+        self._entries.move_to_end(member_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, member_id: int) -> None:
+        self._entries.pop(member_id, None)
+
+    async def get(self, guild, member_id: int):
+        """The member from the gateway cache, this cache, or Discord; None if not in the guild."""
+        member_id = int(member_id)
+        member = guild.get_member(member_id)
+        if member is not None:
+            self.hits += 1
+            return member
+        found, member = self._lookup(member_id)
+        if found:
+            self.hits += 1
+            return member
+
+        self.misses += 1
+        self.fetches += 1
+        try:
+            member = await guild.fetch_member(member_id)
+        except nextcord.NotFound:
+            member = None
+        except nextcord.HTTPException as e:
+            # Don't remember transient failures
+            print(f"Failed to fetch member {member_id}: {e}")
+            return None
+        self.put(member_id, member)
+        return member
+
+    async def _query(self, guild, member_ids: List[int], cache: bool) -> Dict[int, object]:
+        found = {}
+        for start in range(0, len(member_ids), QUERY_BATCH):
+            batch = member_ids[start:start + QUERY_BATCH]
+            self.fetches += 1
+            for member in await guild.query_members(user_ids=batch, limit=len(batch), cache=cache):
+                found[member.id] = member
+        return found
+
+    async def get_many(self, guild, member_ids: Iterable[int]) -> Dict[int, object]:
+        """Resolve many members, asking Discord for the missing ones 100 at a time."""
+        members = {}
+        missing = []
+        for member_id in {int(m) for m in member_ids}:
+            member = guild.get_member(member_id)
+            if member is None:
+                found, member = self._lookup(member_id)
+                if not found:
+                    missing.append(member_id)
+                    continue
+            self.hits += 1
+            if member is not None:
+                members[member_id] = member
+
+        self.misses += len(missing)
+        if missing:
+            fetched = await self._query(guild, missing, cache=False)
+            for member_id in missing:
+                self.put(member_id, fetched.get(member_id))
+            members.update(fetched)
+        return members
+
+    async def load_into_guild(self, guild, member_ids: Iterable[int]) -> int:
+        """Pull league members into the library's own cache, so their updates reach us.
+
+        Returns how many were found.
+        """
+        missing = [member_id for member_id in {int(m) for m in member_ids}
+                   if guild.get_member(member_id) is None and not self._lookup(member_id)[0]]
+        if not missing:
+            return 0
+        found = await self._query(guild, missing, cache=True)
+        for member_id in missing:
+            if member_id not in found:
+                self.put(member_id, None)
+        return len(found)
+
+    async def role_holders(self, guild, role_ids: Iterable[int]) -> Dict[int, object]:
+        """Everyone in the guild holding any of ``role_ids``.
+
+        ``role.members`` only sees the gateway cache, which in lean mode is
+        just the loaded league members. Unless the guild is fully chunked,
+        the whole member list is requested from the gateway (without caching
+        it) and filtered.
+        """
+        role_ids = set(role_ids)
+        if guild.chunked:
+            members = guild.members
+        else:
+            self.fetches += 1
+            members = await guild.chunk(cache=False) or []
+        return {member.id: member for member in members
+                if any(role.id in role_ids for role in member.roles)}
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "fetches": self.fetches}
@@ -0,0 +1,213 @@
+import asyncio
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; the last bucket is +Inf
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Event-loop lag is mostly sub-millisecond; anything near a second is a stall
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus sense."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (``max`` past the last bound)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Metrics:
+    """Counters and histograms for commands, disk I/O and Discord HTTP calls.
+
+    Everything is recorded on the event loop, so nothing here is locked.
+    ``gauge()`` registers a callback read at export time, for values other
+    objects already keep (queue lengths, cache sizes).
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.commands: Dict[str, Histogram] = {}
+        self.command_errors: Dict[str, int] = {}
+        # (store, stage) -> histogram; stage is "load", "prepare" or "write"
+        self.io: Dict[Tuple[str, str], Histogram] = {}
+        # "METHOD /path/{template}" -> histogram, error count
+        self.http: Dict[str, Histogram] = {}
+        self.http_errors: Dict[str, int] = {}
+        # bucket -> times Discord told us to back off
+        self.rate_limits: Dict[str, int] = {}
+        self.global_rate_limits = 0
+        # How late the event loop woke up; see storage_io.LoopLagMonitor
+        self.loop_lag = Histogram(LAG_BUCKETS)
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    # RECORDING
+    def observe_command(self, name: str, seconds: float) -> None:
+        self.commands.setdefault(name, Histogram()).observe(seconds)
+
+    def command_failed(self, name: str) -> None:
+        self.command_errors[name] = self.command_errors.get(name, 0) + 1
+
+    def observe_io(self, store: str, stage: str, seconds: float) -> None:
+        self.io.setdefault((store, stage), Histogram()).observe(seconds)
+
+    @contextmanager
+    def time_io(self, store: str, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_io(store, stage, time.perf_counter() - started)
+
+    def flush_observer(self, store: str) -> Callable[[float, float], None]:
+        """An ``on_flush`` callback for a ``WriteBehindPersister``."""
+        def observe(prepare_seconds: float, write_seconds: float) -> None:
+            self.observe_io(store, "prepare", prepare_seconds)
+            self.observe_io(store, "write", write_seconds)
+        return observe
+
+    def observe_http(self, route: str, seconds: float, failed: bool = False) -> None:
+        self.http.setdefault(route, Histogram()).observe(seconds)
+        if failed:
+            self.http_errors[route] = self.http_errors.get(route, 0) + 1
+
+    def observe_loop_lag(self, seconds: float) -> None:
+        self.loop_lag.observe(seconds)
+
+    def rate_limited(self, bucket: Optional[str]) -> None:
+        bucket = bucket or "unknown"
+        self.rate_limits[bucket] = self.rate_limits.get(bucket, 0) + 1
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        self._gauges[name] = read
+
+    def instrument_http(self, http) -> None:
+        """Time every request made through a nextcord ``HTTPClient``, keyed by route template."""
+        request = http.request
+
+        async def timed_request(route, **kwargs):
+            started = time.perf_counter()
+            failed = False
+            try:
+                return await request(route, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self.observe_http(f"{route.method} {route.path}", time.perf_counter() - started, failed)
+
+        http.request = timed_request
+
+    # EXPORT
+    def gauges(self) -> Dict[str, float]:
+        values = {}
+        for name, read in self._gauges.items():
+            try:
+                values[name] = float(read())
+            except Exception:
+                continue
+        return values
+
+    def prometheus(self, prefix: str = "league_bot") -> str:
+        """The Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        def histogram(name: str, help_text: str, series: Dict[str, Tuple[dict, Histogram]]):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for labels, hist in series.values():
+                cumulative = 0
+                for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{prefix}_{name}_bucket{_labels(**labels, le=le)} {cumulative}")
+                lines.append(f"{prefix}_{name}_sum{_labels(**labels)} {hist.sum}")
+                lines.append(f"{prefix}_{name}_count{_labels(**labels)} {hist.count}")
+
+        def counter(name: str, help_text: str, series: Dict[str, Tuple[dict, int]]):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in series.values():
+                lines.append(f"{prefix}_{name}{_labels(**labels)} {value}")
+
+        histogram("command_seconds", "Slash command handler time, defer to last followup.",
+                  {name: ({"command": name}, h) for name, h in self.commands.items()})
+        counter("command_errors_total", "Slash commands that raised.",
+                {name: ({"command": name}, n) for name, n in self.command_errors.items()})
+        histogram("io_seconds", "Time spent loading and persisting league data.",
+                  {f"{s}/{t}": ({"store": s, "stage": t}, h) for (s, t), h in self.io.items()})
+        histogram("discord_http_seconds", "Discord HTTP request latency, including rate-limit retries.",
+                  {route: ({"route": route}, h) for route, h in self.http.items()})
+        counter("discord_http_errors_total", "Discord HTTP requests that raised.",
+                {route: ({"route": route}, n) for route, n in self.http_errors.items()})
+        counter("discord_rate_limits_total", "Rate-limit backoffs reported by Discord, per bucket.",
+                {bucket: ({"bucket": bucket}, n) for bucket, n in self.rate_limits.items()})
+        counter("discord_global_rate_limits_total", "Global rate-limit backoffs.",
+                {"": ({}, self.global_rate_limits)})
+        histogram("event_loop_lag_seconds", "How late the event loop woke from a timed sleep.",
+                  {"": ({}, self.loop_lag)})
+
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {time.monotonic() - self.started:.3f}")
+        for name, value in self.gauges().items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+async def serve_prometheus(metrics: Metrics, host: str = "127.0.0.1", port: int = 9108):
+    """Answer every HTTP request on ``host:port`` with ``metrics.prometheus()``."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # Request line and headers; the path doesn't matter
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass
+            body = metrics.prometheus().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
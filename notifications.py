@@ -0,0 +1,69 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+
+class DirectMessageQueue:
+    """Sends DMs from a few background workers, so commands never wait on them.
+
+    ``send()`` only queues the message. Workers look the member up with
+    ``resolve`` (normally the member cache) and send at most ``concurrency``
+    DMs at a time; Discord's own rate limits are left to the HTTP client.
+    Members who left or have DMs closed are counted as failed and skipped.
+    """
+
+    def __init__(self, resolve: Callable[[int], Awaitable[Optional[object]]], concurrency: int = 5):
+        self.resolve = resolve
+        self.concurrency = concurrency
+        self.sent = 0
+        self.failed = 0
+        # Created on first use so it binds to the bot's running loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+
+    def __len__(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def send(self, member_id: int, content: str) -> None:
+        self._ensure_queue().put_nowait((int(member_id), content))
+
+    def start(self) -> None:
+        queue = self._ensure_queue()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.get_running_loop().create_task(self._run(queue)))
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            member_id, content = await queue.get()
+            try:
+                member = await self.resolve(member_id)
+                if member is None:
+                    self.failed += 1
+                else:
+                    await member.send(content)
+                    self.sent += 1
+            except Exception:
+                self.failed += 1
+            finally:
+                queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until everything queued so far has been sent or given up on."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Stop the workers; DMs still queued are dropped."""
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
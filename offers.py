@@ -0,0 +1,200 @@
+import asyncio
+import heapq
+import json
+import time
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from persistence import write_json
+
+OFFERS_FILE = "offers.json"
+
+
+class Offer:
+    """A signing offer waiting on the player's answer."""
+
+    __slots__ = ("offer_id", "player_id", "team_name", "chairman_id", "seasons", "expires_at",
+                 "channel_id", "message_id")
+
+    def __init__(self, offer_id: str, player_id: str, team_name: str, chairman_id: str, seasons,
+                 expires_at: float, channel_id: Optional[int] = None, message_id: Optional[int] = None):
+        self.offer_id = offer_id
+        self.player_id = player_id
+        self.team_name = team_name
+        self.chairman_id = chairman_id
+        self.seasons = seasons
+        # Wall-clock seconds, so expiry survives a restart
+        self.expires_at = expires_at
+        # Where the offer DM lives, so its buttons can be taken down
+        self.channel_id = channel_id
+        self.message_id = message_id
+
+    def to_json(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Offer":
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__})
+
+    def __repr__(self):
+        return f"Offer({self.offer_id}, {self.team_name!r} -> {self.player_id})"
+
+
+class OfferStore:
+    """Open signing offers, persisted so a restart doesn't drop them.
+
+    Offers are found by the DM they were sent in, since the buttons on it
+    carry fixed custom_ids. ``claim()`` removes an offer and returns it, so
+    only the first click (or the expiry) gets to act on it. Plugs into a
+    ``WriteBehindPersister`` like the league store does.
+    """
+
+    def __init__(self, path: str = OFFERS_FILE):
+        self.path = path
+        self._offers: Dict[str, Offer] = {}
+        self._by_message: Dict[int, str] = {}
+        # (expires_at, offer_id); claimed offers are skipped when they surface
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._next_id = 1
+        self._listeners: List[Callable[[], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._offers)
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def _changed(self) -> None:
+        for callback in self._listeners:
+            callback()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse {self.path}: {e}")
+            return
+        for item in data.get("offers", []):
+            self._index(Offer.from_json(item))
+        self._next_id = data.get("next_id", len(self._offers) + 1)
+        print(f"Loaded {len(self._offers)} open offers")
+
+    def _snapshot(self) -> dict:
+        return {"next_id": self._next_id, "offers": [offer.to_json() for offer in self._offers.values()]}
+
+    def serialize(self) -> bytes:
+        return json.dumps(self._snapshot(), separators=(",", ":")).encode("utf-8")
+
+    def prepare_flush(self) -> List[Callable[[], None]]:
+        # Copy on the event loop; encode and write on the executor
+        return [partial(write_json, self.path, self._snapshot())]
+
+    def _index(self, offer: Offer) -> None:
+        self._offers[offer.offer_id] = offer
+        if offer.message_id is not None:
+            self._by_message[offer.message_id] = offer.offer_id
+        heapq.heappush(self._expiry_heap, (offer.expires_at, offer.offer_id))
+
+    def create(self, player_id: str, team_name: str, chairman_id: str, seasons, ttl: float,
+               channel_id: Optional[int] = None, message_id: Optional[int] = None) -> Offer:
+        offer = Offer(str(self._next_id), str(player_id), team_name, str(chairman_id), seasons,
+                      time.time() + ttl, channel_id, message_id)
+        self._next_id += 1
+        self._index(offer)
+        self._changed()
+        return offer
+
+    def get(self, offer_id: str) -> Optional[Offer]:
+        return self._offers.get(offer_id)
+
+    def for_message(self, message_id: int) -> Optional[Offer]:
+        offer_id = self._by_message.get(message_id)
+        return self._offers.get(offer_id) if offer_id else None
+
+    def claim(self, offer_id: str) -> Optional[Offer]:
+        offer = self._offers.pop(offer_id, None)
+        if offer is not None:
+            self._by_message.pop(offer.message_id, None)
+            self._changed()
+        return offer
+
+    def next_expiry(self) -> Optional[float]:
+        heap = self._expiry_heap
+        while heap and heap[0][1] not in self._offers:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_expired(self, now: float) -> List[Offer]:
+        """Claim every offer that expires at or before ``now``."""
+        expired = []
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            _, offer_id = heapq.heappop(heap)
+            offer = self._offers.pop(offer_id, None)
+            if offer is not None:
+                self._by_message.pop(offer.message_id, None)
+                expired.append(offer)
+        if expired:
+            self._changed()
+        return expired
+
+
+class OfferExpiryTimer:
+    """One task that expires offers off the store's heap, instead of a timer per offer.
+
+    It sleeps until the earliest expiry and then hands ``on_expired`` every
+    offer due within ``granularity`` seconds as one batch. New offers wake it
+    through the store's listener hook.
+    """
+
+    def __init__(self, offers: OfferStore, on_expired: Callable[[List[Offer]], Awaitable[None]],
+                 granularity: float = 1.0):
+        self.offers = offers
+        self.on_expired = on_expired
+        self.granularity = granularity
+        self.expired_count = 0
+        # Created on first use so it binds to the bot's running loop
+        self._wakeup = None
+        self._task = None
+        offers.add_listener(self.wake)
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            expires_at = self.offers.next_expiry()
+            delay = None if expires_at is None else expires_at - time.time()
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self.offers.pop_expired(time.time() + self.granularity)
+            self.expired_count += len(batch)
+            try:
+                await self.on_expired(batch)
+            except Exception as e:
+                print(f"Failed to expire offers: {e}")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
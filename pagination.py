@@ -0,0 +1,86 @@
+from typing import Callable, Optional, Sequence
+
+import nextcord
+from nextcord import Interaction
+from nextcord.ui import Button, Modal, TextInput, View
+
+
+class JumpToPageModal(Modal):
+    def __init__(self, view: "PaginatedView"):
+        super().__init__(title="Jump to page")
+        self.view = view
+        self.page = TextInput(label=f"Page (1-{view.page_count})", min_length=1, max_length=6)
+        self.add_item(self.page)
+
+    async def callback(self, interaction: Interaction):
+        try:
+            page = int(self.page.value) - 1
+        except ValueError:
+            await interaction.response.send_message("❌ Not a page number", ephemeral=True)
+            return
+        await self.view.show(interaction, page)
+
+
+class PaginatedView(View):
+    """One message that pages through ``entries`` with prev/next/jump buttons.
+
+    ``entries`` is a snapshot taken when the command ran; only the page on
+    screen is rendered, by ``render(page_entries, start_index, page, page_count)``.
+    Only the member who ran the command can turn the pages.
+    """
+
+    def __init__(self, entries: Sequence, render: Callable[..., nextcord.Embed],
+                 author_id: Optional[int] = None, page_size: int = 10, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.entries = entries
+        self.render = render
+        self.author_id = author_id
+        self.page_size = page_size
+        self.page = 0
+        self._update_buttons()
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.entries) // self.page_size))
+
+    def current_embed(self) -> nextcord.Embed:
+        start = self.page * self.page_size
+        return self.render(self.entries[start:start + self.page_size], start, self.page, self.page_count)
+
+    def _update_buttons(self) -> None:
+        last = self.page_count - 1
+        self.first_page.disabled = self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.last_page.disabled = self.page >= last
+        self.jump.label = f"{self.page + 1}/{self.page_count}"
+        self.jump.disabled = last == 0
+
+    async def show(self, interaction: Interaction, page: int) -> None:
+        self.page = min(max(page, 0), self.page_count - 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.current_embed(), view=self)
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        if self.author_id is not None and interaction.user.id != self.author_id:
+            await interaction.response.send_message("🚫 Run the command yourself to browse", ephemeral=True)
+            return False
+        return True
+
+    @nextcord.ui.button(label="⏮", style=nextcord.ButtonStyle.grey)
+    async def first_page(self, button: Button, interaction: Interaction):
+        await self.show(interaction, 0)
+
+    @nextcord.ui.button(label="◀", style=nextcord.ButtonStyle.blurple)
+    async def previous_page(self, button: Button, interaction: Interaction):
+        await self.show(interaction, self.page - 1)
+
+    @nextcord.ui.button(label="1/1", style=nextcord.ButtonStyle.grey)
+    async def jump(self, button: Button, interaction: Interaction):
+        await interaction.response.send_modal(JumpToPageModal(self))
+
+    @nextcord.ui.button(label="▶", style=nextcord.ButtonStyle.blurple)
+    async def next_page(self, button: Button, interaction: Interaction):
+        await self.show(interaction, self.page + 1)
+
+    @nextcord.ui.button(label="⏭", style=nextcord.ButtonStyle.grey)
+    async def last_page(self, button: Button, interaction: Interaction):
+        await self.show(interaction, self.page_count - 1)
@@ -0,0 +1,101 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from nextcord import ApplicationCheckFailure, Interaction
+from nextcord.ext import application_checks
+
+from roster import STAFF_ROLES
+
+ADMIN = "admin"
+EXEC = "exec"
+# Staff capabilities come in two forms: "chairman" (of some team) and
+# "chairman:<team>" for the team itself; same for the other staff roles
+CHAIRMAN, MANAGER, ASSISTANT_MANAGER = STAFF_ROLES
+
+
+def staff_of(role: str, team_name: str) -> str:
+    return f"{role}:{team_name}"
+
+
+def chairman_of(team_name: str) -> str:
+    return staff_of(CHAIRMAN, team_name)
+
+
+class PermissionDenied(ApplicationCheckFailure):
+    """Raised by ``requires`` checks; the message is what the user is shown."""
+
+    def __init__(self, message: str = "🚫 Permission denied"):
+        super().__init__(message)
+        self.message = message
+
+
+class PermissionCache:
+    """Capability sets per member: Discord roles read live, staff slots cached.
+
+    Admin and exec come from the member's roles on every check, since role
+    updates aren't delivered for members outside the gateway cache and a
+    demoted exec must lose access straight away. Staff capabilities
+    (chairman/manager/assistant of a team) come from the league store and
+    are cached until ``invalidate()`` or ``invalidate_team()``.
+    """
+
+    def __init__(self, store, admin_role_ids: Iterable[int], exec_role_ids: Iterable[int]):
+        self.store = store
+        self.admin_role_ids = frozenset(admin_role_ids)
+        self.exec_role_ids = frozenset(exec_role_ids)
+        # member id -> staff capabilities
+        self._caps: Dict[int, FrozenSet[str]] = {}
+        # team -> members whose cached capabilities mention it
+        self._team_members: Dict[str, Set[int]] = {}
+
+    def _role_caps(self, member) -> Set[str]:
+        caps = set()
+        role_ids = {role.id for role in getattr(member, "roles", ())}
+        if not role_ids.isdisjoint(self.admin_role_ids):
+            caps.add(ADMIN)
+        if not role_ids.isdisjoint(self.exec_role_ids):
+            caps.add(EXEC)
+        return caps
+
+    def _staff_caps(self, member_id: int) -> FrozenSet[str]:
+        caps = set()
+        for role in STAFF_ROLES:
+            for team_name in self.store.teams_for_staff(str(member_id), role):
+                caps.add(role)
+                caps.add(staff_of(role, team_name))
+                self._team_members.setdefault(team_name, set()).add(member_id)
+        return frozenset(caps)
+
+    def capabilities(self, member) -> FrozenSet[str]:
+        staff = self._caps.get(member.id)
+        if staff is None:
+            staff = self._caps[member.id] = self._staff_caps(member.id)
+        role_caps = self._role_caps(member)
+        return staff | role_caps if role_caps else staff
+
+    def has_any(self, member, *caps: str) -> bool:
+        return not self.capabilities(member).isdisjoint(caps)
+
+    def staff_teams(self, member, role: str = CHAIRMAN) -> List[str]:
+        """Every team ``member`` holds ``role`` on, by name."""
+        prefix = role + ":"
+        return sorted(cap[len(prefix):] for cap in self.capabilities(member) if cap.startswith(prefix))
+
+    def invalidate(self, member_id: Optional[int] = None) -> None:
+        if member_id is None:
+            self._caps.clear()
+            self._team_members.clear()
+        else:
+            self._caps.pop(int(member_id), None)
+
+    def invalidate_team(self, team_name: str, *member_ids) -> None:
+        """Forget everyone holding or gaining a staff slot on ``team_name``."""
+        for member_id in self._team_members.pop(team_name, set()) | {int(m) for m in member_ids if m}:
+            self._caps.pop(member_id, None)
+
+    def requires(self, *caps: str, message: str = "🚫 Permission denied"):
+        """Slash command check: the caller needs at least one of ``caps``."""
+        async def predicate(interaction: Interaction) -> bool:
+            if self.has_any(interaction.user, *caps):
+                return True
+            raise PermissionDenied(message)
+        return application_checks.check(predicate)
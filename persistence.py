@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Optional
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write ``data`` to a temp file next to ``path`` and swap it in with ``os.replace``.
+
+    A crash part-way through leaves the previous file untouched instead of a
+    truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path: str, data, indent: Optional[int] = None) -> None:
+    """Encode ``data`` and ``atomic_write`` it; meant to run off the event loop."""
+    separators = None if indent else (",", ":")
+    atomic_write(path, json.dumps(data, indent=indent, separators=separators).encode("utf-8"))
+
+
+def _run_jobs(jobs) -> None:
+    for job in jobs:
+        job()
+
+
+class WriteBehindPersister:
+    """Coalesces store mutations into at most one background flush per interval.
+
+    Mutations only call ``mark_dirty()``; the flush task asks the store for its
+    flush jobs on the event loop (so the snapshot is consistent) and runs the
+    blocking part of them, encoding included, on ``io`` (a ``StorageIO``) or
+    the default executor. ``on_flush`` is told how long each part took, in
+    seconds.
+    """
+
+    def __init__(self, store, interval_ms: int = 500,
+                 on_flush: Optional[Callable[[float, float], None]] = None, io=None):
+        self.store = store
+        self.interval = interval_ms / 1000
+        self.on_flush = on_flush
+        self.io = io
+        self.flush_count = 0
+        self._dirty = False
+        # Created on first use so they bind to the bot's running loop
+        self._wakeup = None
+        self._flush_lock = None
+        self._last_flush = 0.0
+        self._task = None
+        store.add_listener(self.mark_dirty)
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_primitives(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            if self._dirty:
+                self._wakeup.set()
+
+    def start(self) -> None:
+        self._ensure_primitives()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            delay = self._last_flush + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.flush()
+
+    async def flush(self) -> None:
+        self._ensure_primitives()
+        async with self._flush_lock:
+            self._wakeup.clear()
+            if not self._dirty:
+                return
+            self._dirty = False
+            try:
+                started = time.perf_counter()
+                jobs = self.store.prepare_flush()
+                prepared = time.perf_counter()
+                if self.io is not None:
+                    await self.io.run(_run_jobs, jobs)
+                else:
+                    await asyncio.get_running_loop().run_in_executor(None, _run_jobs, jobs)
+                self.flush_count += 1
+                if self.on_flush is not None:
+                    self.on_flush(prepared - started, time.perf_counter() - prepared)
+            except Exception as e:
+                print(f"Failed to save league data: {e}")
+                # Keep the changes pending so the next window retries them
+                self.mark_dirty()
+            self._last_flush = time.monotonic()
+
+    def flush_now(self) -> None:
+        """Synchronous final flush for shutdown paths where the loop is gone."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        _run_jobs(self.store.prepare_flush())
+        self.flush_count += 1
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
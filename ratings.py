@@ -0,0 +1,115 @@
+import math
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+UNRATED = "N/A"
+
+# Letter grades sit on the same 0-100 scale as numeric ratings;
+# a trailing + or - moves the grade by GRADE_STEP
+LETTER_GRADES = {"S": 95, "A": 85, "B": 75, "C": 65, "D": 55, "E": 45, "F": 35}
+GRADE_STEP = 3
+MAX_RATING = 100
+
+
+def normalize_rating(raw) -> Optional[int]:
+    """Map "80", "80.5", "S", "a+" and the like onto 0-100; None if unrated.
+
+    Raises ValueError for anything that isn't a rating.
+    """
+    if raw is None or isinstance(raw, bool):
+        return None
+    if isinstance(raw, (int, float)):
+        if not math.isfinite(raw):
+            raise ValueError(f"Rating out of range 0-{MAX_RATING}: {raw}")
+        value = round(raw)
+    else:
+        text = str(raw).strip().upper()
+        if not text or text == UNRATED:
+            return None
+        if text[0] in LETTER_GRADES and len(text) <= 2:
+            value = LETTER_GRADES[text[0]]
+            if text[1:] == "+":
+                value += GRADE_STEP
+            elif text[1:] == "-":
+                value -= GRADE_STEP
+            elif text[1:]:
+                raise ValueError(f"Unknown grade: {raw}")
+        else:
+            number = float(text)
+            # "inf", "1e999" and "nan" all parse; none of them is a rating
+            if not math.isfinite(number):
+                raise ValueError(f"Rating out of range 0-{MAX_RATING}: {raw}")
+            value = round(number)
+    if not 0 <= value <= MAX_RATING:
+        raise ValueError(f"Rating out of range 0-{MAX_RATING}: {raw}")
+    return value
+
+
+def grade_for(value: int) -> str:
+    for letter, floor in LETTER_GRADES.items():
+        if value >= floor - 5:
+            return letter
+    return "F"
+
+
+def format_rating(raw) -> str:
+    try:
+        value = normalize_rating(raw)
+    except ValueError:
+        return str(raw)
+    return UNRATED if value is None else f"{value} ({grade_for(value)})"
+
+
+class RatingIndex:
+    """Rated players kept sorted best-first with ``bisect``.
+
+    Entries are ``(-rating, name key, player id)`` so ties fall back to the
+    player's name. ``update()`` and ``remove()`` keep the order without
+    re-sorting; ``rebuild()`` is only needed at startup.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[int, str, str]] = []
+        self._by_player: Dict[str, Tuple[int, str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, store) -> None:
+        self._entries = []
+        self._by_player = {}
+        for player_id, player in store.iter_players():
+            try:
+                rating = normalize_rating(player.get("rating"))
+            except ValueError:
+                print(f"Ignoring unreadable rating {player.get('rating')!r} for {player_id}")
+                continue
+            if rating is not None:
+                entry = (-rating, (player.get("name") or "").casefold(), player_id)
+                self._entries.append(entry)
+                self._by_player[player_id] = entry
+        self._entries.sort()
+
+    def remove(self, player_id: str) -> None:
+        entry = self._by_player.pop(player_id, None)
+        if entry is not None:
+            del self._entries[bisect_left(self._entries, entry)]
+
+    def update(self, player_id: str, rating: Optional[int], name: str) -> None:
+        self.remove(player_id)
+        if rating is not None:
+            entry = (-rating, (name or "").casefold(), player_id)
+            insort(self._entries, entry)
+            self._by_player[player_id] = entry
+
+    def rank_of(self, player_id: str) -> Optional[int]:
+        entry = self._by_player.get(player_id)
+        return None if entry is None else bisect_left(self._entries, entry) + 1
+
+    def ranked(self, player_ids: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, int]]:
+        """``(player id, rating)`` pairs, best first; only those of ``player_ids`` if given."""
+        entries = self._entries if player_ids is None else sorted(
+            self._by_player[player_id] for player_id in player_ids if player_id in self._by_player
+        )
+        for negative_rating, _, player_id in entries:
+            yield player_id, -negative_rating
@@ -0,0 +1,537 @@
+import asyncio
+import json
+import time
+from functools import partial
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from persistence import atomic_write
+
+ROLE_STATE_FILE = "role_state.json"
+
+# Discord buckets member edits per guild (the route's major parameter)
+MEMBER_EDIT_ROUTE = "PATCH /guilds/{guild_id}/members/{{user_id}}"
+
+
+class RateLimiter:
+    """Token bucket per route key.
+
+    ``acquire(route)`` waits until the bucket for ``route`` has a token, so
+    callers pace themselves below Discord's limits instead of running into
+    429s and the library's retry sleeps.
+    """
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        # route -> [tokens, last refill]
+        self._buckets: Dict[str, list] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # How often, and for how long in total, callers had to wait for a token
+        self.waits = 0
+        self.waited = 0.0
+
+    def _refill(self, bucket: list) -> None:
+        now = time.monotonic()
+        bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate / self.per)
+        bucket[1] = now
+
+    async def acquire(self, route: str) -> None:
+        lock = self._locks.setdefault(route, asyncio.Lock())
+        # One waiter per bucket at a time keeps the order fair
+        async with lock:
+            bucket = self._buckets.setdefault(route, [float(self.rate), time.monotonic()])
+            self._refill(bucket)
+            if bucket[0] < 1:
+                delay = (1 - bucket[0]) * self.per / self.rate
+                self.waits += 1
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill(bucket)
+            bucket[0] -= 1
+
+
+class RoleChange:
+    """Roles to add to and remove from one member."""
+
+    __slots__ = ("member", "add", "remove")
+
+    def __init__(self, member, add: list, remove: list):
+        self.member = member
+        self.add = add
+        self.remove = remove
+
+    def target_roles(self) -> list:
+        remove_ids = {role.id for role in self.remove}
+        # @everyone can't be sent back to Discord in a role list
+        roles = [r for r in self.member.roles if r.id not in remove_ids and not r.is_default()]
+        roles.extend(r for r in self.add if r not in roles)
+        return roles
+
+
+class ReconcileReport:
+    def __init__(self):
+        self.checked: Set[int] = set()
+        self.missing: Set[int] = set()
+        self.planned = 0
+        self.applied = 0
+        self.roles_added = 0
+        self.roles_removed = 0
+        self.failures: List[Tuple[int, str]] = []
+        # Set when a league-wide pass couldn't see every role holder; it then can't clear drift
+        self.partial = False
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def members_checked(self) -> int:
+        return len(self.checked)
+
+    @property
+    def missing_members(self) -> int:
+        return len(self.missing)
+
+    @property
+    def failed_ids(self) -> Set[int]:
+        return {member_id for member_id, _ in self.failures}
+
+    @property
+    def done(self) -> int:
+        return self.applied + len(self.failures)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self) -> str:
+        return (f"{self.applied}/{self.planned} members updated "
+                f"(+{self.roles_added}/-{self.roles_removed} roles), "
+                f"{len(self.failures)} failed, {self.missing_members} not in guild, "
+                f"{self.members_checked} checked in {self.elapsed:.1f}s")
+
+
+def team_role_targets(store, teams=None) -> Tuple[Dict[int, Set[int]], Set[int]]:
+    """Desired team role per rostered player, plus the set of team role ids."""
+    desired: Dict[int, Set[int]] = {}
+    managed: Set[int] = set()
+    for _, team in (store.iter_teams() if teams is None else teams):
+        if not team.role_id:
+            continue
+        managed.add(team.role_id)
+        for player_id in team.roster:
+            desired.setdefault(player_id, set()).add(team.role_id)
+    return desired, managed
+
+
+def league_role_targets(store, free_agent_role_id: int, chairman_role_id: int,
+                        assistant_role_id: int) -> Tuple[Dict[int, Set[int]], Set[int]]:
+    """Every role the league data implies: team, free-agent and staff roles.
+
+    Registered players on no roster are free agents. Chairmen and managers
+    share one role; assistant managers have their own. Reads the store in
+    a few whole-league passes, never once per player.
+    """
+    teams = list(store.iter_teams())
+    desired, managed = team_role_targets(store, teams)
+    managed |= {free_agent_role_id, chairman_role_id, assistant_role_id}
+    rostered = store.rostered_player_ids()
+    for player_id, _ in store.iter_players():
+        if int(player_id) not in rostered:
+            desired.setdefault(int(player_id), set()).add(free_agent_role_id)
+    for _, team in teams:
+        for member_id, role_id in ((team.chairman, chairman_role_id), (team.manager, chairman_role_id),
+                                   (team.assistant_manager, assistant_role_id)):
+            if member_id:
+                desired.setdefault(int(member_id), set()).add(role_id)
+    return desired, managed
+
+
+class RoleState:
+    """The managed roles last applied to each member, persisted between runs.
+
+    Comparing it with what the league data wants gives the members whose
+    roles need another look, so a restart with no changes makes no calls.
+    ``changed_members()`` returns None, meaning "scan everyone", when there is
+    no usable state: first run, a different set of managed roles, or drift
+    reported by ``check()``. Plugs into a ``WriteBehindPersister`` like the
+    league store does.
+    """
+
+    def __init__(self, path: str = ROLE_STATE_FILE):
+        self.path = path
+        self.members: Dict[int, FrozenSet[int]] = {}
+        self.managed: FrozenSet[int] = frozenset()
+        self.drift = True
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def _changed(self) -> None:
+        for callback in self._listeners:
+            callback()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse {self.path}: {e}")
+            return
+        self.managed = frozenset(data.get("managed", []))
+        self.members = {int(member_id): frozenset(roles) for member_id, roles in data.get("members", {}).items()}
+        self.drift = data.get("drift", False)
+
+    def _snapshot(self) -> tuple:
+        # Role sets are frozen, so a shallow copy is a consistent snapshot
+        return sorted(self.managed), self.drift, dict(self.members)
+
+    @staticmethod
+    def _encode(snapshot: tuple) -> bytes:
+        managed, drift, members = snapshot
+        return json.dumps({
+            "managed": managed,
+            "drift": drift,
+            "members": {str(member_id): sorted(roles) for member_id, roles in members.items()}
+        }, separators=(",", ":")).encode("utf-8")
+
+    def _write(self, snapshot: tuple) -> None:
+        atomic_write(self.path, self._encode(snapshot))
+
+    def serialize(self) -> bytes:
+        return self._encode(self._snapshot())
+
+    def prepare_flush(self) -> List[Callable[[], None]]:
+        # Copy on the event loop; encode and write on the executor
+        return [partial(self._write, self._snapshot())]
+
+    def changed_members(self, desired: Dict[int, Set[int]], managed: Iterable[int]) -> Optional[Set[int]]:
+        if self.drift or frozenset(managed) != self.managed:
+            return None
+        changed = {member_id for member_id, roles in desired.items()
+                   if self.members.get(member_id, frozenset()) != roles}
+        changed |= {member_id for member_id, roles in self.members.items()
+                    if roles and member_id not in desired}
+        return changed
+
+    def commit(self, desired: Dict[int, Set[int]], managed: Iterable[int], report: ReconcileReport,
+               full: bool) -> None:
+        """Record the outcome of a reconciliation over ``report.checked``."""
+        full = full and not report.partial
+        if full:
+            self.members = {}
+            self.managed = frozenset(managed)
+            self.drift = False
+        unresolved = report.missing | report.failed_ids
+        for member_id in report.checked | report.missing:
+            roles = frozenset(desired.get(member_id, ()))
+            if member_id in unresolved or not roles:
+                # Left out so the next delta looks at them again
+                self.members.pop(member_id, None)
+            else:
+                self.members[member_id] = roles
+        self._changed()
+
+    def record(self, member_id: int, role_ids: Iterable[int]) -> None:
+        """Note roles applied outside a reconciliation, e.g. by a command."""
+        roles = frozenset(role_ids) & self.managed
+        if self.members.get(member_id, frozenset()) == roles:
+            return
+        if roles:
+            self.members[member_id] = roles
+        else:
+            self.members.pop(member_id, None)
+        self._changed()
+
+    def check(self, member_id: int, role_ids: Iterable[int]) -> bool:
+        """False (and a full scan next time) if a member's roles no longer match."""
+        if self.drift or not self.managed:
+            return True
+        if frozenset(role_ids) & self.managed == self.members.get(member_id, frozenset()):
+            return True
+        self.drift = True
+        self._changed()
+        return False
+
+
+class RoleReconciler:
+    """Computes the whole desired-vs-actual role diff, then applies it.
+
+    Only roles in ``managed`` are touched. Each member who needs changes
+    gets a single ``member.edit(roles=...)``; at most ``concurrency`` edits
+    are in flight and every edit waits for a token from the guild's
+    member-edit bucket.
+
+    With a ``member_cache``, members the gateway cache doesn't hold are
+    fetched in batches before planning instead of being reported missing.
+    """
+
+    def __init__(self, limiter: RateLimiter, concurrency: int = 5,
+                 on_applied: Optional[Callable[[int, Set[int]], None]] = None, member_cache=None):
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.on_applied = on_applied
+        self.member_cache = member_cache
+
+    @staticmethod
+    def plan(guild, desired: Dict[int, Set[int]], managed: Iterable[int],
+             report: Optional[ReconcileReport] = None,
+             member_ids: Optional[Iterable[int]] = None,
+             fetched: Optional[Dict[int, object]] = None) -> List[RoleChange]:
+        """Diff ``member_ids``, or everyone involved with a managed role if None.
+
+        ``fetched`` holds members looked up outside the gateway cache.
+        """
+        managed = set(managed)
+        report = report if report is not None else ReconcileReport()
+        roles = {role_id: guild.get_role(role_id) for role_id in managed}
+        fetched = fetched or {}
+
+        members = {}
+        for member_id in (desired if member_ids is None else member_ids):
+            member = guild.get_member(member_id) or fetched.get(member_id)
+            if member is None:
+                report.missing.add(member_id)
+            else:
+                members[member.id] = member
+        if member_ids is None:
+            # Plus everyone currently holding a managed role
+            for role in roles.values():
+                if role is not None:
+                    for member in role.members:
+                        members.setdefault(member.id, member)
+
+        changes = []
+        for member in members.values():
+            report.checked.add(member.id)
+            want = desired.get(member.id, set())
+            have = {role.id for role in member.roles if role.id in managed}
+            add = [roles[rid] for rid in want - have if roles.get(rid) is not None]
+            remove = [roles[rid] for rid in have - want if roles.get(rid) is not None]
+            if add or remove:
+                changes.append(RoleChange(member, add, remove))
+        report.planned += len(changes)
+        return changes
+
+    async def apply(self, guild, changes: List[RoleChange], report: Optional[ReconcileReport] = None,
+                    progress: Optional[Callable[[ReconcileReport], None]] = None,
+                    reason: str = "Team sync") -> ReconcileReport:
+        report = report if report is not None else ReconcileReport()
+        route = MEMBER_EDIT_ROUTE.format(guild_id=guild.id)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def apply_one(change: RoleChange):
+            async with semaphore:
+                await self.limiter.acquire(route)
+                roles = change.target_roles()
+                if self.on_applied is not None:
+                    self.on_applied(change.member.id, {role.id for role in roles})
+                try:
+                    await change.member.edit(roles=roles, reason=reason)
+                except Exception as e:
+                    if self.on_applied is not None:
+                        self.on_applied(change.member.id, {role.id for role in change.member.roles})
+                    report.failures.append((change.member.id, str(e)))
+                else:
+                    if self.member_cache is not None:
+                        # The fetched copy still has the old roles
+                        self.member_cache.discard(change.member.id)
+                    report.applied += 1
+                    report.roles_added += len(change.add)
+                    report.roles_removed += len(change.remove)
+            if progress is not None:
+                progress(report)
+
+        await asyncio.gather(*(apply_one(change) for change in changes))
+        report.finished = time.monotonic()
+        return report
+
+    async def reconcile_groups(self, guild, desired: Dict[int, Set[int]], managed: Iterable[int],
+                               groups: Dict[str, Iterable[int]], report: Optional[ReconcileReport] = None,
+                               progress: Optional[Callable[[ReconcileReport], None]] = None,
+                               reason: str = "Role reconciliation",
+                               fetched: Optional[Dict[int, object]] = None) -> Dict[str, List[Tuple[int, str]]]:
+        """Reconcile disjoint groups of members side by side; returns failures per group.
+
+        All groups share the rate limiter, so running them in parallel only
+        overlaps the waiting, never exceeds the budget. ``fetched`` holds
+        members already looked up, e.g. by ``fetch_role_holders()``.
+        """
+        report = report if report is not None else ReconcileReport()
+        fetched = dict(fetched or {})
+        fetched.update(await self.fetch_members(
+            guild, [m for member_ids in groups.values() for m in member_ids if m not in fetched]
+        ))
+        planned = {name: self.plan(guild, desired, managed, report, member_ids, fetched)
+                   for name, member_ids in groups.items()}
+        await asyncio.gather(*(self.apply(guild, changes, report, progress, reason)
+                               for changes in planned.values()))
+
+        group_of = {change.member.id: name for name, changes in planned.items() for change in changes}
+        failures: Dict[str, List[Tuple[int, str]]] = {}
+        for member_id, error in report.failures:
+            failures.setdefault(group_of.get(member_id, ""), []).append((member_id, error))
+        return failures
+
+    async def reconcile(self, guild, desired: Dict[int, Set[int]], managed: Iterable[int],
+                        progress: Optional[Callable[[ReconcileReport], None]] = None,
+                        reason: str = "Team sync",
+                        member_ids: Optional[Iterable[int]] = None) -> ReconcileReport:
+        report = ReconcileReport()
+        fetched = {}
+        if member_ids is None:
+            holders = await self.fetch_role_holders(guild, managed)
+            if holders is None:
+                # Fall back to the gateway cache's role members
+                report.partial = True
+            else:
+                fetched = holders
+                member_ids = set(desired) | set(holders)
+        wanted = desired if member_ids is None else member_ids
+        fetched.update(await self.fetch_members(guild, [m for m in wanted if m not in fetched]))
+        changes = self.plan(guild, desired, managed, report, member_ids, fetched)
+        return await self.apply(guild, changes, report, progress, reason)
+
+    @staticmethod
+    def cached_role_holders(guild, managed: Iterable[int]) -> Dict[int, object]:
+        """Managed role holders the gateway cache knows about."""
+        return {member.id: member for role_id in managed
+                for member in getattr(guild.get_role(role_id), "members", ())}
+
+    async def fetch_role_holders(self, guild, managed: Iterable[int]) -> Optional[Dict[int, object]]:
+        """Everyone holding a managed role, cached or not; None if the member list couldn't be fetched."""
+        if self.member_cache is None:
+            return self.cached_role_holders(guild, managed)
+        try:
+            return await self.member_cache.role_holders(guild, managed)
+        except Exception as e:
+            print(f"Failed to fetch role holders: {e}")
+            return None
+
+    async def fetch_members(self, guild, member_ids: Iterable[int]) -> Dict[int, object]:
+        if self.member_cache is None:
+            return {}
+        missing = [member_id for member_id in member_ids if guild.get_member(member_id) is None]
+        if not missing:
+            return {}
+        try:
+            return await self.member_cache.get_many(guild, missing)
+        except Exception as e:
+            # Plan with what we have; the rest show up as missing
+            print(f"Failed to fetch members for role sync: {e}")
+            return {}
+
+
+class _PendingEdit:
+    __slots__ = ("member", "add", "remove", "reason", "futures")
+
+    def __init__(self, member):
+        self.member = member
+        self.add: Dict[int, object] = {}
+        self.remove: Dict[int, object] = {}
+        self.reason: Optional[str] = None
+        self.futures: List[asyncio.Future] = []
+
+
+class RoleMutationQueue:
+    """Merges role changes per member into one ``member.edit`` per flush window.
+
+    ``apply()`` records the roles to add and remove and returns a future that
+    resolves once the change has been sent: True if an edit went out, False
+    if the member already had the right roles. A later add cancels an earlier
+    remove of the same role and vice versa.
+
+    Until the gateway's member update arrives, the cached member still shows
+    the old roles, so the role list from each edit is remembered for
+    ``known_ttl`` seconds and used as the base for the next one.
+    """
+
+    def __init__(self, limiter: RateLimiter, window: float = 0.2, known_ttl: float = 5.0,
+                 on_applied: Optional[Callable[[int, Set[int]], None]] = None):
+        self.limiter = limiter
+        self.window = window
+        self.known_ttl = known_ttl
+        # Told the member's role ids whenever an edit goes out
+        self.on_applied = on_applied
+        self.requested = 0
+        self.edits = 0
+        self.skipped = 0
+        self._pending: Dict[int, _PendingEdit] = {}
+        self._known: Dict[int, Tuple[list, float]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def apply(self, member, add: Iterable = (), remove: Iterable = (),
+              reason: Optional[str] = None) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(member.id)
+        if pending is None:
+            pending = self._pending[member.id] = _PendingEdit(member)
+        for role in add:
+            if role is not None:
+                pending.remove.pop(role.id, None)
+                pending.add[role.id] = role
+        for role in remove:
+            if role is not None:
+                pending.add.pop(role.id, None)
+                pending.remove[role.id] = role
+        if reason:
+            pending.reason = reason
+
+        self.requested += 1
+        future = loop.create_future()
+        pending.futures.append(future)
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_later())
+        return future
+
+    def current_roles(self, member) -> list:
+        known = self._known.get(member.id)
+        if known is not None and time.monotonic() - known[1] < self.known_ttl:
+            return known[0]
+        return [role for role in member.roles if not role.is_default()]
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        batch, self._pending = self._pending, {}
+        now = time.monotonic()
+        for member_id in [m for m, (_, at) in self._known.items() if now - at >= self.known_ttl]:
+            del self._known[member_id]
+        await asyncio.gather(*(self._edit(pending) for pending in batch.values()))
+
+    async def _edit(self, pending: _PendingEdit) -> None:
+        member = pending.member
+        base = self.current_roles(member)
+        roles = [role for role in base if role.id not in pending.remove]
+        have = {role.id for role in roles}
+        roles.extend(role for role_id, role in pending.add.items() if role_id not in have)
+
+        role_ids = {role.id for role in roles}
+        if role_ids == {role.id for role in base}:
+            self.skipped += 1
+            result = False
+        else:
+            if self.on_applied is not None:
+                # Before the request, so the gateway's echo of it is already expected
+                self.on_applied(member.id, role_ids)
+            try:
+                await self.limiter.acquire(MEMBER_EDIT_ROUTE.format(guild_id=member.guild.id))
+                await member.edit(roles=roles, reason=pending.reason)
+            except Exception as e:
+                if self.on_applied is not None:
+                    self.on_applied(member.id, {role.id for role in base})
+                for future in pending.futures:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self._known[member.id] = (roles, time.monotonic())
+            self.edits += 1
+            result = True
+
+        for future in pending.futures:
+            if not future.done():
+                future.set_result(result)
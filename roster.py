@@ -0,0 +1,133 @@
+from typing import Dict, Iterator, Optional, Union
+
+# Version of the team_data.json layout written by ``teams_to_json``
+TEAM_DATA_FORMAT = 2
+# Contract length for chairmen, who never run out of seasons
+INFINITE_SEASONS = "inf"
+
+STAFF_ROLES = ("chairman", "manager", "assistant_manager")
+
+
+def seasons_after_season(seasons) -> Optional[int]:
+    """A contract's length once a season has been played; None for one that never runs down ("inf", unset)."""
+    if seasons is None or seasons == INFINITE_SEASONS:
+        return None
+    try:
+        return int(seasons) - 1
+    except (TypeError, ValueError):
+        return None
+
+
+class RosterEntry:
+    """One player's contract with a team."""
+
+    __slots__ = ("player_id", "seasons", "release_clause")
+
+    def __init__(self, player_id: int, seasons: Union[int, str, None], release_clause: bool = False):
+        self.player_id = player_id
+        self.seasons = seasons
+        self.release_clause = release_clause
+
+    def to_json(self) -> dict:
+        return {"id": self.player_id, "seasons": self.seasons, "release_clause": self.release_clause}
+
+    def __repr__(self):
+        return f"RosterEntry({self.player_id}, {self.seasons!r}, release_clause={self.release_clause})"
+
+
+class Team:
+    """A team, its staff and its roster.
+
+    ``roster`` is the single source of truth for who plays where, keyed by
+    integer player id and kept in signing order. Staff slots hold member ids
+    as strings, the same way commands compare them.
+    """
+
+    __slots__ = ("name", "role_id", "chairman", "manager", "assistant_manager", "roster")
+
+    def __init__(self, name: str, role_id: Optional[int] = None, chairman: Optional[str] = None,
+                 manager: Optional[str] = None, assistant_manager: Optional[str] = None):
+        self.name = name
+        self.role_id = role_id
+        self.chairman = chairman
+        self.manager = manager
+        self.assistant_manager = assistant_manager
+        self.roster: Dict[int, RosterEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self.roster)
+
+    def __iter__(self) -> Iterator[RosterEntry]:
+        return iter(self.roster.values())
+
+    def __contains__(self, player_id) -> bool:
+        return int(player_id) in self.roster
+
+    def get_staff(self, role: str) -> Optional[str]:
+        return getattr(self, role)
+
+    def set_staff(self, role: str, member_id: Optional[str]) -> None:
+        if role not in STAFF_ROLES:
+            raise ValueError(f"Unknown staff role: {role}")
+        setattr(self, role, member_id)
+
+    def add(self, player_id: int, seasons, release_clause: bool = False) -> RosterEntry:
+        """Put a player on the roster; a re-signing keeps its place but takes the new terms."""
+        entry = self.roster.get(player_id)
+        if entry is None:
+            entry = self.roster[player_id] = RosterEntry(player_id, seasons, release_clause)
+        else:
+            entry.seasons = seasons
+            entry.release_clause = release_clause
+        return entry
+
+    def remove(self, player_id: int) -> Optional[RosterEntry]:
+        return self.roster.pop(player_id, None)
+
+    def to_json(self) -> dict:
+        data = {"role_id": self.role_id}
+        for role in STAFF_ROLES:
+            data[role] = getattr(self, role)
+        data["roster"] = [entry.to_json() for entry in self.roster.values()]
+        return data
+
+    @classmethod
+    def from_json(cls, name: str, data: dict) -> "Team":
+        team = cls(name, data.get("role_id"), *(data.get(role) for role in STAFF_ROLES))
+        for item in data.get("roster", []):
+            team.add(int(item["id"]), item.get("seasons"), bool(item.get("release_clause", False)))
+        return team
+
+    @classmethod
+    def from_legacy_json(cls, name: str, data: dict) -> "Team":
+        """Read the v1 layout, where membership lives in both ``players`` and ``roster``.
+
+        The roster list carries the release clause and signing order, so it
+        wins; anyone only recorded in ``players`` is appended after it. A
+        chairman missing from both is given their "inf" contract.
+        """
+        team = cls.from_json(name, data)
+        for player_id, info in data.get("players", {}).items():
+            if int(player_id) not in team.roster:
+                team.add(int(player_id), (info or {}).get("seasons"))
+        if team.chairman and int(team.chairman) not in team.roster:
+            team.add(int(team.chairman), INFINITE_SEASONS)
+        return team
+
+    def __repr__(self):
+        return f"Team({self.name!r}, players={len(self.roster)})"
+
+
+def teams_from_json(data: dict) -> Dict[str, Team]:
+    """Build teams from either on-disk layout of team_data.json."""
+    if data.get("format") == TEAM_DATA_FORMAT:
+        return {name: Team.from_json(name, team) for name, team in data.get("teams", {}).items()}
+    # v1: a bare {team name: team} mapping
+    return {name: Team.from_legacy_json(name, team) for name, team in data.items()}
+
+
+def teams_to_json(teams: Dict[str, Team]) -> dict:
+    return {
+        "format": TEAM_DATA_FORMAT,
+        "teams": {name: team.to_json() for name, team in teams.items()}
+    }
@@ -0,0 +1,391 @@
+import json
+import os
+import struct
+import sys
+from array import array
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from persistence import atomic_write
+from roster import INFINITE_SEASONS, STAFF_ROLES, TEAM_DATA_FORMAT, teams_to_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SNAPSHOT_FILE = "league.snap"
+FORMATS = ("json", "orjson", "binary")
+
+# (team_data.json contents, registered_players.json contents)
+LeagueData = Tuple[dict, Dict[str, dict]]
+
+
+class JsonSerializer:
+    """The stdlib encoder; compact unless ``indent`` is given.
+
+    The compact encoder is C and holds the GIL for the whole call, which
+    stalls the event loop even when it runs on the storage thread. Large
+    mappings (the registry) are therefore encoded ``chunk`` entries at a
+    time, giving the loop a turn between chunks; the output is the same.
+    """
+
+    def __init__(self, indent: Optional[int] = None, chunk: int = 500):
+        self.indent = indent
+        self.chunk = chunk
+        self.name = "json" if indent is None else "json-pretty"
+        self._separators = None if indent else (",", ":")
+
+    def dumps(self, data) -> bytes:
+        if self.indent is None and isinstance(data, dict) and len(data) > self.chunk:
+            items = iter(data.items())
+            parts = [self._encode(dict(islice(items, self.chunk)))[1:-1] for _ in range(0, len(data), self.chunk)]
+            return ("{" + ",".join(parts) + "}").encode("utf-8")
+        return self._encode(data).encode("utf-8")
+
+    def _encode(self, data) -> str:
+        return json.dumps(data, indent=self.indent, separators=self._separators)
+
+    def loads(self, raw: bytes):
+        return json.loads(raw)
+
+
+class OrjsonSerializer:
+    """orjson, when installed: same compact output, several times faster both ways."""
+
+    name = "orjson"
+
+    def dumps(self, data) -> bytes:
+        return orjson.dumps(data)
+
+    def loads(self, raw: bytes):
+        return orjson.loads(raw)
+
+
+COMPACT = JsonSerializer()
+PRETTY = JsonSerializer(indent=4)
+
+
+class JsonFormat:
+    """team_data.json and registered_players.json, the layout every other tool reads."""
+
+    def __init__(self, team_path: str, players_path: str, serializer=COMPACT):
+        self.team_path = team_path
+        self.players_path = players_path
+        self.serializer = serializer
+        self.name = serializer.name
+
+    def exists(self) -> bool:
+        return os.path.exists(self.team_path) or os.path.exists(self.players_path)
+
+    def mtime(self) -> float:
+        return max((os.path.getmtime(p) for p in (self.team_path, self.players_path) if os.path.exists(p)),
+                   default=0.0)
+
+    def encode(self, data: LeagueData) -> List[Tuple[str, bytes]]:
+        team_data, players = data
+        return [(self.team_path, self.serializer.dumps(team_data)),
+                (self.players_path, self.serializer.dumps(players))]
+
+    def write(self, data: LeagueData) -> None:
+        for path, raw in self.encode(data):
+            atomic_write(path, raw)
+
+    def read(self) -> LeagueData:
+        return self._read_file(self.team_path), self._read_file(self.players_path)
+
+    def _read_file(self, path: str) -> dict:
+        try:
+            with open(path, "rb") as f:
+                return self.serializer.loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            # json.JSONDecodeError and orjson.JSONDecodeError are both ValueErrors
+            print(f"Failed to parse {path}: {e}")
+            return {}
+
+
+class BinaryFormat:
+    """Both files in one struct-packed snapshot, for the hot path.
+
+    Layout: an 8-byte header, then length-prefixed blocks. The first block is
+    a small JSON header holding the counts and the interned value tables:
+    team names, statuses, ratings and the like, which every player row
+    refers to by index instead of repeating. Rosters and player rows are
+    stored column by column as fixed-width arrays, with names in one
+    NUL-separated blob.
+
+    Data that doesn't fit the packed shape (a staff slot that isn't an id,
+    an unexpected registry field) is not lost: that whole section is stored
+    as compact JSON instead.
+    """
+
+    MAGIC = b"LGSNAP"
+    VERSION = 1
+    # Registry fields stored as interned columns; anything else sends the registry to JSON
+    PLAYER_COLUMNS = ("team", "status", "2c", "rating", "seasons")
+    PLAYER_FIELDS = frozenset(("name", "id") + PLAYER_COLUMNS)
+    # Roster seasons markers in the signed 32-bit column
+    INFINITE, MISSING = -1, -2
+
+    def __init__(self, path: str = SNAPSHOT_FILE):
+        self.path = path
+        self.name = "binary"
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def mtime(self) -> float:
+        return os.path.getmtime(self.path) if os.path.exists(self.path) else 0.0
+
+    def encode(self, data: LeagueData) -> List[Tuple[str, bytes]]:
+        return [(self.path, self.dumps(data))]
+
+    def write(self, data: LeagueData) -> None:
+        atomic_write(self.path, self.dumps(data))
+
+    def read(self) -> LeagueData:
+        try:
+            with open(self.path, "rb") as f:
+                return self.loads(f.read())
+        except FileNotFoundError:
+            return {}, {}
+        except (ValueError, struct.error, UnicodeDecodeError) as e:
+            print(f"Failed to parse {self.path}: {e}")
+            return {}, {}
+
+    # ENCODING
+    def dumps(self, data: LeagueData) -> bytes:
+        team_data, players = data
+        teams = team_data.get("teams", {}) if team_data.get("format") == TEAM_DATA_FORMAT else None
+        # Team names come first in the team table so the teams block can use it too
+        tables = {column: {_Absent: 0} for column in self.PLAYER_COLUMNS}
+        if teams is not None:
+            for name in teams:
+                tables["team"].setdefault(name, len(tables["team"]))
+
+        team_blocks = self._pack_teams(teams, tables["team"]) if teams is not None else None
+        player_blocks = self._pack_players(players, tables)
+
+        header = {
+            "teams": len(teams) if team_blocks else None,
+            "players": len(players) if player_blocks else None,
+            "tables": {column: list(table)[1:] for column, table in tables.items()},
+        }
+        blocks = [json.dumps(header, separators=(",", ":")).encode("utf-8")]
+        blocks += team_blocks or [COMPACT.dumps(team_data)]
+        blocks += player_blocks or [COMPACT.dumps(players)]
+        out = [self.MAGIC, struct.pack("<H", self.VERSION)]
+        for block in blocks:
+            out.append(struct.pack("<I", len(block)))
+            out.append(block)
+        return b"".join(out)
+
+    def _pack_teams(self, teams: dict, team_table: dict) -> Optional[List[bytes]]:
+        """Team rows, staff and the roster columns, or None if any team doesn't fit."""
+        names, role_ids, staff, sizes = array("I"), array("q"), array("Q"), array("I")
+        roster_ids, seasons, clauses = array("Q"), array("i"), array("B")
+        role_flags = array("B")
+        try:
+            for name, team in teams.items():
+                if set(team) != {"role_id", "roster", *STAFF_ROLES}:
+                    return None
+                names.append(team_table[name])
+                role_id = team["role_id"]
+                role_flags.append(role_id is not None)
+                role_ids.append(role_id or 0)
+                for role in STAFF_ROLES:
+                    staff.append(_pack_id(team[role]))
+                sizes.append(len(team["roster"]))
+                for entry in team["roster"]:
+                    if set(entry) != {"id", "seasons", "release_clause"} or type(entry["release_clause"]) is not bool:
+                        return None
+                    roster_ids.append(entry["id"])
+                    seasons.append(self._pack_seasons(entry["seasons"]))
+                    clauses.append(entry["release_clause"])
+        except (TypeError, ValueError, OverflowError):
+            return None
+        return [names.tobytes() + role_flags.tobytes(), role_ids.tobytes(), staff.tobytes(),
+                sizes.tobytes(), roster_ids.tobytes(), seasons.tobytes(), clauses.tobytes()]
+
+    def _pack_seasons(self, value) -> int:
+        if value == INFINITE_SEASONS:
+            return self.INFINITE
+        if value is None:
+            return self.MISSING
+        if type(value) is not int or value < 0:
+            raise ValueError(f"can't pack seasons {value!r}")
+        return value
+
+    def _pack_players(self, players: Dict[str, dict], tables: dict) -> Optional[List[bytes]]:
+        """Registry columns, or None if any entry doesn't fit them."""
+        records = list(players.values())
+        keys = list(players)
+        if set().union(*records) - self.PLAYER_FIELDS:
+            return None
+        try:
+            ids = array("Q", map(int, keys))
+        except (ValueError, OverflowError):
+            return None
+        # Keys must round-trip exactly ("007" would come back as "7")
+        if list(map(str, ids)) != keys:
+            return None
+
+        # 1 when the entry's "id" repeats its key, 0 when it has none
+        has_id = array("B", [record.get("id", _Absent) == key for key, record in zip(keys, records)])
+        if any(not flag and "id" in record for flag, record in zip(has_id, records)):
+            return None
+        names = [record.get("name") for record in records]
+        if not all(type(name) is str for name in names):
+            return None
+        joined = "\0".join(names)
+        if joined.count("\0") != max(len(names) - 1, 0):
+            return None
+
+        blocks = [ids.tobytes(), has_id.tobytes(), joined.encode("utf-8")]
+        for column in self.PLAYER_COLUMNS:
+            table = tables[column]
+            codes = [table.setdefault(record.get(column, _Absent), len(table)) for record in records]
+            values = list(table)[1:]
+            # True == 1 == 1.0 as dict keys, so a column mixing them can't be interned faithfully
+            kinds = {type(value) for value in values}
+            if len(kinds & {bool, int, float}) > 1 or not kinds <= _SCALARS:
+                return None
+            blocks.append(array("H" if len(table) <= 0xFFFF else "I", codes).tobytes())
+        return blocks
+
+    # DECODING
+    def loads(self, raw: bytes) -> LeagueData:
+        if raw[:6] != self.MAGIC:
+            raise ValueError("not a league snapshot")
+        (version,) = struct.unpack_from("<H", raw, 6)
+        if version != self.VERSION:
+            raise ValueError(f"unsupported snapshot version {version}")
+        blocks, offset = [], 8
+        while offset < len(raw):
+            (length,) = struct.unpack_from("<I", raw, offset)
+            blocks.append(raw[offset + 4:offset + 4 + length])
+            offset += 4 + length
+
+        header = json.loads(blocks[0])
+        tables = {column: [_Absent] + values for column, values in header["tables"].items()}
+        if header["teams"] is None:
+            team_data, rest = COMPACT.loads(blocks[1]), blocks[2:]
+        else:
+            team_data, rest = self._unpack_teams(header["teams"], blocks[1:8], tables["team"]), blocks[8:]
+        if header["players"] is None:
+            players = COMPACT.loads(rest[0])
+        else:
+            players = self._unpack_players(header["players"], rest, tables)
+        return team_data, players
+
+    def _unpack_teams(self, count: int, blocks: List[bytes], team_table: list) -> dict:
+        names = array("I")
+        names.frombytes(blocks[0][:count * 4])
+        role_flags = blocks[0][count * 4:]
+        role_ids, staff, sizes = array("q"), array("Q"), array("I")
+        roster_ids, seasons, clauses = array("Q"), array("i"), array("B")
+        for column, block in zip((role_ids, staff, sizes, roster_ids, seasons, clauses), blocks[1:]):
+            column.frombytes(block)
+
+        teams, position = {}, 0
+        for i in range(count):
+            roster = []
+            for j in range(position, position + sizes[i]):
+                season = seasons[j]
+                roster.append({
+                    "id": roster_ids[j],
+                    "seasons": INFINITE_SEASONS if season == self.INFINITE else None if season == self.MISSING else season,
+                    "release_clause": bool(clauses[j])
+                })
+            position += sizes[i]
+            team = {"role_id": role_ids[i] if role_flags[i] else None}
+            for k, role in enumerate(STAFF_ROLES):
+                member_id = staff[i * len(STAFF_ROLES) + k]
+                team[role] = str(member_id) if member_id else None
+            team["roster"] = roster
+            teams[team_table[names[i]]] = team
+        return {"format": TEAM_DATA_FORMAT, "teams": teams}
+
+    def _unpack_players(self, count: int, blocks: List[bytes], tables: dict) -> Dict[str, dict]:
+        ids = array("Q")
+        ids.frombytes(blocks[0])
+        keys = list(map(str, ids))
+        has_id = blocks[1]
+        names = blocks[2].decode("utf-8").split("\0") if count else []
+        columns = []
+        for column, block in zip(self.PLAYER_COLUMNS, blocks[3:]):
+            table = tables[column]
+            codes = array("H" if len(table) <= 0xFFFF else "I")
+            codes.frombytes(block)
+            columns.append((column, [table[code] for code in codes]))
+
+        players = {}
+        for i, key in enumerate(keys):
+            record = {"name": names[i]}
+            if has_id[i]:
+                record["id"] = key
+            for column, values in columns:
+                value = values[i]
+                if value is not _Absent:
+                    record[column] = value
+            players[key] = record
+        return players
+
+
+class _AbsentType:
+    """Marks a registry field the entry doesn't have; index 0 in every table."""
+
+    def __repr__(self):
+        return "<absent>"
+
+
+_Absent = _AbsentType()
+_SCALARS = {str, int, float, bool, type(None)}
+
+
+def _pack_id(member_id: Optional[str]) -> int:
+    """A member id held as a string, as an unsigned 64-bit int; 0 for an empty slot."""
+    if member_id is None:
+        return 0
+    value = int(member_id)
+    if str(value) != member_id or value <= 0:
+        raise ValueError(f"can't pack member id {member_id!r}")
+    return value
+
+
+def league_format(name: str, team_path: str, players_path: str, snapshot_path: str = SNAPSHOT_FILE):
+    """The on-disk format called ``name``: "json", "orjson" or "binary"."""
+    if name == "binary":
+        return BinaryFormat(snapshot_path)
+    if name == "orjson":
+        if orjson is not None:
+            return JsonFormat(team_path, players_path, OrjsonSerializer())
+        print("orjson isn't installed; writing league files with the stdlib encoder")
+    elif name != "json":
+        raise ValueError(f"Unknown league format: {name}")
+    return JsonFormat(team_path, players_path)
+
+
+def export_snapshot(store) -> LeagueData:
+    """Copy the league out of either backend, in the JSON layout, for ``export_json``."""
+    team_data = teams_to_json(dict(store.iter_teams()))
+    return team_data, {player_id: dict(player) for player_id, player in store.iter_players()}
+
+
+def export_json(data: LeagueData) -> Tuple[bytes, bytes]:
+    """team_data.json and registered_players.json contents, indented for people to read."""
+    team_data, players = data
+    return PRETTY.dumps(team_data), PRETTY.dumps(players)
+
+
+if __name__ == "__main__":
+    # python serializers.py [league.snap] [out_dir]: turn a binary snapshot back into readable JSON
+    source = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_FILE
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else "export"
+    os.makedirs(out_dir, exist_ok=True)
+    exported = JsonFormat(os.path.join(out_dir, "team_data.json"),
+                          os.path.join(out_dir, "registered_players.json"), PRETTY)
+    exported.write(BinaryFormat(source).read())
+    print(f"Wrote {exported.team_path} and {exported.players_path}")
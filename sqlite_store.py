@@ -0,0 +1,581 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from functools import wraps
+from typing import Callable, FrozenSet, Iterator, List, Optional, Tuple, TypeVar
+
+from league_store import PLAYERS_FILE, TEAM_DATA_FILE
+from roster import INFINITE_SEASONS, STAFF_ROLES, Team, teams_from_json
+
+LEAGUE_DB_FILE = "league.db"
+T = TypeVar("T")
+# Bumped when stored values change meaning; see _upgrade()
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teams (
+    name TEXT PRIMARY KEY,
+    role_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS staff (
+    team TEXT NOT NULL REFERENCES teams(name) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    member_id TEXT NOT NULL,
+    PRIMARY KEY (team, role)
+);
+CREATE INDEX IF NOT EXISTS idx_staff_member ON staff(member_id, role);
+CREATE TABLE IF NOT EXISTS players (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    team TEXT,
+    status TEXT,
+    two_c INTEGER,
+    rating TEXT,
+    seasons TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_players_team ON players(team);
+CREATE TABLE IF NOT EXISTS roster (
+    team TEXT NOT NULL REFERENCES teams(name) ON DELETE CASCADE,
+    player_id TEXT NOT NULL,
+    seasons INTEGER,
+    release_clause INTEGER NOT NULL DEFAULT 0,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (team, player_id)
+);
+CREATE INDEX IF NOT EXISTS idx_roster_player ON roster(player_id);
+CREATE INDEX IF NOT EXISTS idx_roster_release_clause ON roster(player_id) WHERE release_clause = 1;
+"""
+
+
+# Roster seasons are an integer, the text "inf" (chairmen) or NULL for a contract with no length
+def _seasons_to_db(seasons):
+    if seasons is None or seasons == INFINITE_SEASONS:
+        return seasons
+    return int(seasons)
+
+
+def _seasons_from_db(seasons):
+    return seasons
+
+
+def _locked(method):
+    """Hold the store's lock for the whole call, so a commit from another thread never lands mid-operation."""
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+class SQLiteLeagueStore:
+    """SQLite-backed drop-in for ``LeagueStore``.
+
+    Teams, staff, players and roster entries live in their own tables, indexed
+    on player id, team and staff member id, so chairman and roster lookups are
+    index hits rather than scans. Reads return the same ``roster.Team``
+    records as the JSON store. Mutations run inside an open transaction which the persister
+    commits on its flush interval.
+
+    The event loop owns the main connection and commits on it; with WAL and
+    ``synchronous=NORMAL`` a commit only appends to the WAL. The WAL
+    checkpoint, which is what fsyncs, is a storage-thread job on a second
+    connection, so nothing on the storage thread waits for ``_lock``.
+    Whole-league reads belong off the loop too (``blocking_reads``): after a
+    ``commit()`` on the loop, ``read()`` runs them on that second connection
+    against a consistent snapshot, without holding up the loop's writes.
+    """
+
+    blocking_reads = True
+
+    def __init__(self, db_path: str = LEAGUE_DB_FILE,
+                 team_path: str = TEAM_DATA_FILE, players_path: str = PLAYERS_FILE):
+        self.db_path = db_path
+        self.team_path = team_path
+        self.players_path = players_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        # Opened on first read(); only ever used from one thread at a time
+        self._reader: Optional["SQLiteLeagueStore"] = None
+        self._listeners: List[Callable[[], None]] = []
+        # Bumped on every change so callers can cache derived views
+        self.version = 0
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def _changed(self) -> None:
+        self.version += 1
+        for callback in self._listeners:
+            callback()
+
+    # LOADING / SAVING
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @_locked
+    def load(self) -> None:
+        self._conn = self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Checkpoints would otherwise run inside whichever commit crosses the
+        # threshold, on the event loop; _checkpoint() runs them on the storage thread
+        self._conn.execute("PRAGMA wal_autocheckpoint=0")
+        self._conn.executescript(SCHEMA)
+        self._upgrade()
+
+        if not self._scalar("SELECT COUNT(*) FROM teams"):
+            migrated = self.migrate_from_json(self.team_path, self.players_path)
+            if migrated:
+                print(f"Migrated {migrated[0]} teams and {migrated[1]} players from JSON into {self.db_path}")
+
+        print(f"Loaded {self._scalar('SELECT COUNT(*) FROM teams')} teams and "
+              f"{self.player_count()} registered players from {self.db_path}")
+
+    def _upgrade(self) -> None:
+        version = self._scalar("PRAGMA user_version")
+        if version >= SCHEMA_VERSION:
+            return
+        with self._conn:
+            if version < 1:
+                # Version 0 stored "inf" as NULL, and that's how every NULL was read back
+                self._conn.execute("UPDATE roster SET seasons = ? WHERE seasons IS NULL", (INFINITE_SEASONS,))
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def migrate_from_json(self, team_path: str, players_path: str) -> Optional[Tuple[int, int]]:
+        """One-shot import of the JSON files, in either layout. Returns ``(teams, players)`` or None."""
+        if not os.path.exists(team_path):
+            return None
+        with open(team_path, "r") as f:
+            teams = teams_from_json(json.load(f))
+        try:
+            with open(players_path, "r") as f:
+                registered_players = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            registered_players = {}
+
+        with self._conn:
+            for team_name, team in teams.items():
+                self._conn.execute(
+                    "INSERT INTO teams (name, role_id) VALUES (?, ?)",
+                    (team_name, team.role_id)
+                )
+                for role in STAFF_ROLES:
+                    if team.get_staff(role):
+                        self._conn.execute(
+                            "INSERT INTO staff (team, role, member_id) VALUES (?, ?, ?)",
+                            (team_name, role, team.get_staff(role))
+                        )
+                for position, entry in enumerate(team):
+                    self._insert_roster(team_name, entry.player_id, entry.seasons,
+                                        entry.release_clause, position)
+            for pid, record in registered_players.items():
+                self._write_player(pid, record)
+        return len(teams), len(registered_players)
+
+    def _scalar(self, sql: str, params=()):
+        row = self._conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def prepare_flush(self) -> List[Callable[[], None]]:
+        # The commit is a WAL append and stays on the loop; the checkpoint fsyncs
+        self.commit()
+        return [self._checkpoint]
+
+    @_locked
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def _checkpoint(self) -> None:
+        # PASSIVE never waits on the writer; whatever it can't copy yet waits for the next flush
+        reader = self._reader_store()
+        with reader._lock:
+            reader._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def save(self) -> None:
+        self.commit()
+        self._checkpoint()
+
+    @_locked
+    def _reader_store(self) -> "SQLiteLeagueStore":
+        if self._reader is None:
+            reader = SQLiteLeagueStore(self.db_path)
+            reader._conn = reader._connect()
+            self._reader = reader
+        return self._reader
+
+    def read(self, fn: Callable[..., T], *args) -> T:
+        """Run ``fn(store, *args)`` against the league as last committed; meant for a worker thread.
+
+        Call ``commit()`` on the event loop first to include its latest
+        changes. The reads run on a second connection inside one transaction,
+        so they see a single consistent state and never wait on (or hold up)
+        the event loop's writes.
+        """
+        reader = self._reader_store()
+        with reader._lock:
+            reader._conn.execute("BEGIN")
+            try:
+                return fn(reader, *args)
+            finally:
+                reader._conn.execute("ROLLBACK")
+
+    # TEAM READS
+    def _build_team(self, row) -> Team:
+        team = Team(row["name"], row["role_id"])
+        for staff in self._conn.execute("SELECT role, member_id FROM staff WHERE team = ?", (row["name"],)):
+            team.set_staff(staff["role"], staff["member_id"])
+        for entry in self._conn.execute(
+            "SELECT player_id, seasons, release_clause FROM roster WHERE team = ? ORDER BY position",
+            (row["name"],)
+        ):
+            team.add(int(entry["player_id"]), _seasons_from_db(entry["seasons"]), bool(entry["release_clause"]))
+        return team
+
+    @_locked
+    def get_team(self, team_name: str) -> Optional[Team]:
+        row = self._conn.execute("SELECT name, role_id FROM teams WHERE name = ?", (team_name,)).fetchone()
+        return self._build_team(row) if row else None
+
+    @_locked
+    def has_team(self, team_name: str) -> bool:
+        return self._scalar("SELECT 1 FROM teams WHERE name = ?", (team_name,)) is not None
+
+    @_locked
+    def team_names(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT name FROM teams ORDER BY rowid")]
+
+    @_locked
+    def iter_teams(self) -> Iterator[Tuple[str, Team]]:
+        # Three queries for the whole league rather than two per team
+        teams = {
+            row["name"]: Team(row["name"], row["role_id"])
+            for row in self._conn.execute("SELECT name, role_id FROM teams ORDER BY rowid")
+        }
+        for row in self._conn.execute("SELECT team, role, member_id FROM staff"):
+            teams[row["team"]].set_staff(row["role"], row["member_id"])
+        for row in self._conn.execute(
+            "SELECT team, player_id, seasons, release_clause FROM roster ORDER BY team, position"
+        ):
+            teams[row["team"]].add(int(row["player_id"]), _seasons_from_db(row["seasons"]), bool(row["release_clause"]))
+        return iter(list(teams.items()))
+
+    @_locked
+    def team_for_staff(self, member_id: str, role: str) -> Optional[str]:
+        # First by name, like the JSON store, when someone holds the role on several teams
+        return self._scalar(
+            "SELECT MIN(team) FROM staff WHERE member_id = ? AND role = ?", (member_id, role)
+        )
+
+    @_locked
+    def teams_for_staff(self, member_id: str, role: str) -> List[str]:
+        rows = self._conn.execute(
+            "SELECT team FROM staff WHERE member_id = ? AND role = ? ORDER BY team", (member_id, role)
+        )
+        return [row["team"] for row in rows]
+
+    @_locked
+    def team_for_chairman(self, member_id: str) -> Optional[str]:
+        return self.team_for_staff(member_id, "chairman")
+
+    @_locked
+    def teams_of_player(self, player_id: str) -> FrozenSet[str]:
+        return frozenset(
+            row[0] for row in self._conn.execute("SELECT team FROM roster WHERE player_id = ?", (str(player_id),))
+        )
+
+    @_locked
+    def team_of_player(self, player_id: str) -> Optional[str]:
+        return self._scalar("SELECT MIN(team) FROM roster WHERE player_id = ?", (str(player_id),))
+
+    @_locked
+    def release_clause_team(self, player_id: str) -> Optional[str]:
+        return self._scalar(
+            "SELECT team FROM roster WHERE player_id = ? AND release_clause = 1", (str(player_id),)
+        )
+
+    @_locked
+    def release_clause_holders(self) -> FrozenSet[int]:
+        return frozenset(
+            int(row[0]) for row in self._conn.execute("SELECT player_id FROM roster WHERE release_clause = 1")
+        )
+
+    @_locked
+    def rostered_player_ids(self) -> FrozenSet[int]:
+        return frozenset(int(row[0]) for row in self._conn.execute("SELECT DISTINCT player_id FROM roster"))
+
+    @_locked
+    def roster_size(self, team_name: str) -> int:
+        return self._scalar("SELECT COUNT(*) FROM roster WHERE team = ?", (team_name,))
+
+    @_locked
+    def is_on_team(self, player_id: str, team_name: str) -> bool:
+        return self._scalar(
+            "SELECT 1 FROM roster WHERE team = ? AND player_id = ?", (team_name, str(player_id))
+        ) is not None
+
+    # PLAYER READS
+    # Selected by position: building a dict per row is most of a registry scan
+    PLAYER_COLUMNS = "id, name, team, status, two_c, rating, seasons"
+
+    @staticmethod
+    def _player_from_row(row) -> dict:
+        player_id, name, team, status, two_c, rating, seasons = row
+        record = {"name": name, "id": player_id, "team": team}
+        if status is not None:
+            record["status"] = status
+        if two_c is not None:
+            record["2c"] = bool(two_c)
+        if rating is not None:
+            record["rating"] = rating
+        if seasons is not None:
+            record["seasons"] = seasons
+        return record
+
+    @_locked
+    def get_player(self, player_id: str) -> Optional[dict]:
+        row = self._conn.execute(
+            f"SELECT {self.PLAYER_COLUMNS} FROM players WHERE id = ?", (player_id,)
+        ).fetchone()
+        return self._player_from_row(row) if row else None
+
+    @_locked
+    def is_registered(self, player_id: str) -> bool:
+        return self._scalar("SELECT 1 FROM players WHERE id = ?", (player_id,)) is not None
+
+    @_locked
+    def iter_players(self) -> Iterator[Tuple[str, dict]]:
+        rows = self._conn.execute(f"SELECT {self.PLAYER_COLUMNS} FROM players ORDER BY rowid").fetchall()
+        return ((row[0], self._player_from_row(row)) for row in rows)
+
+    @_locked
+    def player_count(self) -> int:
+        return self._scalar("SELECT COUNT(*) FROM players")
+
+    # PLAYER MUTATIONS
+    def _write_player(self, player_id: str, record: dict) -> None:
+        two_c = record.get("2c")
+        seasons = record.get("seasons")
+        self._conn.execute(
+            "INSERT OR REPLACE INTO players (id, name, team, status, two_c, rating, seasons) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                player_id,
+                record.get("name"),
+                record.get("team"),
+                record.get("status"),
+                None if two_c is None else int(bool(two_c)),
+                record.get("rating"),
+                # Registry seasons only ever hold "inf" (chairmen); keep the marker
+                None if seasons is None else str(seasons)
+            )
+        )
+
+    @_locked
+    def register_player(self, player_id: str, name: str) -> dict:
+        record = {
+            "name": name,
+            "id": player_id,
+            "team": None,
+            "status": "free_agent",
+            "2c": False,
+            "rating": "N/A"
+        }
+        self._write_player(player_id, record)
+        self._changed()
+        return record
+
+    @_locked
+    def unregister_player(self, player_id: str) -> bool:
+        removed = self._conn.execute("DELETE FROM players WHERE id = ?", (player_id,)).rowcount
+        if not removed:
+            return False
+        self._changed()
+        return True
+
+    @_locked
+    def update_player(self, player_id: str, fields: dict) -> dict:
+        record = self.get_player(player_id)
+        if record is None:
+            raise KeyError(player_id)
+        record.update(fields)
+        self._write_player(player_id, record)
+        self._changed()
+        return record
+
+    # ROSTER MUTATIONS
+    def _insert_roster(self, team_name: str, player_id, seasons, release_clause: bool, position: int) -> None:
+        self._conn.execute(
+            "INSERT OR IGNORE INTO roster (team, player_id, seasons, release_clause, position) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (team_name, str(player_id), _seasons_to_db(seasons), int(bool(release_clause)), position)
+        )
+
+    @_locked
+    def sign_player(self, player_id: str, team_name: str, seasons, release_clause: bool = False,
+                    name: Optional[str] = None) -> None:
+        """Move a player onto ``team_name`` and mark them signed in the registry.
+
+        Any other roster spot is dropped. Unregistered players get a fresh
+        registry entry under ``name``.
+        """
+        if not self.has_team(team_name):
+            raise KeyError(team_name)
+        self._place_on_team(player_id, team_name, seasons, release_clause)
+
+        record = self.get_player(player_id)
+        if record is None:
+            record = {"name": name, "id": player_id, "2c": False, "rating": "N/A"}
+        elif name:
+            record["name"] = name
+        record["team"] = team_name
+        record["status"] = "signed"
+        self._write_player(player_id, record)
+        self._changed()
+
+    def _place_on_team(self, player_id: str, team_name: str, seasons, release_clause: bool) -> None:
+        self._conn.execute("DELETE FROM roster WHERE player_id = ? AND team != ?", (player_id, team_name))
+        if self.is_on_team(player_id, team_name):
+            self._conn.execute(
+                "UPDATE roster SET seasons = ?, release_clause = ? WHERE team = ? AND player_id = ?",
+                (_seasons_to_db(seasons), int(bool(release_clause)), team_name, player_id)
+            )
+        else:
+            position = self._scalar(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM roster WHERE team = ?", (team_name,)
+            )
+            self._insert_roster(team_name, player_id, seasons, release_clause, position)
+
+    @_locked
+    def release_player(self, player_id: str, team_name: str) -> bool:
+        """Drop a player from ``team_name`` and mark them as a free agent."""
+        removed = self._conn.execute(
+            "DELETE FROM roster WHERE team = ? AND player_id = ?", (team_name, player_id)
+        ).rowcount
+        if not removed:
+            return False
+        self._conn.execute(
+            "UPDATE players SET team = NULL, status = 'free_agent' WHERE id = ?", (player_id,)
+        )
+        self._changed()
+        return True
+
+    @_locked
+    def apply_transfers(self, transfers) -> None:
+        """Apply many signs/releases under one savepoint; any failure undoes them all."""
+        self._conn.execute("SAVEPOINT transfers")
+        try:
+            for transfer in transfers:
+                if transfer.action == "sign":
+                    self.sign_player(transfer.player_id, transfer.team_name, transfer.seasons,
+                                     transfer.release_clause)
+                elif not self.release_player(transfer.player_id, transfer.team_name):
+                    raise ValueError(f"{transfer.player_id} is not on {transfer.team_name}")
+        except BaseException:
+            self._conn.execute("ROLLBACK TO transfers")
+            self._conn.execute("RELEASE transfers")
+            self._changed()
+            raise
+        self._conn.execute("RELEASE transfers")
+
+    @_locked
+    def expiring_contracts(self) -> List[Tuple[str, str]]:
+        """``(player_id, team_name)`` for every contract that ends when the season advances."""
+        rows = self._conn.execute(
+            "SELECT player_id, team FROM roster WHERE typeof(seasons) = 'integer' AND seasons <= 1 "
+            "ORDER BY team, position"
+        )
+        return [(row["player_id"], row["team"]) for row in rows]
+
+    @_locked
+    def advance_season(self) -> Tuple[int, List[Tuple[str, str]]]:
+        """Run every finite contract down by one season and release the players whose contract ends.
+
+        A few set-based statements under one savepoint, however many
+        contracts change. Returns how many contracts ran down and the
+        ``(player_id, team_name)`` releases.
+        """
+        self._conn.execute("SAVEPOINT advance_season")
+        try:
+            expiring = self.expiring_contracts()
+            contracts = self._conn.execute(
+                "UPDATE roster SET seasons = seasons - 1 WHERE typeof(seasons) = 'integer'"
+            ).rowcount
+            self._conn.execute("DELETE FROM roster WHERE typeof(seasons) = 'integer' AND seasons <= 0")
+            self._conn.executemany(
+                "UPDATE players SET team = NULL, status = 'free_agent' WHERE id = ?",
+                ((player_id,) for player_id, _ in expiring)
+            )
+        except BaseException:
+            self._conn.execute("ROLLBACK TO advance_season")
+            self._conn.execute("RELEASE advance_season")
+            raise
+        self._conn.execute("RELEASE advance_season")
+        self._changed()
+        return contracts, expiring
+
+    # STAFF MUTATIONS
+    @_locked
+    def set_staff(self, team_name: str, role: str, member_id: Optional[str]) -> None:
+        if role not in STAFF_ROLES:
+            raise ValueError(f"Unknown staff role: {role}")
+        if member_id is None:
+            self._conn.execute("DELETE FROM staff WHERE team = ? AND role = ?", (team_name, role))
+        else:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO staff (team, role, member_id) VALUES (?, ?, ?)",
+                (team_name, role, member_id)
+            )
+        self._changed()
+
+    @_locked
+    def clear_staff(self, team_name: str, role: str) -> Optional[str]:
+        if role not in STAFF_ROLES:
+            raise ValueError(f"Unknown staff role: {role}")
+        previous = self._scalar("SELECT member_id FROM staff WHERE team = ? AND role = ?", (team_name, role))
+        self._conn.execute("DELETE FROM staff WHERE team = ? AND role = ?", (team_name, role))
+        self._changed()
+        return previous
+
+    @_locked
+    def appoint_chairman(self, team_name: str, member_id: str, name: str) -> None:
+        """Make ``member_id`` chairman and manager, rostered for infinite seasons.
+
+        Raises ``ValueError`` if they're on another team's roster; release them first.
+        """
+        if not self.has_team(team_name):
+            raise KeyError(team_name)
+        if self.teams_of_player(member_id) - {team_name}:
+            raise ValueError(f"{member_id} is on another team's roster")
+        for role in ("chairman", "manager"):
+            self._conn.execute(
+                "INSERT OR REPLACE INTO staff (team, role, member_id) VALUES (?, ?, ?)",
+                (team_name, role, member_id)
+            )
+        self._place_on_team(member_id, team_name, INFINITE_SEASONS, False)
+        record = self.get_player(member_id) or {"name": name, "id": member_id}
+        record["team"] = team_name
+        record["seasons"] = INFINITE_SEASONS
+        self._write_player(member_id, record)
+        self._changed()
+
+    @_locked
+    def dismiss_chairman(self, team_name: str) -> Optional[str]:
+        """Clear the chairman slot, take them off the roster and drop them from the registry."""
+        chairman_id = self.clear_staff(team_name, "chairman")
+        if chairman_id:
+            self._conn.execute("DELETE FROM roster WHERE team = ? AND player_id = ?", (team_name, chairman_id))
+            self._conn.execute("DELETE FROM players WHERE id = ?", (chairman_id,))
+        return chairman_id
+
+
+if __name__ == "__main__":
+    # python sqlite_store.py [db_path] -- import team_data.json / registered_players.json
+    db_path = sys.argv[1] if len(sys.argv) > 1 else LEAGUE_DB_FILE
+    store = SQLiteLeagueStore(db_path)
+    store.load()
+    store.save()
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class StorageIO:
+    """The one place league disk work runs: a dedicated thread fed through a bounded queue.
+
+    Encoding snapshots and writing files happen on the thread, in the order
+    they were submitted, so the event loop never waits on the disk. At most
+    ``max_pending`` jobs are queued or running; past that, ``run()`` waits
+    for a slot instead of piling up work (and memory) behind a slow disk.
+    """
+
+    def __init__(self, max_pending: int = 64, name: str = "league-io"):
+        self.max_pending = max_pending
+        # One worker keeps writes to the same file in submission order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        # Created on first use so it binds to the bot's running loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.failed = 0
+        # Seconds spent waiting for a queue slot, and running jobs on the thread
+        self.waited = 0.0
+        self.busy = 0.0
+
+    def _timed(self, fn: Callable[..., T], *args) -> T:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.busy += time.perf_counter() - started
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run ``fn(*args)`` on the storage thread and return its result."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        if self._slots.locked():
+            started = time.perf_counter()
+            await self._slots.acquire()
+            self.waited += time.perf_counter() - started
+        else:
+            await self._slots.acquire()
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, self._timed, fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        """Finish queued jobs and stop the thread."""
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending, "peak_pending": self.peak_pending, "completed": self.completed,
+            "failed": self.failed, "waited": self.waited, "busy": self.busy,
+        }
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a sleep of ``interval`` seconds.
+
+    Anything that blocks the loop (disk, heavy encoding) shows up as lag,
+    and so would delay gateway heartbeats and every other interaction.
+    Each measurement goes to ``on_lag``.
+    """
+
+    def __init__(self, interval: float = 0.5, on_lag: Optional[Callable[[float], None]] = None):
+        self.interval = interval
+        self.on_lag = on_lag
+        self.last = 0.0
+        self.max = 0.0
+        self.samples = 0
+        self._task = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.last = lag
+            self.max = max(self.max, lag)
+            self.samples += 1
+            if self.on_lag is not None:
+                self.on_lag(lag)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+import journal as journal_module
+from journal import LeagueJournal
+from league_store import LeagueStore
+from roster import Team, teams_to_json
+
+
+@pytest.fixture
+def league_dir(tmp_path):
+    teams = {"Alpha": Team("Alpha", 1), "Beta": Team("Beta", 2)}
+    (tmp_path / "team_data.json").write_text(json.dumps(teams_to_json(teams)))
+    (tmp_path / "registered_players.json").write_text("{}")
+    return tmp_path
+
+
+def open_store(directory, compact_every=1000):
+    journal = LeagueJournal(str(directory / "league_journal.jsonl"), str(directory / "league_history.jsonl"))
+    store = LeagueStore(str(directory / "team_data.json"), str(directory / "registered_players.json"),
+                        journal=journal, compact_every=compact_every)
+    store.load()
+    return store
+
+
+def flush(store):
+    for job in store.prepare_flush():
+        job()
+
+
+def test_replay_after_interrupted_compaction(league_dir):
+    store = open_store(league_dir)
+    store.register_player("1", "one")
+    store.sign_player("1", "Alpha", 2)
+    flush(store)
+
+    # Crash after the journal was moved aside but before the snapshot was written
+    store.journal.rotate()
+    store.journal.move_rotated()
+    store.register_player("2", "two")
+    store.sign_player("2", "Beta", 3, release_clause=True)
+    store.journal.sync()
+    assert os.path.exists(store.journal.rotated_path)
+
+    reloaded = open_store(league_dir)
+    assert reloaded.teams_of_player("1") == {"Alpha"}
+    assert reloaded.teams_of_player("2") == {"Beta"}
+    assert reloaded.release_clause_team("2") == "Beta"
+    assert reloaded.journal.seq == store.journal.seq
+
+    # The next snapshot folds both segments in and archives the rotated one
+    reloaded.compact_every = 1
+    flush(reloaded)
+    assert not os.path.exists(reloaded.journal.rotated_path)
+    reloaded.journal.close()
+    again = open_store(league_dir)
+    assert again.teams_of_player("1") == {"Alpha"}
+    assert again.get_player("2")["team"] == "Beta"
+
+
+def test_failed_rotation_keeps_records(league_dir, monkeypatch):
+    store = open_store(league_dir)
+    store.register_player("1", "one")
+    store.journal.rotate()
+    store.register_player("2", "two")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(journal_module.os, "replace", fail)
+    with pytest.raises(OSError):
+        store.journal.sync()
+    monkeypatch.undo()
+
+    store.register_player("3", "three")
+    store.journal.close()
+    replayed = [record["player"] for record in LeagueJournal(store.journal.path).read_records()]
+    assert replayed == ["1", "2", "3"]
+
+
+def test_torn_final_record_is_skipped(tmp_path):
+    path = tmp_path / "league_journal.jsonl"
+    journal = LeagueJournal(str(path), None)
+    journal.append({"op": "register", "player": "1", "name": "one"})
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op":"register","play')
+
+    records = list(LeagueJournal(str(path), None).read_records())
+    assert [record["player"] for record in records] == ["1"]
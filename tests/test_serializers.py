@@ -0,0 +1,52 @@
+import json
+import struct
+
+from roster import INFINITE_SEASONS, TEAM_DATA_FORMAT
+from serializers import BinaryFormat
+
+
+def league():
+    team_data = {"format": TEAM_DATA_FORMAT, "teams": {
+        "Alpha": {
+            "role_id": 111, "chairman": "1", "manager": "1", "assistant_manager": None,
+            "roster": [
+                {"id": 1, "seasons": INFINITE_SEASONS, "release_clause": False},
+                {"id": 2, "seasons": 3, "release_clause": True},
+                {"id": 4, "seasons": None, "release_clause": False},
+            ],
+        },
+        "Beta": {"role_id": None, "chairman": None, "manager": None, "assistant_manager": None, "roster": []},
+    }}
+    players = {
+        "1": {"name": "chair", "team": "Alpha", "seasons": INFINITE_SEASONS},
+        "2": {"name": "two", "id": "2", "team": "Alpha", "status": "signed", "2c": True, "rating": 87},
+        "3": {"name": "three", "id": "3", "status": "free_agent", "2c": False, "rating": "N/A"},
+        "4": {"name": "four", "id": "4", "team": "Alpha", "status": "signed", "rating": "B+"},
+    }
+    return team_data, players
+
+
+def header(raw):
+    (length,) = struct.unpack_from("<I", raw, 8)
+    return json.loads(raw[12:12 + length])
+
+
+def test_binary_round_trip_mixed_ratings_and_infinite_seasons():
+    fmt = BinaryFormat()
+    data = league()
+    raw = fmt.dumps(data)
+
+    # Both sections fit the packed layout rather than falling back to JSON
+    assert header(raw)["teams"] == 2
+    assert header(raw)["players"] == 4
+    assert fmt.loads(raw) == data
+
+
+def test_binary_round_trip_falls_back_for_unknown_fields():
+    fmt = BinaryFormat()
+    team_data, players = league()
+    players["3"]["nickname"] = "tres"
+    raw = fmt.dumps((team_data, players))
+
+    assert header(raw)["players"] is None
+    assert fmt.loads(raw) == (team_data, players)
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from league_store import LeagueStore
+from roster import Team, teams_to_json
+from transfers import parse_transfers, validate_transfers
+
+
+@pytest.fixture
+def store(tmp_path):
+    teams = {"Alpha": Team("Alpha", 1), "Beta": Team("Beta", 2)}
+    (tmp_path / "team_data.json").write_text(json.dumps(teams_to_json(teams)))
+    (tmp_path / "registered_players.json").write_text("{}")
+    store = LeagueStore(str(tmp_path / "team_data.json"), str(tmp_path / "registered_players.json"))
+    store.load()
+    for player_id in ("1", "2", "3"):
+        store.register_player(player_id, f"player {player_id}")
+    store.sign_player("1", "Alpha", 2)
+    store.sign_player("2", "Alpha", 2)
+    return store
+
+
+def transfers(csv_text):
+    return parse_transfers("transfers.csv", csv_text.encode("utf-8"))
+
+
+def test_rejects_signing_over_the_roster_cap(store):
+    rows = transfers("action,player_id,team,seasons\nsign,3,Alpha,1\nsign,3,Beta,1\n")
+    assert validate_transfers(store, rows, roster_cap=2) == {2: "Alpha roster is full (2/2)"}
+
+
+def test_release_earlier_in_the_batch_frees_a_spot(store):
+    rows = transfers("action,player_id,team,seasons\nrelease,1,Alpha,\nsign,3,Alpha,1\n")
+    assert validate_transfers(store, rows, roster_cap=2) == {}
+
+
+def test_rejects_unregistered_players_and_unknown_teams(store):
+    rows = transfers("action,player_id,team,seasons\nsign,99,Beta,1\nsign,3,Gamma,1\nrelease,3,Beta,\n")
+    assert validate_transfers(store, rows, roster_cap=2) == {
+        2: "player not registered",
+        3: "team Gamma not found",
+        4: "player not on Beta",
+    }
@@ -0,0 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class TransactionManager:
+    """Per-player and per-team asyncio locks.
+
+    ``transaction()`` takes every lock it needs in one sorted pass, so two
+    transactions touching overlapping entities can never deadlock. Work on
+    unrelated players and teams carries on in parallel. Locks are created on
+    demand and dropped once nobody holds or waits for them.
+    """
+
+    def __init__(self):
+        # key -> [lock, number of holders + waiters]
+        self._locks: Dict[Tuple[str, str], list] = {}
+
+    @staticmethod
+    def _keys(players: Iterable, teams: Iterable) -> List[Tuple[str, str]]:
+        keys = {("player", str(p)) for p in players if p is not None}
+        keys |= {("team", t) for t in teams if t}
+        return sorted(keys)
+
+    def _release(self, key: Tuple[str, str], locked: bool) -> None:
+        entry = self._locks[key]
+        if locked:
+            entry[0].release()
+        entry[1] -= 1
+        if not entry[1]:
+            del self._locks[key]
+
+    @asynccontextmanager
+    async def transaction(self, players: Iterable = (), teams: Iterable = ()):
+        keys = self._keys(players, teams)
+        held: List[Tuple[Tuple[str, str], bool]] = []
+        try:
+            for key in keys:
+                entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+                entry[1] += 1
+                held.append((key, False))
+                await entry[0].acquire()
+                held[-1] = (key, True)
+            yield
+        finally:
+            for key, locked in reversed(held):
+                self._release(key, locked)
+
+    def is_locked(self, player: Optional[str] = None, team: Optional[str] = None) -> bool:
+        key = ("player", str(player)) if player is not None else ("team", team)
+        entry = self._locks.get(key)
+        return bool(entry) and entry[0].locked()
+
+    @property
+    def active_keys(self) -> int:
+        return len(self._locks)
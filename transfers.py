@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import re
+from typing import Dict, List, Optional, Set
+
+SIGN = "sign"
+RELEASE = "release"
+ACTIONS = (SIGN, RELEASE)
+
+_MENTION = re.compile(r"^<@!?(\d+)>$")
+_TRUE = {"1", "true", "yes", "y", "rc"}
+
+
+class Transfer:
+    """One row of a bulk transfer file."""
+
+    __slots__ = ("row", "action", "player_id", "team_name", "seasons", "release_clause")
+
+    def __init__(self, row: int, action: str, player_id: str, team_name: str,
+                 seasons: Optional[int] = None, release_clause: bool = False):
+        self.row = row
+        self.action = action
+        self.player_id = player_id
+        self.team_name = team_name
+        self.seasons = seasons
+        self.release_clause = release_clause
+
+    def describe(self) -> str:
+        if self.action == SIGN:
+            return f"sign <@{self.player_id}> to {self.team_name} for {self.seasons} season(s)"
+        return f"release <@{self.player_id}> from {self.team_name}"
+
+    def __repr__(self):
+        return f"Transfer(row={self.row}, {self.action} {self.player_id} {self.team_name!r})"
+
+
+def _parse_row(row: int, item: dict) -> Transfer:
+    fields = {str(k).strip().lower(): v for k, v in item.items() if k is not None}
+    action = str(fields.get("action") or "").strip().lower()
+    if action not in ACTIONS:
+        raise ValueError(f"row {row}: action must be one of {', '.join(ACTIONS)}")
+
+    player = str(fields.get("player_id") or fields.get("player") or "").strip()
+    mention = _MENTION.match(player)
+    if mention:
+        player = mention.group(1)
+    if not player.isdigit():
+        raise ValueError(f"row {row}: player_id must be a Discord id or mention")
+
+    team_name = str(fields.get("team") or fields.get("team_name") or "").strip()
+    if not team_name:
+        raise ValueError(f"row {row}: team is required")
+
+    seasons = None
+    if action == SIGN:
+        try:
+            seasons = int(str(fields.get("seasons")).strip())
+        except ValueError:
+            raise ValueError(f"row {row}: seasons must be a whole number") from None
+        if seasons < 1:
+            raise ValueError(f"row {row}: seasons must be at least 1")
+    release_clause = str(fields.get("release_clause") or "").strip().lower() in _TRUE
+    return Transfer(row, action, player, team_name, seasons, release_clause)
+
+
+def parse_transfers(filename: str, data: bytes) -> List[Transfer]:
+    """Read transfers from a CSV file with a header row or a JSON list of objects.
+
+    Columns/keys: action (sign/release), player_id, team, seasons (sign
+    only) and optionally release_clause. Raises ValueError naming the first
+    bad row.
+    """
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}") from None
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValueError("JSON must be a list of objects")
+        return [_parse_row(row, item) for row, item in enumerate(items, start=1)]
+
+    # Row numbers match the spreadsheet, header being row 1
+    reader = csv.DictReader(io.StringIO(text))
+    return [_parse_row(row, item) for row, item in enumerate(reader, start=2) if any(item.values())]
+
+
+def validate_transfers(store, transfers: List[Transfer], roster_cap: int) -> Dict[int, str]:
+    """Check every row against the league as it would be after the rows before it.
+
+    Returns ``{row: problem}``; empty means the whole batch can be applied.
+    """
+    errors: Dict[int, str] = {}
+    sizes: Dict[str, int] = {}
+    # player -> teams, for the players the batch touches
+    teams: Dict[str, Set[str]] = {}
+
+    for transfer in transfers:
+        player_id, team_name = transfer.player_id, transfer.team_name
+        if not store.has_team(team_name):
+            errors[transfer.row] = f"team {team_name} not found"
+            continue
+        if player_id not in teams:
+            teams[player_id] = set(store.teams_of_player(player_id))
+        if team_name not in sizes:
+            sizes[team_name] = store.roster_size(team_name)
+
+        if transfer.action == SIGN:
+            if not store.is_registered(player_id):
+                errors[transfer.row] = "player not registered"
+                continue
+            if team_name not in teams[player_id]:
+                if sizes[team_name] >= roster_cap:
+                    errors[transfer.row] = f"{team_name} roster is full ({roster_cap}/{roster_cap})"
+                    continue
+                sizes[team_name] += 1
+            # Signing drops every other roster spot
+            for other in teams[player_id] - {team_name}:
+                sizes[other] = sizes.get(other, store.roster_size(other)) - 1
+            teams[player_id] = {team_name}
+        else:
+            if team_name not in teams[player_id]:
+                errors[transfer.row] = f"player not on {team_name}"
+                continue
+            sizes[team_name] -= 1
+            teams[player_id].discard(team_name)
+    return errors